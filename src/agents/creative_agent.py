@@ -1,33 +1,73 @@
+import contextvars
+import hashlib
 import json
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.campaign_index import TrigramIndex
+from src.utils.config_utils import get_config_value
+from src.utils.data_utils import fold_campaign_name
 from src.utils.logging_utils import log_info, log_error
 from src.utils.llm import GeminiLLM
-import re
+from src.utils.json_utils import extract_json
+from src.utils.result_cache import ResultCache
+from src.utils.summary_utils import campaign_slice
+from src.utils.tracing import span
+
+# Recommendation fields holding ad copy that is de-duplicated across hypotheses
+COPY_FIELDS = ("ad_copy_suggestions",)
 
-def extract_json(text):
-    """Extracts valid JSON from AI response even if wrapped inside markdown or text."""
-    text = text.replace("```json", "").replace("```", "").strip()
-    match = re.search(r"\[.*\]", text, re.DOTALL)  # Expecting list format
-    if match:
-        return match.group(0).strip()
-    return text
 
 class CreativeAgent:
-    def __init__(self, prompt_path="prompts/creative.md"):
-        self.llm = GeminiLLM()
+    def __init__(self, prompt_path="prompts/creative.md", llm=None, fan_out=None, max_concurrency=None,
+                 dedup_threshold=None, cache=None):
+        self.llm = llm or GeminiLLM()
         with open(prompt_path, "r", encoding="utf-8") as f:
             self.prompt_template = f.read()
+        self.fan_out = get_config_value("creative", "fan_out", True) if fan_out is None else fan_out
+        self.max_concurrency = max_concurrency or get_config_value("creative", "max_concurrency", 4)
+        self.dedup_threshold = (
+            get_config_value("creative", "dedup_threshold", 0.85) if dedup_threshold is None else dedup_threshold
+        )
+        # Creatives per (campaign, hypothesis) fingerprint (None: configured default, False: disabled)
+        if cache is None and get_config_value("creative", "cache", True):
+            cache = ResultCache(cache_dir=get_config_value("creative", "cache_dir", ".cache/creatives"))
+        self.cache = cache or None
 
-    def run(self, objective, insight_output, data_agent_output=None):
+    def run(self, objective, insight_output, data_agent_output=None, on_item=None):
         """
         Generates creative optimization strategies based on validated insights.
+        If on_item is given, each recommendation is passed to it as soon as
+        it has streamed in.
+
+        In fan-out mode (two or more hypotheses) each hypothesis gets its own
+        request with only its campaign's slice of the data; requests run
+        concurrently and near-identical ad copy is removed across results.
         """
         try:
             log_info("Running CreativeAgent to generate creative improvements...")
 
+            hypotheses = [h for h in insight_output if isinstance(h, dict)] if isinstance(insight_output, list) else []
+            if self.fan_out and len(hypotheses) >= 2:
+                return self._run_fan_out(objective, hypotheses, data_agent_output, on_item)
+
+            final_prompt = self._build_prompt(objective, insight_output, data_agent_output)
+
+            # Stream when a consumer wants items as soon as each one is complete
+            if on_item is not None:
+                response = self.llm.llm_call_streaming(final_prompt, on_item=on_item)
+            else:
+                response = self.llm.llm_call(final_prompt)
+            return self._parse(response)
+
+        except Exception as e:
+            log_error(f"CreativeAgent failed: {str(e)}")
+            return {"error": "CreativeAgent failed", "details": str(e)}
+
+    def _build_prompt(self, objective, insights, data_agent_output):
+        with span("creative.prompt_build", "prompt") as s:
             # 🧠 Prepare structured final input for LLM
             structured_input = {
                 "objective": objective,
-                "validated_insights": insight_output,
+                "validated_insights": insights,
                 "campaign_performance": data_agent_output if data_agent_output else {}
             }
 
@@ -35,19 +75,122 @@ class CreativeAgent:
             final_prompt = (
                 self.prompt_template +
                 "\n\nHere is the validated insight and context:\n" +
-                json.dumps(structured_input, indent=2)
+                json.dumps(structured_input, separators=(",", ":"))
             )
+            s.set(prompt_chars=len(final_prompt))
+        return final_prompt
 
-            # 🚀 Call LLM
-            response = self.llm.llm_call(final_prompt)
-
-            # 🧹 Extract valid JSON
-            try:
+    def _parse(self, response):
+        # 🧹 Extract valid JSON
+        try:
+            with span("creative.json_extract", "parse", response_chars=len(response)):
                 clean_json = extract_json(response)
                 return json.loads(clean_json)
-            except json.JSONDecodeError:
-                return {"raw_response": response, "error": "LLM did not return valid JSON"}
+        except json.JSONDecodeError:
+            return {"raw_response": response, "error": "LLM did not return valid JSON"}
 
-        except Exception as e:
-            log_error(f"CreativeAgent failed: {str(e)}")
-            return {"error": "CreativeAgent failed", "details": str(e)}
+    # ------------------------------------------------------------------ #
+    # Fan-out: one request per hypothesis
+
+    def _run_fan_out(self, objective, hypotheses, data_agent_output, on_item):
+        """
+        Results are merged in hypothesis order (each is emitted to on_item as
+        soon as it and every earlier one are done), so de-duplication keeps
+        the copy of the earliest hypothesis regardless of completion order.
+        """
+        log_info(f"🎨 CreativeAgent fan-out over {len(hypotheses)} hypotheses")
+        workers = max(1, min(self.max_concurrency, len(hypotheses)))
+        seen = TrigramIndex()
+        recommendations, removed = [], 0
+
+        with span("creative.fan_out", "llm", hypotheses=len(hypotheses)) as s:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="creative") as pool:
+                # One context copy per task, so each call's spans nest under this one
+                futures = [
+                    pool.submit(contextvars.copy_context().run, self._generate_one, objective, h, data_agent_output)
+                    for h in hypotheses
+                ]
+                for future in futures:
+                    for recommendation in future.result():
+                        recommendation, dropped = self._dedupe(recommendation, seen)
+                        removed += dropped
+                        if recommendation is None:
+                            continue
+                        recommendations.append(recommendation)
+                        if on_item is not None:
+                            on_item(recommendation)
+            s.set(recommendations=len(recommendations), duplicate_copy_removed=removed)
+
+        if removed:
+            log_info(f"🧬 Removed {removed} near-duplicate ad copy lines")
+        if not recommendations:
+            return {"error": "CreativeAgent: no hypothesis produced valid recommendations"}
+        return recommendations
+
+    def _generate_one(self, objective, hypothesis, data_agent_output):
+        """Recommendations for one hypothesis, from the cache when its fingerprint was seen before."""
+        campaign = hypothesis.get("campaign")
+        data = campaign_slice(data_agent_output, campaign) if data_agent_output else {}
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(
+                {
+                    "objective": objective,
+                    "campaign": fold_campaign_name(campaign) if campaign else None,
+                    # Ids are renumbered between runs; the content is what matters
+                    "hypothesis": {k: v for k, v in hypothesis.items() if k != "hypothesis_id"},
+                },
+                {
+                    "data": data,
+                    "model": getattr(self.llm, "model_name", None),
+                    "prompt": hashlib.sha256(self.prompt_template.encode("utf-8")).hexdigest(),
+                },
+            )
+            cached = self.cache.get(key)
+            if cached is not None:
+                return self._stamp(cached["recommendations"], hypothesis)
+
+        output = self._parse(self.llm.llm_call(self._build_prompt(objective, [hypothesis], data)))
+        if isinstance(output, dict) and "recommendations" in output:
+            output = output["recommendations"]
+        if not isinstance(output, list):
+            log_error(f"CreativeAgent: no valid recommendations for {hypothesis.get('hypothesis_id')}")
+            return []
+        output = [r for r in output if isinstance(r, dict)]
+        if key is not None and output:
+            output = self.cache.put(key, {"recommendations": output})["recommendations"]
+        return self._stamp(output, hypothesis)
+
+    @staticmethod
+    def _stamp(recommendations, hypothesis):
+        return [
+            {**r, "hypothesis_id": hypothesis.get("hypothesis_id", r.get("hypothesis_id")),
+             "campaign": r.get("campaign") or hypothesis.get("campaign")}
+            for r in recommendations
+        ]
+
+    def _dedupe(self, recommendation, seen):
+        """
+        (recommendation without ad copy near-identical to copy already kept,
+        lines removed). None when every line of its copy was a duplicate.
+        """
+        removed, had_copy, kept_any = 0, False, False
+        recommendation = dict(recommendation)
+        for field in COPY_FIELDS:
+            lines = recommendation.get(field)
+            if not isinstance(lines, list):
+                continue
+            kept = []
+            for line in lines:
+                folded = fold_campaign_name(line)
+                had_copy = True
+                if folded and seen.search(folded, n=1, min_score=self.dedup_threshold):
+                    removed += 1
+                    continue
+                seen.add(folded)
+                kept.append(line)
+            recommendation[field] = kept
+            kept_any = kept_any or bool(kept)
+        if had_copy and not kept_any:
+            return None, removed
+        return recommendation, removed
@@ -1,65 +1,174 @@
+import numpy as np
 import pandas as pd
 from datetime import timedelta
-from difflib import get_close_matches
-from src.utils.data_utils import load_csv_data
+from src.utils.aggregation import (
+    GROUP_DIMENSIONS, daily_trends, summarize_groups,
+    peak_from_daily_aggregates, segments_from_partials, summarize_daily_aggregates,
+    summarize_daily_aggregates_by_campaign, trends_from_daily_aggregates
+)
+from src.utils.anomaly_index import INDEX_VERSION, AnomalyIndex
+from src.utils.campaign_canonical import CampaignCanonicalizer
+from src.utils.campaign_index import CampaignIndex
+from src.utils.chunked_scan import scan_daily_aggregates, scan_rows, scan_segment_aggregates
+from src.utils.config_utils import get_config_value
+from src.utils.data_utils import (
+    AGGREGATE_VERSION, file_fingerprint, fold_campaign_name, ingest_rows, load_daily_aggregates,
+    save_daily_aggregates
+)
+from src.utils.dataset_store import STORE_VERSION, load_dataset
 from src.utils.logging_utils import log_info, log_error
+from src.utils.result_cache import ResultCache
+from src.utils.sharding import ShardedAggregator
+from src.utils.tracing import span
 
 class DataAgent:
-    def __init__(self, file_path="data/clean.csv"):
+    def __init__(self, file_path="data/clean.csv", cache_root=".cache/dataset",
+                 aggregate_root=".cache/aggregates", streaming=None, chunk_rows=None, result_cache=None,
+                 canonical_root=".cache/campaigns"):
         self.file_path = file_path
-        self.data = load_csv_data(file_path)
+        self.cache_root = cache_root
+        self.aggregate_root = aggregate_root
+        # Streaming mode never holds the raw dataset: window queries are answered
+        # from per-(campaign, date) aggregates and everything else is a chunked scan
+        self.streaming = get_config_value("data", "streaming", False) if streaming is None else streaming
+        self.chunk_rows = chunk_rows or get_config_value("data", "chunk_rows", None)
+        # Large group-bys are sharded by campaign across a process pool
+        self.aggregator = ShardedAggregator()
+        # Persisted spelling -> canonical campaign table for this dataset
+        self.canonicalizer = CampaignCanonicalizer.for_source(file_path, root=canonical_root)
+        # Memoized results keyed by normalized planner parameters + dataset version
+        # (None: configured default, False: disabled)
+        if result_cache is None and get_config_value("result_cache", "enabled", True):
+            result_cache = ResultCache.from_config()
+        self.result_cache = result_cache or None
+        # Precomputed anomalies / change points, built with the daily aggregates
+        self.anomaly_index = None
+        self.max_events = get_config_value("anomaly_index", "max_events", 5)
+
+        if self.streaming:
+            self.data = None
+            daily = load_daily_aggregates(file_path, aggregate_root)
+            if daily is None:
+                daily = scan_daily_aggregates(file_path, self.chunk_rows, self.canonicalizer.canonicalize)
+                save_daily_aggregates(daily, file_path, aggregate_root)
+            self._index_daily(daily)
+            return
+
+        self._load_raw()
+
+        # Per-(campaign, date) aggregates answer window queries without raw rows
+        self.daily = None
+        if "date" in self.data.columns:
+            daily = load_daily_aggregates(file_path, aggregate_root)
+            if daily is None:
+                daily = self.aggregator.aggregate_daily_rows(self.data, self.canonicalizer.canonicalize)
+                save_daily_aggregates(daily, file_path, aggregate_root)
+            self._index_daily(daily)
+
+    def _load_raw(self):
+        # Columnar cache: categorical string columns, date-sorted rows and a
+        # precomputed campaign_name_clean; rebuilt only when the CSV changes
+        self.data = load_dataset(self.file_path, cache_root=self.cache_root, canonicalizer=self.canonicalizer)
 
         # Normalize all column names to lowercase
         self.data.columns = self.data.columns.str.lower()
 
         # Create a cleaned version of campaign names for matching
-        self.data["campaign_name_clean"] = (
-            self.data["campaign_name"]
-            .str.lower()
-            .str.strip()
-            .str.replace(r'\s+', ' ', regex=True)
+        if "campaign_name_clean" not in self.data.columns:
+            self.data["campaign_name_clean"] = self.canonicalizer.canonicalize(self.data["campaign_name"]).astype("category")
+
+        # Index unique campaign names once; filtering works on codes / row ranges
+        self.campaign_index = CampaignIndex(self.data["campaign_name_clean"])
+        if "date" in self.data.columns:
+            self._dates = self.data["date"].to_numpy(dtype="datetime64[ns]")
+            self._date_sorted = bool(self.data["date"].is_monotonic_increasing)
+        self._raw_stale = False
+
+    def _index_daily(self, daily):
+        daily = daily.sort_values(["date", "campaign_name_clean"], kind="mergesort").reset_index(drop=True)
+        daily["campaign_name_clean"] = daily["campaign_name_clean"].astype("category")
+        self.daily = daily
+        self.daily_index = CampaignIndex(daily["campaign_name_clean"])
+        self._daily_dates = daily["date"].to_numpy(dtype="datetime64[ns]")
+        self.anomaly_index = AnomalyIndex.for_dataset(daily, self.file_path, self.aggregate_root)
+
+    def ingest(self, new_rows):
+        """Append new rows to the source CSV and fold them into the cached aggregates."""
+        daily = ingest_rows(
+            new_rows, self.file_path, existing=self.daily, cache_root=self.aggregate_root,
+            canonicalize=self.canonicalizer.canonicalize,
         )
+        if daily is not None and daily is not self.daily:
+            self._index_daily(daily)
+            # Raw rows are only needed for segment breakdowns; reload lazily
+            self._raw_stale = True
+        return self.daily
 
-    def filter_campaign_data(self, campaign_names=None, days=None):
-        """Smart filtering with support for exact, partial, and fuzzy matching."""
+    def close(self):
+        """Shut down the aggregation process pool, if a large group-by started one."""
+        self.aggregator.close()
+
+    def __enter__(self):
+        return self
 
-        df = self.data.copy()
+    def __exit__(self, *exc):
+        self.close()
 
-        # 🔹 Campaign Filtering
+    def _select(self, index, dates, date_sorted, campaign_names=None, days=None):
+        """
+        Resolve campaign names and the date window to row positions.
+        Returns (None, None) when nothing is filtered, (positions, None) on a
+        match, or (None, suggestions) when no campaign name matched.
+        """
+        positions = None
+
+        # 🔹 Campaign Filtering (resolved over unique names, not rows)
         if campaign_names:
-            # Normalize input
-            if isinstance(campaign_names, list):
-                campaign_names_clean = [c.lower().strip() for c in campaign_names]
+            if not isinstance(campaign_names, list):
+                campaign_names = [campaign_names]
+
+            # 🔎 Smart matching (partial / contains match, spelling-folded, typo-tolerant)
+            codes = index.match(campaign_names)
+
+            # ❗ If still empty, suggest the most similar names
+            if not codes:
+                return None, index.suggest(campaign_names)
+
+            positions = index.rows_for(codes)
+
+        # 🔹 Date Filtering (rows are date-sorted, so the window is a suffix)
+        if days and dates is not None:
+            selected = dates if positions is None else dates[positions]
+            if not len(selected):
+                return np.empty(0, dtype=np.int64), None
+            window = np.timedelta64(timedelta(days=days))
+            if date_sorted:
+                first = np.searchsorted(selected, selected[-1] - window, side="left")
+                positions = (np.arange(first, len(dates)) if positions is None
+                             else positions[first:])
             else:
-                campaign_names_clean = [campaign_names.lower().strip()]
-
-            # 🔎 Smart matching (partial / contains match)
-            matched_rows = df[df["campaign_name_clean"].apply(
-                lambda x: any(name in x for name in campaign_names_clean)
-            )]
-
-            # ❗ If still empty, try fuzzy matching (most similar name)
-            if matched_rows.empty:
-                suggestions = []
-                for name in campaign_names_clean:
-                    suggestions += get_close_matches(
-                        name,
-                        df["campaign_name_clean"].unique(),
-                        n=3,
-                        cutoff=0.5
-                    )
-                return pd.DataFrame(), list(set(suggestions))
-
-            df = matched_rows
-
-        # 🔹 Date Filtering
-        if days and "date" in df.columns:
-            df["date"] = pd.to_datetime(df["date"], errors='ignore')
-            end_date = df["date"].max()
-            start_date = end_date - timedelta(days=days)
-            df = df[df["date"] >= start_date]
-
-        return df, None
+                keep = selected >= selected[~np.isnat(selected)].max() - window
+                positions = np.flatnonzero(keep) if positions is None else positions[keep]
+
+        return positions, None
+
+    def filter_campaign_data(self, campaign_names=None, days=None):
+        """Smart filtering with support for exact, partial, and fuzzy matching."""
+        if self.streaming:
+            return self._scan_campaign_data(campaign_names, days)
+        if self._raw_stale:
+            self._load_raw()
+        positions, suggestions = self._select(
+            self.campaign_index,
+            self._dates if "date" in self.data.columns else None,
+            "date" in self.data.columns and self._date_sorted,
+            campaign_names, days
+        )
+        if suggestions is not None:
+            return pd.DataFrame(), suggestions
+        if positions is None:
+            return self.data, None
+        return self.data.iloc[positions], None
 
     def summarize_performance(self, df):
         """Generate summary for a single campaign."""
@@ -74,12 +183,16 @@ class DataAgent:
         }
 
     def summarize_multiple_campaigns(self, df):
-        """Return separate summaries for multiple campaigns."""
-        summary = {}
-        for campaign in df["campaign_name_clean"].unique():
-            sub_df = df[df["campaign_name_clean"] == campaign]
-            summary[campaign] = self.summarize_performance(sub_df)
-        return summary
+        """Return separate summaries for multiple campaigns (single groupby pass)."""
+        return summarize_groups(df, ["campaign_name_clean"])
+
+    def summarize_segments(self, df, dimensions):
+        """Totals/means and peak spend/revenue days per segment, e.g. ["platform", "country"]."""
+        dimensions = [d for d in dimensions if d in GROUP_DIMENSIONS]
+        if not dimensions:
+            return None
+        partial = self.aggregator.aggregate_rows(df, dimensions, {"campaign": "campaign_name", "date": "date"})
+        return {"dimensions": dimensions, **segments_from_partials(partial, dimensions)}
 
     def get_peak_metric(self, df, metric):
         """Return peak metric value and associated date/campaign."""
@@ -94,27 +207,77 @@ class DataAgent:
 
     def get_daily_trends(self, df):
         """Day-wise ROAS, Spend, CTR trends for comparison."""
-        df["date"] = pd.to_datetime(df["date"], errors='ignore')
-        daily = df.groupby(["date", "campaign_name_clean"]).agg({
-            "revenue": "sum",
-            "spend": "sum",
-            "roas": "mean",
-            "ctr": "mean"
-        }).reset_index()
-
-        # Convert dates to string for JSON serialization
-        daily["date"] = daily["date"].astype(str)
-        return daily.to_dict(orient="records")
+        return daily_trends(df, ["campaign_name_clean"])
 
     def run(self, planner_output):
-        try:
-            log_info("Running DataAgent...")
-            print("📈 DataAgent Initialized...")
+        log_info("Running DataAgent...")
+        print("📈 DataAgent Initialized...")
+        if self.result_cache is None:
+            return self._compute(planner_output)
 
+        with span("data.result_cache", "cache") as s:
+            key = self.result_cache.make_key(self.normalize_request(planner_output), self.dataset_version())
+            result = self.result_cache.get(key)
+            s.set(hit=result is not None)
+        if result is not None:
+            log_info(f"🗃 DataAgent result cache hit ({self.result_cache.stats()['hit_rate']} hit rate)")
+            # Only the echoed request differs between equivalent requests
+            campaign_names = planner_output.get("campaign_name", None)
+            result["campaigns_requested"] = campaign_names if campaign_names else "All campaigns"
+            return result
+
+        result = self._compute(planner_output)
+        if "error" not in result:
+            result = self.result_cache.put(key, result)
+        return result
+
+    @staticmethod
+    def normalize_request(planner_output) -> dict:
+        """
+        The planner parameters that determine the result, in canonical form:
+        campaign names folded and sorted (matching ignores case, separators
+        and order), a missing window or breakdown as None.
+        """
+        campaign_names = planner_output.get("campaign_name") or []
+        if not isinstance(campaign_names, list):
+            campaign_names = [campaign_names]
+        breakdown_by = planner_output.get("breakdown_by") or []
+        if isinstance(breakdown_by, str):
+            breakdown_by = [breakdown_by]
+        return {
+            "campaigns": sorted(fold_campaign_name(c) for c in campaign_names) or None,
+            # A single-item list and a string give the same (non-comparison) result
+            "comparison": len(campaign_names) > 1,
+            "days": planner_output.get("analysis_window_days") or None,
+            "breakdown_by": list(breakdown_by) or None,
+        }
+
+    def dataset_version(self) -> dict:
+        """Identifies the data a result was computed from (changes on ingest)."""
+        return {
+            "path": self.file_path,
+            **file_fingerprint(self.file_path),
+            "store": STORE_VERSION,
+            "aggregates": AGGREGATE_VERSION,
+            "anomalies": {"version": INDEX_VERSION, **(self.anomaly_index.params if self.anomaly_index else {})},
+            "streaming": bool(self.streaming),
+        }
+
+    def _compute(self, planner_output):
+        try:
             campaign_names = planner_output.get("campaign_name", None)
             days = planner_output.get("analysis_window_days", None)
+            breakdown_by = planner_output.get("breakdown_by")
+
+            # Fast path: answer from cached per-(campaign, date) aggregates
+            if self.daily is not None and not breakdown_by:
+                return self._run_from_aggregates(campaign_names, days)
+            if self.streaming:
+                return self._run_streaming(campaign_names, days, breakdown_by)
 
-            filtered, suggestions = self.filter_campaign_data(campaign_names, days)
+            with span("data.filter", "pandas") as s:
+                filtered, suggestions = self.filter_campaign_data(campaign_names, days)
+                s.set(rows=len(filtered))
 
             # ⚠️ No match found
             if filtered.empty:
@@ -128,20 +291,139 @@ class DataAgent:
             # Detect comparison scenario
             is_comparison = isinstance(campaign_names, list) and len(campaign_names) > 1
 
+            with span("data.aggregate", "pandas", rows=len(filtered)):
+                result = {
+                    "campaigns_requested": campaign_names if campaign_names else "All campaigns",
+                    "date_range": f"{str(filtered['date'].min().date())} to {str(filtered['date'].max().date())}",
+                    "campaign_summaries": (
+                        self.summarize_multiple_campaigns(filtered) if is_comparison
+                        else self.summarize_performance(filtered)
+                    ),
+                    "peak_spend_day": self.get_peak_metric(filtered, "spend"),
+                    "peak_revenue_day": self.get_peak_metric(filtered, "revenue"),
+                    "daily_trends": self.get_daily_trends(filtered)
+                }
+                events = self.metric_events(filtered["campaign_name_clean"].unique(), filtered["date"])
+                if events is not None:
+                    result["metric_events"] = events
+
+                # Optional breakdown by adset / platform / country / creative / audience
+                if breakdown_by:
+                    if isinstance(breakdown_by, str):
+                        breakdown_by = [breakdown_by]
+                    segments = self.summarize_segments(filtered, breakdown_by)
+                    if segments:
+                        result["segment_breakdown"] = segments
+
+            return result
+
+        except Exception as e:
+            log_error(f"DataAgent failed: {str(e)}")
+            return {"error": "DataAgent failed", "details": str(e)}
+
+    def _select_daily(self, campaign_names, days):
+        """(matching rows of self.daily, suggestions) for the campaign / window filter."""
+        positions, suggestions = self._select(
+            self.daily_index, self._daily_dates, True, campaign_names, days
+        )
+        daily = self.daily if positions is None else self.daily.iloc[positions]
+        return daily, suggestions
+
+    def campaign_names(self):
+        """Canonical campaign names (the same list object until the data is re-indexed)."""
+        index = self.daily_index if self.daily is not None else self.campaign_index
+        return index.names
+
+    def _available_campaigns(self):
+        if self.data is None:
+            return list(self.daily_index.names)
+        return list(self.data["campaign_name"].unique())
+
+    def _run_from_aggregates(self, campaign_names, days):
+        """Same output as the raw-row path, computed from self.daily only."""
+        with span("data.filter", "pandas", source="daily_aggregates") as s:
+            daily, suggestions = self._select_daily(campaign_names, days)
+            s.set(rows=len(daily))
+
+        # ⚠️ No match found
+        if suggestions is not None or daily.empty:
+            return {
+                "error": "No matching campaign data found.",
+                "requested_campaigns": campaign_names,
+                "suggested_campaigns": suggestions,
+                "available_campaigns": self._available_campaigns()
+            }
+
+        # Detect comparison scenario
+        is_comparison = isinstance(campaign_names, list) and len(campaign_names) > 1
+
+        with span("data.aggregate", "pandas", source="daily_aggregates", rows=len(daily)):
             result = {
                 "campaigns_requested": campaign_names if campaign_names else "All campaigns",
-                "date_range": f"{str(filtered['date'].min().date())} to {str(filtered['date'].max().date())}",
+                "date_range": f"{str(daily['date'].min().date())} to {str(daily['date'].max().date())}",
                 "campaign_summaries": (
-                    self.summarize_multiple_campaigns(filtered) if is_comparison
-                    else self.summarize_performance(filtered)
+                    summarize_daily_aggregates_by_campaign(daily) if is_comparison
+                    else summarize_daily_aggregates(daily)
                 ),
-                "peak_spend_day": self.get_peak_metric(filtered, "spend"),
-                "peak_revenue_day": self.get_peak_metric(filtered, "revenue"),
-                "daily_trends": self.get_daily_trends(filtered)
+                "peak_spend_day": peak_from_daily_aggregates(daily, "spend"),
+                "peak_revenue_day": peak_from_daily_aggregates(daily, "revenue"),
+                "daily_trends": trends_from_daily_aggregates(daily)
             }
+            events = self.metric_events(daily["campaign_name_clean"].astype(str).unique(), daily["date"])
+            if events is not None:
+                result["metric_events"] = events
+            return result
+
+    def metric_events(self, campaigns, dates):
+        """
+        Indexed anomalies and change points of `campaigns` inside the span
+        of `dates`, strongest max_events per campaign; None without an index.
+        """
+        if self.anomaly_index is None or dates.empty:
+            return None
+        with span("data.metric_events", "compute", campaigns=len(campaigns)):
+            return self.anomaly_index.lookup_many(
+                campaigns, dates.min(), dates.max(), limit=self.max_events
+            )
 
+    # ------------------------------------------------------------------ #
+    # Streaming mode: predicates come from the daily aggregates and are
+    # pushed into a chunked scan of the CSV.
+
+    def _scan_predicates(self, campaign_names, days):
+        """(cleaned campaign names or None, start date or None, suggestions)."""
+        daily, suggestions = self._select_daily(campaign_names, days)
+        if suggestions is not None:
+            return None, None, suggestions
+        campaigns = daily["campaign_name_clean"].astype(str).unique() if campaign_names else None
+        start_date = daily["date"].min() if days and not daily.empty else None
+        return campaigns, start_date, None
+
+    def _scan_campaign_data(self, campaign_names, days):
+        campaigns, start_date, suggestions = self._scan_predicates(campaign_names, days)
+        if suggestions is not None:
+            return pd.DataFrame(), suggestions
+        return scan_rows(
+            self.file_path, campaigns, start_date, self.chunk_rows, self.canonicalizer.canonicalize
+        ), None
+
+    def _run_streaming(self, campaign_names, days, breakdown_by):
+        """Aggregate answer plus a segment breakdown merged from a chunked scan."""
+        result = self._run_from_aggregates(campaign_names, days)
+        if "error" in result:
             return result
 
-        except Exception as e:
-            log_error(f"DataAgent failed: {str(e)}")
-            return {"error": "DataAgent failed", "details": str(e)}
\ No newline at end of file
+        dimensions = [breakdown_by] if isinstance(breakdown_by, str) else list(breakdown_by)
+        dimensions = [d for d in dimensions if d in GROUP_DIMENSIONS]
+        if not dimensions:
+            return result
+
+        campaigns, start_date, _ = self._scan_predicates(campaign_names, days)
+        with span("data.scan_segments", "pandas", dimensions=dimensions):
+            partial = scan_segment_aggregates(
+                self.file_path, dimensions, campaigns, start_date, self.chunk_rows,
+                self.canonicalizer.canonicalize,
+            )
+        if partial is not None and not partial.empty:
+            result["segment_breakdown"] = {"dimensions": dimensions, **segments_from_partials(partial, dimensions)}
+        return result
@@ -1,35 +1,66 @@
 import json
-import re
 from src.utils.logging_utils import log_info, log_error
 from src.utils.llm import GeminiLLM
-
-
-def extract_json(text):
-    """Extracts valid JSON from AI response even if wrapped inside markdown or text."""
-    text = text.replace("```json", "").replace("```", "").strip()
-    match = re.search(r"\[.*\]", text, re.DOTALL)  # Expecting list format
-    if match:
-        return match.group(0).strip()
-    return text
+from src.utils.json_utils import extract_json
+from src.utils.hypothesis_rules import HypothesisRuleValidator
+from src.utils.prompt_utils import load_prompt
+from src.utils.tracing import span
 
 
 class EvaluatorAgent:
-    def __init__(self, model_name="gemini-2.5-flash"):
-        self.llm = GeminiLLM(model_name=model_name)
+    def __init__(self, model_name="gemini-2.5-flash", llm=None, use_rules=True):
+        self.llm = llm or GeminiLLM(model_name=model_name)
+        self.rules = HypothesisRuleValidator() if use_rules else None
 
-    def run(self, objective, data_agent_output, insight_output):
+    def run(self, objective, data_agent_output, insight_output, full_data_output=None, on_item=None):
         """
         Receives planner objective, structured DataAgent output, 
         and InsightAgent hypotheses to validate whether
         the insights are supported by actual evidence.
+
+        Clear-cut hypotheses are settled locally by HypothesisRuleValidator
+        (config.yaml thresholds + significance tests on daily trends); only
+        the ambiguous ones are sent to the LLM. `full_data_output` is the
+        uncompacted DataAgent output carrying `daily_trends`. on_item, if
+        given, receives each verdict as soon as it is available.
         """
 
         try:
             log_info("Running EvaluatorAgent to validate insights...")
 
+            local_results, to_escalate = [], insight_output
+            if self.rules is not None:
+                with span("evaluator.rules", "compute") as s:
+                    local_results, to_escalate = self.rules.validate(
+                        insight_output, full_data_output or data_agent_output
+                    )
+                    s.set(settled=len(local_results), escalated=len(to_escalate))
+                if local_results:
+                    if on_item is not None:
+                        for result in local_results:
+                            on_item(result)
+                    log_info(
+                        f"⚡ EvaluatorAgent rules settled {len(local_results)} hypotheses, "
+                        f"escalating {len(to_escalate)} to LLM"
+                    )
+                if not to_escalate:
+                    return local_results
+
+            llm_results = self._evaluate_with_llm(objective, data_agent_output, to_escalate, on_item)
+            if not local_results:
+                return llm_results
+            if not isinstance(llm_results, list):
+                return local_results + [llm_results]
+            return self._in_input_order(insight_output, local_results + llm_results)
+
+        except Exception as e:
+            log_error(f"EvaluatorAgent failed: {str(e)}")
+            return {"error": "EvaluatorAgent runtime failure", "details": str(e)}
+
+    def _evaluate_with_llm(self, objective, data_agent_output, insight_output, on_item=None):
+        with span("evaluator.prompt_build", "prompt") as s:
             # Load evaluator prompt template
-            with open("prompts/evaluator.md", "r", encoding="utf-8") as f:
-                prompt_template = f.read()
+            prompt_template = load_prompt("prompts/evaluator.md")
 
             # Construct LLM prompt
             final_prompt = (
@@ -37,22 +68,31 @@ class EvaluatorAgent:
                 + "\n\n📌 Planner Objective:\n"
                 + json.dumps(objective, indent=2)
                 + "\n\n📊 Structured Data Summary:\n"
-                + json.dumps(data_agent_output, indent=2)
+                + json.dumps(data_agent_output, separators=(",", ":"))
                 + "\n\n💡 Hypotheses to Evaluate:\n"
                 + json.dumps(insight_output, indent=2)
             )
+            s.set(prompt_chars=len(final_prompt))
 
-            # Call to LLM
+        # Stream when a consumer wants items as soon as each one is complete
+        if on_item is not None:
+            llm_response = self.llm.llm_call_streaming(final_prompt, on_item=on_item)
+        else:
             llm_response = self.llm.llm_call(final_prompt)
 
-            # Extract JSON from AI output
-            try:
+        # Extract JSON from AI output
+        try:
+            with span("evaluator.json_extract", "parse", response_chars=len(llm_response)):
                 clean_json = extract_json(llm_response)
                 return json.loads(clean_json)
-            except json.JSONDecodeError:
-                log_error("EvaluatorAgent: Invalid JSON returned.")
-                return {"error": "EvaluatorAgent: Invalid LLM output", "raw_output": llm_response}
+        except json.JSONDecodeError:
+            log_error("EvaluatorAgent: Invalid JSON returned.")
+            return {"error": "EvaluatorAgent: Invalid LLM output", "raw_output": llm_response}
 
-        except Exception as e:
-            log_error(f"EvaluatorAgent failed: {str(e)}")
-            return {"error": "EvaluatorAgent runtime failure", "details": str(e)}
\ No newline at end of file
+    @staticmethod
+    def _in_input_order(hypotheses, results):
+        order = {h.get("hypothesis_id"): i for i, h in enumerate(hypotheses) if isinstance(h, dict)}
+        return sorted(
+            results,
+            key=lambda r: order.get(r.get("hypothesis_id"), len(order)) if isinstance(r, dict) else len(order)
+        )
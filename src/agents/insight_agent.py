@@ -1,56 +1,160 @@
+import contextvars
 import json
-import re
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.config_utils import get_config_value
 from src.utils.logging_utils import log_info, log_error
 from src.utils.llm import GeminiLLM
+from src.utils.json_utils import extract_json
+from src.utils.prompt_utils import load_prompt
+from src.utils.tracing import span
 
-
-def extract_json(text):
-    """Extracts valid JSON even if wrapped in markdown or explanation."""
-    text = text.replace("```json", "").replace("```", "").strip()
-    match = re.search(r"\[.*\]", text, re.DOTALL)  # Insight returns a list
-    if match:
-        return match.group(0).strip()
-    match = re.search(r"\{.*\}", text, re.DOTALL)  # Backup for dict format
-    return match.group(0).strip() if match else text
+# Local pre-ranking of map-step candidates before the reduce call
+CONFIDENCE_WEIGHT = {"high": 3, "medium": 2, "low": 1}
 
 
 class InsightAgent:
-    def __init__(self, model_name="gemini-2.5-flash"):
-        self.llm = GeminiLLM(model_name=model_name)
+    def __init__(self, model_name="gemini-2.5-flash", llm=None, map_concurrency=None,
+                 reduce_candidates=None, max_hypotheses=None):
+        self.llm = llm or GeminiLLM(model_name=model_name)
+        self.map_concurrency = map_concurrency or get_config_value("insight", "map_concurrency", 8)
+        self.reduce_candidates = reduce_candidates or get_config_value("insight", "reduce_candidates", 30)
+        self.max_hypotheses = max_hypotheses or get_config_value("insight", "max_hypotheses", 8)
 
-    def run(self, data_agent_output, objective):
+    def run(self, data_agent_output, objective, on_item=None, campaign_payloads=None):
         """
         Receives structured DataAgent output and planner objective,
         generates hypothesis-driven insights using LLM.
+        If on_item is given, the response is streamed and on_item(hypothesis)
+        is called for each hypothesis as soon as it is complete.
+
+        With two or more `campaign_payloads` ({campaign: compact payload},
+        see build_campaign_payloads) the work is map-reduced: one concurrent
+        insight call per campaign, then one call that merges and ranks them.
         """
 
         try:
             log_info("Running InsightAgent to generate hypotheses...")
 
+            if campaign_payloads and len(campaign_payloads) >= 2:
+                return self._map_reduce(data_agent_output, objective, campaign_payloads, on_item)
+
+            prompt = self._build_prompt("prompts/insight.md", objective, "📊 Data Summary Received", data_agent_output)
+            return self._generate(prompt, on_item)
+
+        except Exception as e:
+            log_error(f"InsightAgent failed: {str(e)}")
+            return {"error": "InsightAgent runtime failure", "details": str(e)}
+
+    def _build_prompt(self, template_path, objective, heading, payload, template_vars=None):
+        with span("insight.prompt_build", "prompt") as s:
             # Load structured prompt template
-            with open("prompts/insight.md", "r", encoding="utf-8") as file:
-                prompt_template = file.read()
+            prompt_template = load_prompt(template_path)
+            for name, value in (template_vars or {}).items():
+                prompt_template = prompt_template.replace("{{" + name + "}}", str(value))
 
             # Build final LLM prompt
             final_prompt = (
                 prompt_template
                 + "\n\n📌 Planner Objective:\n"
                 + json.dumps(objective, indent=2)
-                + "\n\n📊 Data Summary Received:\n"
-                + json.dumps(data_agent_output, indent=2)
+                + f"\n\n{heading}:\n"
+                + json.dumps(payload, separators=(",", ":"))
             )
+            s.set(prompt_chars=len(final_prompt))
+        return final_prompt
 
-            # Call the model
-            llm_response = self.llm.llm_call(final_prompt)
+    def _generate(self, prompt, on_item=None):
+        # Stream when a consumer wants items as soon as each one is complete
+        if on_item is not None:
+            llm_response = self.llm.llm_call_streaming(prompt, on_item=on_item)
+        else:
+            llm_response = self.llm.llm_call(prompt)
 
-            # Extract JSON hypothesis from LLM output
-            try:
-                clean_json = extract_json(llm_response)
+        # Extract JSON hypothesis from LLM output
+        try:
+            with span("insight.json_extract", "parse", response_chars=len(llm_response)):
+                clean_json = extract_json(llm_response, allow_fallback=True)
                 return json.loads(clean_json)
-            except json.JSONDecodeError:
-                log_error("InsightAgent: Model returned invalid JSON.")
-                return {"error": "InsightAgent: Invalid JSON format", "raw_output": llm_response}
+        except json.JSONDecodeError:
+            log_error("InsightAgent: Model returned invalid JSON.")
+            return {"error": "InsightAgent: Invalid JSON format", "raw_output": llm_response}
 
-        except Exception as e:
-            log_error(f"InsightAgent failed: {str(e)}")
-            return {"error": "InsightAgent runtime failure", "details": str(e)}
+    # ------------------------------------------------------------------ #
+    # Map-reduce over many campaigns
+
+    def _map_reduce(self, data_agent_output, objective, campaign_payloads, on_item):
+        """
+        Map calls run concurrently (up to map_concurrency), so insight
+        latency is roughly one map call plus one reduce call however many
+        campaigns are compared. Candidates are pre-ranked locally and only
+        the top reduce_candidates reach the reduce prompt.
+        """
+        campaigns = list(campaign_payloads)
+        log_info(f"🧩 InsightAgent map-reduce over {len(campaigns)} campaigns")
+
+        with span("insight.map", "llm", campaigns=len(campaigns)) as s:
+            workers = max(1, min(self.map_concurrency, len(campaigns)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="insight-map") as pool:
+                # One context copy per task, so each map call's spans nest under this one
+                futures = [
+                    pool.submit(contextvars.copy_context().run, self._map_one, objective, c, campaign_payloads[c])
+                    for c in campaigns
+                ]
+                candidates = [h for future in futures for h in future.result()]
+            s.set(candidates=len(candidates))
+
+        if not candidates:
+            return {"error": "InsightAgent: No hypotheses from any campaign"}
+
+        spend = {
+            c: (payload.get("campaign_summaries") or {}).get("total_spend") or 0
+            for c, payload in campaign_payloads.items()
+        }
+        ranked = rank_candidates(candidates, spend)[:self.reduce_candidates]
+
+        summaries = data_agent_output.get("campaign_summaries") if isinstance(data_agent_output, dict) else None
+        prompt = self._build_prompt(
+            "prompts/insight_reduce.md", objective, "📊 Campaign Summaries",
+            summaries or {c: campaign_payloads[c].get("campaign_summaries") for c in campaigns},
+            template_vars={"max_hypotheses": self.max_hypotheses},
+        ) + "\n\n💡 Candidate Hypotheses:\n" + json.dumps(ranked, separators=(",", ":"))
+
+        with span("insight.reduce", "llm", candidates=len(ranked)):
+            merged = self._generate(prompt, on_item)
+
+        if isinstance(merged, list) and merged and all(isinstance(h, dict) for h in merged):
+            return merged[:self.max_hypotheses]
+
+        # Reduce failed: the local ranking is still a usable answer
+        log_error("InsightAgent: reduce step returned no usable hypotheses; using local ranking.")
+        fallback = []
+        for i, hypothesis in enumerate(ranked[:self.max_hypotheses], start=1):
+            fallback.append({**hypothesis, "hypothesis_id": f"H{i}"})
+            if on_item is not None:
+                on_item(fallback[-1])
+        return fallback
+
+    def _map_one(self, objective, campaign, payload):
+        """Candidate hypotheses for one campaign, tagged with it and with campaign-scoped ids."""
+        prompt = self._build_prompt("prompts/insight.md", objective, "📊 Data Summary Received", payload)
+        output = self._generate(prompt)
+        if not isinstance(output, list):
+            log_error(f"InsightAgent: map step for '{campaign}' produced no hypotheses.")
+            return []
+        return [
+            {
+                **h,
+                "hypothesis_id": f"{campaign}:{h.get('hypothesis_id') or f'H{i}'}",
+                "campaign": campaign,
+            }
+            for i, h in enumerate(output, start=1)
+            if isinstance(h, dict)
+        ]
+
+
+def rank_candidates(candidates, campaign_spend):
+    """Highest confidence first, then the campaign with the most spend; stable otherwise."""
+    def score(hypothesis):
+        confidence = CONFIDENCE_WEIGHT.get(str(hypothesis.get("confidence_level", "")).lower(), 0)
+        return -confidence, -campaign_spend.get(hypothesis.get("campaign"), 0)
+    return sorted(candidates, key=score)
@@ -1,37 +1,52 @@
 import json
-import re
+from src.utils.config_utils import get_config_value
+from src.utils.intent_parser import IntentParser
 from src.utils.llm import GeminiLLM
-
-
-def extract_json(text):
-    """Extracts JSON from AI response even when wrapped in markdown."""
-    text = text.replace("```json", "").replace("```", "").strip()
-    match = re.search(r"\{.*\}", text, re.DOTALL)
-    return match.group(0).strip() if match else text
+from src.utils.logging_utils import log_info
+from src.utils.prompt_utils import load_prompt as load_template
+from src.utils.json_utils import extract_json
+from src.utils.tracing import span
 
 
 def load_prompt(file_path="prompts/planner.md"):
-    """Load planner prompt template file."""
-    with open(file_path, "r", encoding="utf-8") as file:
-        return file.read()
+    """Load planner prompt template file (cached, see prompt_utils.load_prompt)."""
+    return load_template(file_path)
 
 
 class PlannerAgent:
-    def __init__(self, model_name="gemini-2.5-flash"
-    ""):
-        self.llm = GeminiLLM(model_name=model_name)
+    def __init__(self, model_name="gemini-2.5-flash", llm=None, campaigns=(), use_rules=None):
+        """
+        `campaigns` (canonical names, or a callable returning them) lets the
+        local IntentParser recognise campaign mentions.
+        """
+        self.llm = llm or GeminiLLM(model_name=model_name)
+        use_rules = get_config_value("planner", "local_parser", True) if use_rules is None else use_rules
+        self.rules = IntentParser(campaigns) if use_rules else None
+        self.min_confidence = get_config_value("planner", "min_confidence", 0.9)
 
     def run(self, user_query: str):
         """
-        Call LLM with prompt, extract valid JSON,
-        and ensure agent_flow is always included.
+        Plan locally when IntentParser is confident; otherwise call the LLM
+        with the prompt, extract valid JSON, and ensure agent_flow is always
+        included.
         """
-        planner_prompt = load_prompt().replace("{{user_query}}", user_query)
+        if self.rules is not None:
+            with span("planner.rules", "compute") as s:
+                plan, confidence = self.rules.parse(user_query)
+                s.set(confidence=confidence)
+            if plan is not None and confidence >= self.min_confidence:
+                log_info(f"⚡ PlannerAgent planned locally (confidence {confidence}): {plan['agent_flow']}")
+                return plan
+
+        with span("planner.prompt_build", "prompt") as s:
+            planner_prompt = load_prompt().replace("{{user_query}}", user_query)
+            s.set(prompt_chars=len(planner_prompt))
         response = self.llm.llm_call(planner_prompt)
 
         try:
-            clean_json = extract_json(response)
-            parsed = json.loads(clean_json)
+            with span("planner.json_extract", "parse", response_chars=len(response)):
+                clean_json = extract_json(response, expect="object")
+                parsed = json.loads(clean_json)
 
             # Ensure agent_flow exists for pipeline follow-up
             if "agent_flow" not in parsed:
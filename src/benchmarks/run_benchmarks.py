@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from src.agents.creative_agent import CreativeAgent
+from src.agents.data_agent import DataAgent
+from src.agents.insight_agent import InsightAgent
+from src.benchmarks.synthetic_data import campaign_names, parse_size, synthetic_dataset
+from src.orchestrator.run import AgentSuite, run_query, save_output
+from src.utils.aggregation import aggregate_performance
+from src.utils.anomaly_index import AnomalyIndex
+from src.utils.data_utils import aggregate_daily_rows
+from src.utils.intent_parser import IntentParser
+from src.utils.llm import FakeLLM
+from src.utils.logging_utils import log_info
+from src.utils.result_cache import ResultCache
+from src.utils.sharding import ShardedAggregator
+from src.utils.summary_utils import build_campaign_payloads, build_llm_payload
+
+BENCH_CAMPAIGNS = [str(name) for name in campaign_names()[0][::4][:6]]
+
+PLAN = {
+    "objective": "Explain ROAS changes and recommend creatives",
+    "campaign_name": [BENCH_CAMPAIGNS[0]],
+    "analysis_window_days": 14,
+    "agent_flow": ["data_agent", "insight_agent", "evaluator_agent", "creative_agent"],
+}
+HYPOTHESES = [
+    {"hypothesis_id": f"H{i}", "campaign": BENCH_CAMPAIGNS[0].lower(), "issue": "ROAS declined",
+     "hypothesis": "Creative fatigue lowered CTR and ROAS dropped", "supporting_data": {}}
+    for i in range(1, 4)
+]
+VERDICTS = [
+    {"hypothesis_id": h["hypothesis_id"], "verdict": "supported", "confidence_level": "medium",
+     "justification": "Recorded response", "evidence": {}}
+    for h in HYPOTHESES
+]
+CREATIVES = [
+    {"hypothesis_id": h["hypothesis_id"], "recommendation": "Refresh the hero creative",
+     "headline": "Comfort that lasts", "cta": "Shop now"}
+    for h in HYPOTHESES
+]
+
+# Keyed by the heading of each agent's prompt template
+RECORDED_RESPONSES = {
+    "# 🧠 Planner Agent": json.dumps(PLAN),
+    "# 💡 Insight Agent": json.dumps(HYPOTHESES),
+    "# 🧩 Insight Reducer": json.dumps(HYPOTHESES),
+    "# 🧪 Evaluator Agent": json.dumps(VERDICTS),
+    "# 🎨 Creative Agent": json.dumps(CREATIVES),
+}
+
+
+def measure(name, fn, iterations, rows=None):
+    """
+    Time fn() `iterations` times, then run it once more under tracemalloc for
+    its peak Python-heap allocation. Throughput is rows/s when `rows` is given.
+    """
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn(iterations)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    latencies_ms = np.array(latencies) * 1000
+    mean_sec = float(np.mean(latencies))
+    result = {
+        "name": name,
+        "iterations": iterations,
+        "mean_ms": round(float(np.mean(latencies_ms)), 3),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "ops_per_sec": round(1 / mean_sec, 2) if mean_sec else None,
+        "peak_alloc_mb": round(peak_bytes / 2**20, 2),
+    }
+    if rows is not None and mean_sec:
+        result["rows_per_sec"] = round(rows / mean_sec)
+    log_info(
+        f"⏱ {name}: p50 {result['p50_ms']}ms | p95 {result['p95_ms']}ms | "
+        f"{result['ops_per_sec']} ops/s | peak alloc {result['peak_alloc_mb']}MB"
+    )
+    return result
+
+
+def benchmark_dataset(path, iterations=10, llm_latency_sec=0.0, responses=None, work_dir=None):
+    """Run every benchmark against one CSV. Returns a list of result dicts."""
+    work_dir = work_dir or tempfile.mkdtemp(prefix="bench_")
+    responses = responses or RECORDED_RESPONSES
+    with open(path, "rb") as f:
+        n_rows = sum(1 for _ in f) - 1
+    results = []
+
+    def cold_load(i):
+        cache_dir = os.path.join(work_dir, f"cold_{i}")
+        DataAgent(path, cache_root=cache_dir, aggregate_root=cache_dir, canonical_root=cache_dir, result_cache=False).close()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    cache_dir = os.path.join(work_dir, "warm")
+    results.append(measure("data_agent_load_cold", cold_load, max(1, iterations // 5), rows=n_rows))
+    results.append(measure(
+        "data_agent_load_warm",
+        lambda i: DataAgent(path, cache_root=cache_dir, aggregate_root=cache_dir, canonical_root=cache_dir,
+                            result_cache=False).close(),
+        iterations, rows=n_rows,
+    ))
+
+    agent = DataAgent(path, cache_root=cache_dir, aggregate_root=cache_dir, canonical_root=cache_dir, result_cache=False)
+    campaigns = [[name] for name in BENCH_CAMPAIGNS]
+    results.append(measure(
+        "data_filter",
+        lambda i: agent.filter_campaign_data(campaigns[i % len(campaigns)], 14),
+        iterations, rows=n_rows,
+    ))
+
+    results.append(measure(
+        "daily_aggregates_single_process",
+        lambda i: aggregate_daily_rows(agent.data),
+        iterations, rows=n_rows,
+    ))
+    aggregator = ShardedAggregator()
+    try:
+        aggregator.aggregate_daily_rows(agent.data)  # warm the process pool
+        results.append(measure(
+            f"daily_aggregates_sharded ({aggregator.shard_count(n_rows)} shards)",
+            lambda i: aggregator.aggregate_daily_rows(agent.data),
+            iterations, rows=n_rows,
+        ))
+    finally:
+        aggregator.close()
+
+    results.append(measure(
+        "anomaly_index_build",
+        lambda i: AnomalyIndex.build(agent.daily),
+        iterations, rows=len(agent.daily),
+    ))
+
+    filtered, _ = agent.filter_campaign_data([BENCH_CAMPAIGNS[0]], 14)
+    results.append(measure(
+        "data_aggregate_raw_rows",
+        lambda i: aggregate_performance(filtered),
+        iterations, rows=len(filtered),
+    ))
+    results.append(measure(
+        "data_agent_run",
+        lambda i: agent.run(dict(PLAN, campaign_name=campaigns[i % len(campaigns)])),
+        iterations, rows=n_rows,
+    ))
+
+    agent.result_cache = ResultCache(cache_dir=os.path.join(work_dir, "results"))
+    results.append(measure(
+        "data_agent_run_memoized",
+        lambda i: agent.run(dict(PLAN, campaign_name=campaigns[i % len(campaigns)])),
+        iterations, rows=n_rows,
+    ))
+    agent.result_cache = None
+
+    parser = IntentParser(agent.campaign_names)
+    query = f"Why did ROAS drop for {BENCH_CAMPAIGNS[0]} in the last 14 days? Recommend creatives"
+    results.append(measure("planner_local_parse", lambda i: parser.parse(query), iterations))
+
+    data_output = agent.run(PLAN)
+    results.append(measure("llm_payload_build", lambda i: build_llm_payload(data_output), iterations))
+    insight = InsightAgent(llm=FakeLLM(responses=responses))
+    payload = build_llm_payload(data_output)
+    results.append(measure(
+        "insight_prompt_and_parse",
+        lambda i: insight.run(payload, PLAN["objective"]),
+        iterations,
+    ))
+
+    wide_output = agent.run(dict(PLAN, campaign_name=BENCH_CAMPAIGNS))
+    payloads = build_campaign_payloads(wide_output)
+    map_reduce = InsightAgent(llm=FakeLLM(responses=responses, latency_sec=llm_latency_sec))
+    results.append(measure(
+        f"insight_map_reduce ({len(payloads)} campaigns, llm latency {llm_latency_sec}s)",
+        lambda i: map_reduce.run(build_llm_payload(wide_output), PLAN["objective"], campaign_payloads=payloads),
+        max(1, iterations // 5),
+    ))
+
+    for fan_out in (False, True):
+        creative = CreativeAgent(
+            llm=FakeLLM(responses=responses, latency_sec=llm_latency_sec), fan_out=fan_out, cache=False
+        )
+        results.append(measure(
+            f"creative_{'fan_out' if fan_out else 'single_call'} ({len(HYPOTHESES)} hypotheses, "
+            f"llm latency {llm_latency_sec}s)",
+            lambda i: creative.run(PLAN["objective"], HYPOTHESES, payload),
+            max(1, iterations // 5),
+        ))
+
+    suite = AgentSuite(
+        data_path=path, llm=FakeLLM(responses=responses, latency_sec=llm_latency_sec),
+        cache_root=os.path.join(work_dir, "suite"),
+    )
+    suite.data.close()
+    suite.data = agent
+    suite.creative.cache = None
+    results.append(measure(
+        f"orchestrator_end_to_end (llm latency {llm_latency_sec}s)",
+        lambda i: run_query("benchmark query", suite, report_dir=os.path.join(work_dir, "reports")),
+        max(1, iterations // 5),
+    ))
+    suite.close()
+    return results
+
+
+def run_benchmarks(sizes=("10k",), iterations=10, llm_latency_sec=0.0, responses=None,
+                   data_root=".cache/bench", seed=None):
+    """Benchmark each synthetic dataset size; returns {size: [results]}."""
+    report = {}
+    for size in sizes:
+        path = synthetic_dataset(size, root=data_root, seed=seed)
+        log_info(f"📏 Benchmarking {size} ({parse_size(size)} rows): {path}")
+        work_dir = tempfile.mkdtemp(prefix="bench_")
+        try:
+            report[str(size)] = benchmark_dataset(path, iterations, llm_latency_sec, responses, work_dir)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks with synthetic data and a fake LLM.")
+    parser.add_argument("--sizes", default="10k", help="Comma-separated dataset sizes: 10k, 1m, 10m or row counts")
+    parser.add_argument("--iterations", type=int, default=10, help="Timed runs per benchmark")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds each fake LLM call takes")
+    parser.add_argument("--responses", help="JSON file of {prompt substring: recorded response}")
+    parser.add_argument("--seed", type=int, help="Dataset seed (default: random.seed in config.yaml)")
+    parser.add_argument("--out", default="reports/benchmarks.json", help="Where to write the results")
+    args = parser.parse_args()
+
+    responses = None
+    if args.responses:
+        with open(args.responses, "r", encoding="utf-8") as f:
+            responses = json.load(f)
+
+    report = run_benchmarks(
+        sizes=[s.strip() for s in args.sizes.split(",") if s.strip()],
+        iterations=args.iterations,
+        llm_latency_sec=args.llm_latency,
+        responses=responses,
+        seed=args.seed,
+    )
+    save_output(os.path.basename(args.out), report, folder=os.path.dirname(args.out) or ".")
+
+
+if __name__ == "__main__":
+    main()
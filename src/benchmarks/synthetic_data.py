@@ -0,0 +1,115 @@
+import os
+from itertools import product
+import numpy as np
+import pandas as pd
+from src.utils.config_utils import get_config_value
+from src.utils.logging_utils import log_info
+
+# Same columns, in the same order, as data/clean.csv
+COLUMNS = [
+    "campaign_name", "adset_name", "date", "spend", "impressions", "clicks", "ctr",
+    "purchases", "revenue", "roas", "creative_type", "creative_message",
+    "audience_type", "platform", "country",
+]
+
+PRODUCTS = ["ComfortMax", "CloudSoft", "SeamFree", "ActiveFlex", "BreatheEasy", "EverydayFit"]
+SEGMENTS = ["Men", "Women", "Unisex"]
+PHASES = ["Launch", "Retarget", "Sale", "Evergreen"]
+ADSETS = [f"Adset-{i} {kind}" for i in range(1, 6) for kind in ("Retarget", "LAL1", "LAL2", "ATC", "Broad")]
+CREATIVE_TYPES = ["Image", "Video", "UGC", "Carousel"]
+AUDIENCE_TYPES = ["Broad", "Lookalike", "Retargeting"]
+PLATFORMS = ["Facebook", "Instagram"]
+COUNTRIES = ["US", "IN", "UK"]
+MESSAGES = [
+    "Breathable organic cotton that moves with you.",
+    "No ride-up guarantee, best-selling fit back in stock.",
+    "All-day comfort with a seamless waistband.",
+    "Buy 3, get 1 free this week only.",
+    "Moisture-wicking fabric for active days.",
+]
+
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+
+def parse_size(size) -> int:
+    """'10k' / '1m' / '10m' or a plain row count."""
+    return SIZES.get(str(size).lower()) or int(size)
+
+
+def campaign_names(n_campaigns=60):
+    """
+    Campaign names with the messy spellings real exports have (casing,
+    doubled spaces, underscores), so name cleaning is exercised too.
+    Returns (names, sampling weights).
+    """
+    base = [" ".join(parts) for parts in product(SEGMENTS, PRODUCTS, PHASES)][:n_campaigns]
+    names = []
+    for name in base:
+        names += [name, name.upper(), name.replace(" ", "  "), name.replace(" ", "_")]
+    # Mostly the canonical spelling
+    weights = np.tile([0.85, 0.05, 0.05, 0.05], len(base))
+    return np.array(names), weights / weights.sum()
+
+
+def generate_chunk(rng, n_rows, n_campaigns=60, days=90, start_date="2025-01-01"):
+    names, weights = campaign_names(n_campaigns)
+    campaign = rng.choice(len(names), size=n_rows, p=weights)
+    dates = pd.Timestamp(start_date) + pd.to_timedelta(rng.integers(0, days, n_rows), unit="D")
+
+    spend = np.round(rng.gamma(4.0, 120.0, n_rows), 2)
+    impressions = rng.integers(20_000, 520_000, n_rows)
+    ctr = np.clip(rng.normal(0.013, 0.004, n_rows), 0.002, 0.04)
+    clicks = np.round(impressions * ctr)
+    purchases = rng.poisson(np.maximum(clicks * 0.022, 1))
+    revenue = np.round(purchases * rng.normal(37.0, 8.0, n_rows).clip(5), 2)
+    roas = np.round(np.divide(revenue, spend, out=np.zeros(n_rows), where=spend > 0), 2)
+
+    return pd.DataFrame({
+        "campaign_name": names[campaign],
+        "adset_name": rng.choice(ADSETS, n_rows),
+        "date": dates.strftime("%Y-%m-%d"),
+        "spend": spend,
+        "impressions": impressions,
+        "clicks": clicks,
+        "ctr": np.round(ctr, 4),
+        "purchases": purchases,
+        "revenue": revenue,
+        "roas": roas,
+        "creative_type": rng.choice(CREATIVE_TYPES, n_rows),
+        "creative_message": rng.choice(MESSAGES, n_rows),
+        "audience_type": rng.choice(AUDIENCE_TYPES, n_rows),
+        "platform": rng.choice(PLATFORMS, n_rows),
+        "country": rng.choice(COUNTRIES, n_rows),
+    }, columns=COLUMNS)
+
+
+def write_synthetic_csv(path, n_rows, seed=None, chunk_rows=500_000, **kwargs):
+    """
+    Write an n_rows dataset in the data/clean.csv schema, chunk by chunk so
+    10M-row files never sit in memory. Deterministic for a given seed
+    (defaults to `random.seed` in config.yaml). Returns the path.
+    """
+    seed = get_config_value("random", "seed", 42) if seed is None else seed
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    tmp_path = path + ".tmp"
+    written = 0
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        while written < n_rows:
+            rows = min(chunk_rows, n_rows - written)
+            generate_chunk(rng, rows, **kwargs).to_csv(f, index=False, header=written == 0)
+            written += rows
+    os.replace(tmp_path, path)
+    log_info(f"🧪 Wrote synthetic dataset {path} | Rows: {n_rows} | Seed: {seed}")
+    return path
+
+
+def synthetic_dataset(size, root=".cache/bench", seed=None):
+    """Path to the synthetic dataset of the given size, generated on first use."""
+    n_rows = parse_size(size)
+    seed = get_config_value("random", "seed", 42) if seed is None else seed
+    path = os.path.join(root, f"synthetic_{n_rows}_seed{seed}.csv")
+    if not os.path.exists(path):
+        write_synthetic_csv(path, n_rows, seed=seed)
+    return path
@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.orchestrator.report import report_dirname
+from src.orchestrator.run import AgentSuite, run_query, save_output
+from src.utils.llm import get_default_cache
+from src.utils.logging_utils import log_info, log_error
+
+
+def load_queries(path):
+    """
+    Read a JSONL file of queries. Each line is {"query": "...", "id": "..."};
+    "id" is optional and defaults to the line number.
+    """
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                log_error(f"⚠ Skipping invalid JSON on line {line_no} of {path}")
+                continue
+            query = item.get("query") if isinstance(item, dict) else None
+            if not query:
+                log_error(f"⚠ Skipping line {line_no} of {path}: no 'query' field")
+                continue
+            queries.append({"id": str(item.get("id", f"q{line_no:04d}")), "query": query})
+    return queries
+
+
+def _unique_report_dirs(queries, output_root):
+    """
+    One report directory per query, in order. Repeated ids (or ids that map
+    to the same directory name) get a numbered suffix, so concurrent queries
+    never write into the same directory.
+    """
+    taken, dirs = set(), []
+    for item in queries:
+        name = base = report_dirname(item["id"])
+        n = 1
+        while name in taken:
+            n += 1
+            name = f"{base}_{n}"
+        if name != base:
+            log_error(f"⚠ Duplicate query id '{item['id']}'; writing its report to {name}/")
+        taken.add(name)
+        dirs.append(os.path.join(output_root, name))
+    return dirs
+
+
+def run_batch(queries_path="requests.jsonl", output_root="reports/batch", max_concurrency=4, agents=None):
+    """
+    Run every query in a JSONL file through one shared AgentSuite, with at most
+    max_concurrency queries in flight. Each query writes to output_root/<id>/
+    (output_root/<id>_2/ and so on for repeated ids).
+    """
+    queries = load_queries(queries_path)
+    log_info(f"📦 Batch: {len(queries)} queries from {queries_path} (concurrency={max_concurrency})")
+    owns_agents = agents is None
+    agents = agents or AgentSuite()
+    report_dirs = _unique_report_dirs(queries, output_root)
+
+    def process(item, report_dir):
+        start = time.perf_counter()
+        try:
+            run_query(item["query"], agents, report_dir=report_dir)
+            status, error = "success", None
+        except Exception as e:
+            log_error(f"❌ Query {item['id']} failed: {e}")
+            save_output("orchestrator_error.json", {"error": str(e)}, folder=report_dir)
+            status, error = "failed", str(e)
+        return {
+            "id": item["id"],
+            "query": item["query"],
+            "status": status,
+            "error": error,
+            "report_dir": report_dir,
+            "duration_sec": round(time.perf_counter() - start, 2),
+        }
+
+    batch_start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+            results = list(pool.map(process, queries, report_dirs))
+    finally:
+        if owns_agents:
+            agents.close()
+
+    summary = {
+        "queries": len(results),
+        "succeeded": sum(r["status"] == "success" for r in results),
+        "failed": sum(r["status"] != "success" for r in results),
+        "wall_time_sec": round(time.perf_counter() - batch_start, 2),
+        "llm_cache": get_default_cache().stats(),
+        "data_cache": agents.data.result_cache.stats() if agents.data.result_cache is not None else None,
+        "creative_cache": agents.creative.cache.stats() if agents.creative.cache is not None else None,
+        "results": results,
+    }
+    save_output("batch_summary.json", summary, folder=output_root)
+    log_info(
+        f"🏁 Batch done: {summary['succeeded']}/{summary['queries']} succeeded "
+        f"in {summary['wall_time_sec']}s"
+    )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many analysis queries in one process.")
+    parser.add_argument("queries", nargs="?", default="requests.jsonl",
+                        help="JSONL file with one {\"query\": ..., \"id\": ...} per line")
+    parser.add_argument("--out", default="reports/batch", help="Root folder for per-query reports")
+    parser.add_argument("--concurrency", type=int, default=4, help="Max queries in flight")
+    parser.add_argument("--data", default="data/clean.csv", help="Dataset CSV path")
+    args = parser.parse_args()
+
+    with AgentSuite(data_path=args.data) as agents:
+        run_batch(args.queries, output_root=args.out, max_concurrency=args.concurrency, agents=agents)
+
+
+if __name__ == "__main__":
+    main()
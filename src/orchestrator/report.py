@@ -0,0 +1,241 @@
+import csv
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+# Section key -> (heading, JSON file)
+SECTIONS = {
+    "planner": ("🧠 Plan", "planner_output.json"),
+    "data": ("📊 Data Summary", "data_output.json"),
+    "insight": ("💡 Hypotheses", "insights.json"),
+    "evaluator": ("🧪 Evaluation", "evaluation.json"),
+    "creative": ("🎨 Creative Recommendations", "creatives.json"),
+}
+
+# Large row-level tables stored once as CSV instead of inside the JSON outputs
+TABLE_FIELDS = {"data": ["daily_trends"]}
+
+# First field present becomes an item's title in list sections
+TITLE_FIELDS = ("hypothesis", "issue", "problem_summary", "recommendation", "headline", "creative_strategy")
+SUMMARY_ROW_LIMIT = 20
+
+
+def report_dirname(query_id) -> str:
+    """Filesystem-safe directory name for one query's report."""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(query_id)) or "query"
+
+
+class ReportWriter:
+    """
+    Incremental report for one run.
+
+    Each agent's section is rendered as markdown and appended to report.md
+    as soon as the agent finishes (add() is thread-safe, so parallel agents
+    append in completion order). Its output is written once to its JSON
+    file; large row-level tables (daily trends) go to a CSV next to it and
+    are referenced by path. close() writes manifest.json, an index of every
+    file the run produced.
+    """
+
+    def __init__(self, report_dir, user_query):
+        self.report_dir = report_dir
+        self.report_path = os.path.join(report_dir, "report.md")
+        self.manifest = {
+            "query": user_query,
+            "generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "report": "report.md",
+            "sections": {},
+        }
+        self._lock = threading.Lock()
+        os.makedirs(report_dir, exist_ok=True)
+        with open(self.report_path, "w", encoding="utf-8") as f:
+            f.write("# 📊 Facebook Ads Performance Analysis Report\n\n")
+            f.write(f"🕒 Generated: {self.manifest['generated']}\n")
+            f.write(f"💬 Query: {user_query}\n\n---\n")
+
+    def add(self, key, output):
+        """Store one agent's output and append its section to report.md."""
+        heading, filename = SECTIONS.get(key, (key.capitalize(), f"{key}_output.json"))
+        with self._lock:
+            stored, tables = self._split_tables(key, output)
+            self._write_json(filename, stored)
+            with open(self.report_path, "a", encoding="utf-8") as f:
+                f.write(f"\n## {heading}\n\n")
+                f.write(render_section(key, output, tables))
+                f.write("\n")
+            self.manifest["sections"][key] = {"file": filename, "tables": tables}
+        print(f"📁 Saved: {os.path.join(self.report_dir, filename)}")
+
+    def close(self):
+        with self._lock:
+            self._write_json("manifest.json", self.manifest)
+        print(f"📁 Saved: {self.report_path}")
+        return self.report_path
+
+    def _split_tables(self, key, output):
+        """(output with large tables replaced by {"table": csv, "rows": n}, {field: csv})."""
+        tables = {}
+        if not isinstance(output, dict):
+            return output, tables
+        stored = dict(output)
+        for field in TABLE_FIELDS.get(key, ()):
+            rows = output.get(field)
+            if not isinstance(rows, list) or not rows or not isinstance(rows[0], dict):
+                continue
+            filename = f"{key}_{field}.csv"
+            self._write_csv(filename, rows)
+            stored[field] = {"table": filename, "rows": len(rows)}
+            tables[field] = filename
+        return stored, tables
+
+    def _write_json(self, filename, content):
+        path = os.path.join(self.report_dir, filename)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(content, f, indent=4)
+
+    def _write_csv(self, filename, rows):
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        with open(os.path.join(self.report_dir, filename), "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+# ---------------------------------------------------------------------- #
+# Markdown rendering
+
+def render_section(key, output, tables=None):
+    tables = tables or {}
+    if output is None:
+        return "_No output._\n"
+    if isinstance(output, dict) and "error" in output:
+        return _bullets(output)
+    if key == "planner":
+        return _render_plan(output)
+    if key == "data":
+        return _render_data(output, tables)
+    if key == "evaluator" and isinstance(output, list):
+        return _table(
+            ["Hypothesis", "Verdict", "Confidence", "Justification"],
+            [[o.get("hypothesis_id"), o.get("verdict"), o.get("confidence_level"), o.get("justification")]
+             for o in output if isinstance(o, dict)],
+        )
+    if isinstance(output, list):
+        return "\n".join(_render_item(item) for item in output)
+    return _bullets(output)
+
+
+def _render_plan(plan):
+    campaigns = plan.get("campaign_name") or "All campaigns"
+    return _bullets({
+        "Objective": plan.get("objective"),
+        "Campaigns": campaigns,
+        "Window": f"last {plan['analysis_window_days']} days" if plan.get("analysis_window_days") else None,
+        "Metrics": plan.get("metrics_focus"),
+        "Breakdown": plan.get("breakdown_by"),
+        "Agents": " → ".join(plan.get("agent_flow", [])),
+        "Planned by": plan.get("planned_by", "llm"),
+    })
+
+
+def _render_data(data, tables):
+    lines = [_bullets({
+        "Campaigns": data.get("campaigns_requested"),
+        "Date range": data.get("date_range"),
+    })]
+
+    summaries = data.get("campaign_summaries")
+    if isinstance(summaries, dict) and summaries:
+        if all(isinstance(v, dict) for v in summaries.values()):
+            lines.append(_summary_table("Campaign", summaries))
+        else:
+            lines.append(_table(list(summaries), [list(summaries.values())]))
+
+    peaks = {
+        f"Peak {metric}": f"{peak.get(metric)} on {str(peak.get('date'))[:10]} ({peak.get('campaign_name')})"
+        for metric in ("spend", "revenue")
+        for peak in [data.get(f"peak_{metric}_day")] if peak
+    }
+    if peaks:
+        lines.append(_bullets(peaks))
+
+    if "daily_trends" in tables:
+        lines.append(
+            f"Daily trends: {len(data['daily_trends'])} rows in "
+            f"[{tables['daily_trends']}]({tables['daily_trends']})\n"
+        )
+
+    events = data.get("metric_events")
+    if events:
+        lines.append("### Metric events\n")
+        lines.append(_table(
+            ["Campaign", "Date", "Metric", "Type", "Change", "z"],
+            [[campaign, e.get("date"), e.get("metric"), e.get("type"), _event_change(e), e.get("z")]
+             for campaign, records in events.items() for e in records][:SUMMARY_ROW_LIMIT],
+        ))
+
+    segments = data.get("segment_breakdown")
+    if isinstance(segments, dict) and segments.get("summaries"):
+        dimensions = " × ".join(segments.get("dimensions", []))
+        lines.append(f"### Breakdown by {dimensions}\n")
+        lines.append(_summary_table("Segment", segments["summaries"]))
+    return "\n".join(lines)
+
+
+def _summary_table(label, summaries):
+    """One row per group, largest spend first, capped at SUMMARY_ROW_LIMIT."""
+    ordered = sorted(summaries.items(), key=lambda kv: -(kv[1].get("total_spend") or 0))
+    columns = list(dict.fromkeys(c for _, s in ordered for c in s))
+    table = _table([label] + columns, [[name] + [s.get(c) for c in columns] for name, s in ordered[:SUMMARY_ROW_LIMIT]])
+    if len(ordered) > SUMMARY_ROW_LIMIT:
+        table += f"\n_{len(ordered) - SUMMARY_ROW_LIMIT} more rows in the JSON output._\n"
+    return table
+
+
+def _event_change(event):
+    if event.get("type") == "change_point":
+        return f"{event.get('before')} → {event.get('after')}"
+    return f"{event.get('value')} vs baseline {event.get('baseline')}"
+
+
+def _render_item(item):
+    if not isinstance(item, dict):
+        return f"- {_inline(item)}\n"
+    title_field = next((f for f in TITLE_FIELDS if item.get(f)), None)
+    label = item.get("hypothesis_id", "")
+    title = item.get(title_field, "") if title_field else ""
+    heading = " — ".join(str(part) for part in (label, title) if part) or "Item"
+    rest = {k: v for k, v in item.items() if k not in ("hypothesis_id", title_field)}
+    return f"### {heading}\n\n{_bullets(rest)}"
+
+
+def _bullets(fields):
+    lines = [
+        f"- **{_label(name)}:** {_inline(value)}"
+        for name, value in fields.items()
+        if value not in (None, "", [], {})
+    ]
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def _label(name):
+    name = str(name).replace("_", " ")
+    return name[:1].upper() + name[1:]
+
+
+def _inline(value):
+    if isinstance(value, list):
+        return ", ".join(_inline(v) for v in value)
+    if isinstance(value, dict):
+        return "; ".join(f"{k}: {_inline(v)}" for k, v in value.items())
+    return str(value).replace("\n", " ")
+
+
+def _table(header, rows):
+    def cell(value):
+        return "" if value is None else _inline(value).replace("|", "\\|")
+    lines = ["| " + " | ".join(cell(h) for h in header) + " |", "|" + "---|" * len(header)]
+    lines += ["| " + " | ".join(cell(v) for v in row) + " |" for row in rows]
+    return "\n".join(lines) + "\n"
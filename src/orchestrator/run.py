@@ -1,12 +1,19 @@
 import json
 import os
-from datetime import datetime
+import time
 from src.agents.planner_agent import PlannerAgent
 from src.agents.data_agent import DataAgent
 from src.agents.insight_agent import InsightAgent
 from src.agents.evaluator_agent import EvaluatorAgent
 from src.agents.creative_agent import CreativeAgent
+from src.orchestrator.report import ReportWriter
 from src.utils.logging_utils import Logger, log_info, log_error
+from src.utils.llm import get_default_cache
+from src.utils.result_cache import ResultCache
+from src.utils.config_utils import get_config_value
+from src.utils.summary_utils import build_campaign_payloads, build_llm_payload, estimate_tokens
+from src.utils.tracing import Tracer, span, use_tracer
+from src.orchestrator.scheduler import DAGScheduler, build_agent_dag
 
 
 def save_output(filename, content, folder="reports"):
@@ -40,97 +47,216 @@ def display_banner():
     print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
 
 
+OUTPUT_KEYS = {
+    "data_agent": "data",
+    "insight_agent": "insight",
+    "evaluator_agent": "evaluator",
+    "creative_agent": "creative",
+}
+
+
+class AgentSuite:
+    """
+    One instance of every agent. Built once and reused across queries so the
+    dataset is loaded and the LLM clients are created a single time.
+    """
+
+    def __init__(self, data_path="data/clean.csv", llm=None, cache_root=None):
+        if cache_root:
+            # Every persistent cache under one directory instead of the configured locations
+            self.data = DataAgent(
+                file_path=data_path,
+                cache_root=os.path.join(cache_root, "dataset"),
+                aggregate_root=os.path.join(cache_root, "aggregates"),
+                canonical_root=os.path.join(cache_root, "campaigns"),
+                result_cache=ResultCache(cache_dir=os.path.join(cache_root, "results")),
+            )
+            self.creative = CreativeAgent(llm=llm, cache=ResultCache(cache_dir=os.path.join(cache_root, "creatives")))
+        else:
+            self.data = DataAgent(file_path=data_path)
+            self.creative = CreativeAgent(llm=llm)
+        self.planner = PlannerAgent(llm=llm, campaigns=self.data.campaign_names)
+        self.insight = InsightAgent(llm=llm)
+        self.evaluator = EvaluatorAgent(llm=llm)
+
+    def close(self):
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def stream_progress(agent_name):
+    """on_item callback that reports time-to-first-result for a streamed agent."""
+    start = time.perf_counter()
+    received = []
+
+    def on_item(item):
+        received.append(item)
+        if len(received) == 1:
+            log_info(f"⏩ {agent_name}: first result after {time.perf_counter() - start:.2f}s")
+
+    return on_item
+
+
+def build_agent_tasks(planner_output, agents, report):
+    """
+    Task callables for the DAG scheduler. Each receives the results dict
+    (keyed by agent name), adds its section to the ReportWriter as soon as
+    it finishes and returns its agent's output.
+    """
+    objective = planner_output.get("objective")
+    shared = {}
+
+    def data_task(results):
+        logger = Logger(log_folder="logs")
+        logger.start("DataAgent")
+        data_output = agents.data.run(planner_output)
+        logger.end(extra={"output_preview": list(data_output.keys())})
+        report.add("data", data_output)
+
+        # Compact, token-budgeted view of the data for downstream LLM agents
+        shared["llm_data"] = build_llm_payload(data_output)
+        log_info(
+            f"🗜 LLM data payload: ~{estimate_tokens(shared['llm_data'])} tokens "
+            f"(full output ~{estimate_tokens(data_output)})"
+        )
+        # Per-campaign slices for map-reduce insights on wide comparisons
+        shared["campaign_payloads"] = build_campaign_payloads(
+            data_output, min_campaigns=get_config_value("insight", "map_reduce_min_campaigns", 4)
+        )
+        return data_output
+
+    def insight_task(results):
+        logger = Logger(log_folder="logs")
+        logger.start("InsightAgent")
+        insight_output = agents.insight.run(
+            data_agent_output=shared["llm_data"],
+            objective=objective,
+            on_item=stream_progress("InsightAgent"),
+            campaign_payloads=shared.get("campaign_payloads"),
+        )
+        logger.end(extra={"hypotheses_count": len(insight_output) if insight_output else 0})
+        report.add("insight", insight_output)
+        return insight_output
+
+    def evaluator_task(results):
+        insight_output = results.get("insight_agent")
+        if not insight_output:
+            log_error("EvaluatorAgent skipped — No insights to evaluate.")
+            return None
+        logger = Logger(log_folder="logs")
+        logger.start("EvaluatorAgent")
+        eval_output = agents.evaluator.run(
+            objective=objective,
+            data_agent_output=shared["llm_data"],
+            insight_output=insight_output,
+            full_data_output=results.get("data_agent"),
+            on_item=stream_progress("EvaluatorAgent")
+        )
+        logger.end(extra={"validated_hypotheses": len(eval_output) if eval_output else 0})
+        report.add("evaluator", eval_output)
+        return eval_output
+
+    def creative_task(results):
+        insight_output = results.get("insight_agent")
+        if not insight_output:
+            log_error("CreativeAgent skipped — No validated insights available.")
+            return None
+        logger = Logger(log_folder="logs")
+        logger.start("CreativeAgent")
+        creative_output = agents.creative.run(
+            objective=objective,
+            insight_output=insight_output,
+            data_agent_output=shared["llm_data"],
+            on_item=stream_progress("CreativeAgent")
+        )
+        logger.end(extra={"recommendation_count": len(creative_output) if creative_output else 0})
+        report.add("creative", creative_output)
+        return creative_output
+
+    tasks = {
+        "data_agent": data_task,
+        "insight_agent": insight_task,
+        "evaluator_agent": evaluator_task,
+        "creative_agent": creative_task,
+    }
+    return {name: _traced(name, task) for name, task in tasks.items()}
+
+
+def _traced(agent_name, task):
+    def run(results):
+        with span(agent_name, "agent"):
+            return task(results)
+    return run
+
+
+def run_query(user_query, agents, report_dir="reports"):
+    """
+    Run the full pipeline for one query with an existing AgentSuite and
+    write every output under report_dir. Returns the collected outputs.
+    Every span of the run is exported to report_dir/trace.json.
+    """
+    tracer = Tracer(name=user_query)
+    try:
+        with use_tracer(tracer):
+            return _run_pipeline(user_query, agents, report_dir)
+    finally:
+        tracer.export(os.path.join(report_dir, "trace.json"))
+        slowest = list(tracer.summary().items())[:3]
+        log_info("🔎 Slowest spans: " + ", ".join(f"{n} {t['total_ms']}ms" for n, t in slowest))
+
+
+def _run_pipeline(user_query, agents, report_dir):
+    outputs = {}
+
+    # 🧠 Planner Agent
+    logger = Logger(log_folder="logs")
+    logger.start("PlannerAgent")
+    with span("planner_agent", "agent"):
+        planner_output = agents.planner.run(user_query)
+    logger.end(extra={"output_preview": planner_output})
+    # Sections are written as each agent finishes
+    report = ReportWriter(report_dir, user_query)
+    report.add("planner", planner_output)
+    outputs["planner"] = planner_output
+
+    # Determine agent execution flow
+    agent_flow = planner_output.get("agent_flow", ["data_agent"])
+    print(f"\n🔀 Pipeline: {agent_flow}")
+
+    # 📊 Data → 💡 Insight → (🧪 Evaluator ∥ 🎨 Creative)
+    dag = build_agent_dag(agent_flow)
+    results, timings = DAGScheduler().run(dag, build_agent_tasks(planner_output, agents, report))
+    for agent, key in OUTPUT_KEYS.items():
+        if results.get(agent) is not None:
+            outputs[key] = results[agent]
+    save_output("pipeline_timings.json", timings, folder=report_dir)
+
+    # 📝 Finish the report (sections are already on disk)
+    with span("report_write", "io"):
+        report.close()
+    return outputs
+
+
 def main():
     display_banner()
-    logger = Logger(log_folder="logs")
 
     # User input
     user_query = input("\n💬 Enter your analysis request:\n> ").strip()
 
-    outputs = {}
-
     try:
-        # 🧠 Planner Agent
-        logger.start("PlannerAgent")
-        planner_agent = PlannerAgent()
-        print("🧠 Planner Agent Initialized...")
-        planner_output = planner_agent.run(user_query)
-        logger.end(extra={"output_preview": planner_output})
-        save_output("planner_output.json", planner_output)
-        outputs["planner"] = planner_output
-
-        # Determine agent execution flow
-        agent_flow = planner_output.get("agent_flow", ["data_agent"])
-        print(f"\n🔀 Pipeline: {agent_flow}")
-
-        # 📊 Data Agent
-        logger.start("DataAgent")
-        data_agent = DataAgent()
-        data_output = data_agent.run(planner_output)
-        logger.end(extra={"output_preview": list(data_output.keys())})
-        save_output("data_output.json", data_output)
-        outputs["data"] = data_output
-
-        insight_output, eval_output, creative_output = None, None, None
-
-        # 🔁 Process remaining agents sequentially
-        for agent in agent_flow[1:]:
-            
-            if agent == "insight_agent":
-                logger.start("InsightAgent")
-                insight_agent = InsightAgent()
-                insight_output = insight_agent.run(
-                    data_agent_output=data_output,
-                    objective=planner_output.get("objective")
-                )
-                logger.end(extra={"hypotheses_count": len(insight_output) if insight_output else 0})
-                save_output("insights.json", insight_output)
-                outputs["insight"] = insight_output
-
-            elif agent == "evaluator_agent":
-                if not insight_output:
-                    log_error("EvaluatorAgent skipped — No insights to evaluate.")
-                    continue
-                logger.start("EvaluatorAgent")
-                evaluator_agent = EvaluatorAgent()
-                eval_output = evaluator_agent.run(
-                    objective=planner_output.get("objective"),
-                    data_agent_output=data_output,
-                    insight_output=insight_output
-                )
-                logger.end(extra={"validated_hypotheses": len(eval_output) if eval_output else 0})
-                save_output("evaluation.json", eval_output)
-                outputs["evaluator"] = eval_output
-
-            elif agent == "creative_agent":
-                if not insight_output:
-                    log_error("CreativeAgent skipped — No validated insights available.")
-                    continue
-                logger.start("CreativeAgent")
-                creative_agent = CreativeAgent()
-                creative_output = creative_agent.run(
-                    objective=planner_output.get("objective"),
-                    insight_output=insight_output,
-                    data_agent_output=data_output
-                )
-                logger.end(extra={"recommendation_count": len(creative_output) if creative_output else 0})
-                save_output("creatives.json", creative_output)
-                outputs["creative"] = creative_output
-
-        # 📝 Generate Final Report
-        report_path = os.path.join("reports", "report.md")
-        with open(report_path, "w", encoding="utf-8") as f:
-            f.write("# 📊 Facebook Ads Performance Analysis Report\n\n")
-            f.write(f"🕒 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"💬 Query: {user_query}\n\n---\n")
-
-            for agent_name, output in outputs.items():
-                f.write(f"## 🔹 {agent_name.capitalize()} Output\n")
-                f.write("```json\n")
-                f.write(json.dumps(output, indent=4))
-                f.write("\n```\n")
-
-        save_output("final_complete_output.json", outputs)
+        with AgentSuite() as agents:
+            print("🧠 Agents Initialized...")
+            run_query(user_query, agents)
+            log_info(f"🗄 LLM cache: {get_default_cache().stats()}")
+            if agents.data.result_cache is not None:
+                log_info(f"🗃 DataAgent result cache: {agents.data.result_cache.stats()}")
+            if agents.creative.cache is not None:
+                log_info(f"🎨 Creative cache: {agents.creative.cache.stats()}")
         print("\n🎯 Analysis completed successfully!")
 
     except Exception as e:
@@ -0,0 +1,123 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from src.utils.logging_utils import log_info, log_error
+
+# Which upstream agents each agent reads from. Evaluator and Creative only
+# need Insight + Data output, so they can run side by side.
+AGENT_DEPENDENCIES = {
+    "data_agent": [],
+    "insight_agent": ["data_agent"],
+    "evaluator_agent": ["data_agent", "insight_agent"],
+    "creative_agent": ["data_agent", "insight_agent"],
+}
+
+
+def build_agent_dag(agent_flow):
+    """
+    Turn the planner's `agent_flow` into {agent: [dependencies]}.
+    Unknown agents are dropped; DataAgent is always included since every
+    downstream agent reads its output. Dependencies not in the flow are ignored.
+    """
+    flow = ["data_agent"] + [a for a in agent_flow if a != "data_agent"]
+    dag = {}
+    for agent in flow:
+        if agent not in AGENT_DEPENDENCIES:
+            log_error(f"Unknown agent in agent_flow skipped: {agent}")
+            continue
+        dag[agent] = []
+    for agent in dag:
+        dag[agent] = [dep for dep in AGENT_DEPENDENCIES[agent] if dep in dag]
+    return dag
+
+
+def critical_path(dag, timings):
+    """Longest chain of dependent agents by duration: (agents, seconds)."""
+    chain_time, chain = {}, {}
+
+    def visit(agent):
+        if agent in chain_time:
+            return chain_time[agent]
+        best_dep, best_time = None, 0.0
+        for dep in dag.get(agent, []):
+            dep_time = visit(dep)
+            if dep_time > best_time:
+                best_dep, best_time = dep, dep_time
+        chain_time[agent] = best_time + timings.get(agent, {}).get("duration_sec", 0.0)
+        chain[agent] = (chain[best_dep] if best_dep else []) + [agent]
+        return chain_time[agent]
+
+    if not dag:
+        return [], 0.0
+    end = max(dag, key=visit)
+    return chain[end], round(chain_time[end], 3)
+
+
+class DAGScheduler:
+    """
+    Runs agent tasks as soon as their dependencies finish, using a thread pool
+    (agents are I/O bound on LLM calls). Each task is fn(results) -> output.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+
+    def run(self, dag, tasks, results=None):
+        results = dict(results or {})
+        timings, failed = {}, set()
+        pending = dict(dag)
+        running = {}
+        t0 = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                ready = self._ready(pending, results, failed)
+                while ready:
+                    for agent in ready:
+                        deps = pending.pop(agent)
+                        if any(d in failed for d in deps):
+                            log_error(f"{agent} skipped — upstream agent failed.")
+                            failed.add(agent)
+                            continue
+                        # Copy the context so the run's tracer follows the task into the worker
+                        future = pool.submit(contextvars.copy_context().run, tasks[agent], results)
+                        running[future] = (agent, time.perf_counter())
+                    ready = self._ready(pending, results, failed)
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    agent, start = running.pop(future)
+                    end = time.perf_counter()
+                    timings[agent] = {
+                        "start_sec": round(start - t0, 3),
+                        "end_sec": round(end - t0, 3),
+                        "duration_sec": round(end - start, 3),
+                    }
+                    try:
+                        results[agent] = future.result()
+                    except Exception as e:
+                        log_error(f"{agent} failed: {str(e)}")
+                        timings[agent]["error"] = str(e)
+                        failed.add(agent)
+
+        path, path_sec = critical_path(dag, timings)
+        summary = {
+            "agents": timings,
+            "wall_time_sec": round(time.perf_counter() - t0, 3),
+            "sum_agent_time_sec": round(sum(t["duration_sec"] for t in timings.values()), 3),
+            "critical_path": path,
+            "critical_path_sec": path_sec,
+        }
+        log_info(
+            f"⏱ Pipeline wall time {summary['wall_time_sec']}s "
+            f"(agents total {summary['sum_agent_time_sec']}s, "
+            f"critical path {' → '.join(path)} = {path_sec}s)"
+        )
+        return results, summary
+
+    @staticmethod
+    def _ready(pending, results, failed):
+        return [a for a, deps in pending.items() if all(d in results or d in failed for d in deps)]
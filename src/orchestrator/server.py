@@ -0,0 +1,249 @@
+import argparse
+import json
+import math
+import os
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.orchestrator.report import report_dirname
+from src.orchestrator.run import AgentSuite, run_query
+from src.utils.config_utils import get_config_value
+from src.utils.llm import get_client_pool, get_default_cache
+from src.utils.logging_utils import log_info, log_error
+from src.utils.prompt_utils import load_prompt
+
+PROMPT_FILES = ["prompts/planner.md", "prompts/insight.md", "prompts/evaluator.md", "prompts/creative.md"]
+
+
+class ServiceBusy(Exception):
+    """Raised when every worker is busy and the pending queue is full."""
+
+
+class AnalysisService:
+    """
+    Keeps one warm AgentSuite (dataset, campaign indexes, result cache, LLM
+    clients) and prompt templates for the life of the process, and runs
+    queries on a bounded worker pool.
+
+    At most `max_workers` queries run at once and at most `max_pending`
+    more wait; beyond that analyze() raises ServiceBusy. A query that
+    exceeds its timeout is reported as such to the caller; its worker
+    finishes in the background (threads cannot be interrupted) and its
+    slot is freed when it does.
+    """
+
+    def __init__(self, agents=None, data_path=None, max_workers=None, max_pending=None,
+                 timeout_sec=None, report_root=None):
+        self.max_workers = max_workers or get_config_value("server", "max_workers", 4)
+        self.max_pending = max_pending if max_pending is not None else get_config_value("server", "max_pending", 16)
+        self.timeout_sec = timeout_sec or get_config_value("server", "timeout_sec", 300)
+        self.report_root = report_root or get_config_value("server", "report_root", "reports/server")
+
+        start = time.perf_counter()
+        for path in PROMPT_FILES:
+            load_prompt(path)
+        get_client_pool()
+        self.agents = agents or AgentSuite(data_path=data_path or get_config_value("data", "path", "data/clean.csv"))
+        log_info(f"🔥 Analysis service warm in {time.perf_counter() - start:.2f}s")
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="analysis")
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_pending)
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._started = time.time()
+        self.counts = {"completed": 0, "failed": 0, "timeouts": 0, "rejected": 0, "in_flight": 0}
+
+    def analyze(self, query, query_id=None, timeout_sec=None):
+        """Run one query; returns a result dict with status success / failed / timeout."""
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise ServiceBusy(f"{self.max_workers} running and {self.max_pending} queued")
+        with self._lock:
+            self._counter += 1
+            query_id = query_id or f"{time.strftime('%Y%m%d_%H%M%S')}_{self._counter:04d}"
+            self.counts["in_flight"] += 1
+        report_dir = os.path.join(self.report_root, report_dirname(query_id))
+        start = time.perf_counter()
+        try:
+            future = self._executor.submit(run_query, query, self.agents, report_dir)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+
+        timeout_sec = self.timeout_sec if timeout_sec is None else timeout_sec
+        result = {"id": query_id, "query": query, "report_dir": report_dir}
+        try:
+            result["outputs"] = future.result(timeout=timeout_sec)
+            result["status"] = "success"
+            self._count("completed")
+        except FutureTimeout:
+            result["status"] = "timeout"
+            self._count("timeouts")
+            log_error(f"⏰ Query {query_id} exceeded {timeout_sec}s")
+        except Exception as e:
+            result["status"], result["error"] = "failed", str(e)
+            self._count("failed")
+            log_error(f"❌ Query {query_id} failed: {e}")
+        result["duration_sec"] = round(time.perf_counter() - start, 3)
+        return result
+
+    def stats(self) -> dict:
+        data_cache = self.agents.data.result_cache
+        creative_cache = self.agents.creative.cache
+        with self._lock:
+            counts = dict(self.counts)
+        return {
+            **counts,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "uptime_sec": round(time.time() - self._started, 1),
+            "llm_cache": get_default_cache().stats(),
+            "llm_pool": get_client_pool().stats(),
+            "data_cache": data_cache.stats() if data_cache is not None else None,
+            "creative_cache": creative_cache.stats() if creative_cache is not None else None,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.agents.close()
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def _release(self):
+        with self._lock:
+            self.counts["in_flight"] -= 1
+        self._slots.release()
+
+
+def _positive_number(value) -> bool:
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value) and value > 0)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    GET  /health   -> {"status": "ok", ...counters}
+    GET  /stats    -> counters plus cache and LLM pool stats
+    POST /analyze  {"query": str, "id"?: str, "timeout_sec"?: float, "include_outputs"?: bool}
+    """
+
+    server_version = "AdAnalysis/1.0"
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == "/health":
+            counts = service.stats()
+            self._send(200, {"status": "ok", **{k: counts[k] for k in service.counts}})
+        elif self.path == "/stats":
+            self._send(200, service.stats())
+        else:
+            self._send(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/analyze":
+            self._send(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError):
+            self._send(400, {"error": "Body must be JSON"})
+            return
+        query = body.get("query") if isinstance(body, dict) else None
+        if not query or not isinstance(query, str):
+            self._send(400, {"error": "Missing 'query'"})
+            return
+        # Validated before analyze(): a bad value must not reach an already submitted query
+        query_id, timeout_sec = body.get("id"), body.get("timeout_sec")
+        if query_id is not None and not isinstance(query_id, str):
+            self._send(400, {"error": "'id' must be a string"})
+            return
+        if timeout_sec is not None and not _positive_number(timeout_sec):
+            self._send(400, {"error": "'timeout_sec' must be a positive number"})
+            return
+
+        try:
+            result = self.server.service.analyze(query, query_id, timeout_sec)
+        except ServiceBusy as e:
+            self._send(503, {"error": f"Service busy: {e}"})
+            return
+        if not body.get("include_outputs", False):
+            result.pop("outputs", None)
+        report_path = os.path.join(result["report_dir"], "report.md")
+        if result["status"] == "success" and os.path.exists(report_path):
+            with open(report_path, "r", encoding="utf-8") as f:
+                result["report"] = f.read()
+        status = {"success": 200, "timeout": 504}.get(result["status"], 500)
+        self._send(status, result)
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix-socket peers have no (host, port) address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        log_info(f"🌐 {self.address_string()} {format % args}")
+
+
+class _UnixHTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        # Skip HTTPServer.server_bind, which expects a (host, port) address
+        socketserver.TCPServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+
+def make_server(service, host=None, port=None, socket_path=None):
+    """HTTP server for service on host:port, or on a Unix socket when socket_path is given."""
+    if socket_path:
+        server = _UnixHTTPServer(socket_path, _Handler)
+    else:
+        host = host or get_config_value("server", "host", "127.0.0.1")
+        port = port if port is not None else get_config_value("server", "port", 8765)
+        server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve analysis queries over HTTP with warm agents.")
+    parser.add_argument("--host", help="Bind address (default: server.host in config.yaml)")
+    parser.add_argument("--port", type=int, help="Port (default: server.port in config.yaml)")
+    parser.add_argument("--socket", help="Serve on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, help="Queries run in parallel")
+    parser.add_argument("--timeout", type=float, help="Default per-query timeout in seconds")
+    parser.add_argument("--data", help="Dataset CSV path (default: data.path in config.yaml)")
+    args = parser.parse_args()
+
+    service = AnalysisService(data_path=args.data, max_workers=args.workers, timeout_sec=args.timeout)
+    server = make_server(service, args.host, args.port, args.socket)
+    where = args.socket or "http://%s:%s" % server.server_address[:2]
+    log_info(f"🚀 Analysis service listening on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import pandas as pd
+
+# Dimensions DataAgent can group by besides the cleaned campaign name
+GROUP_DIMENSIONS = ["campaign_name_clean", "adset_name", "platform", "country", "creative_type", "audience_type"]
+
+SUMMARY_AGGREGATIONS = {
+    "total_spend": ("spend", "sum"),
+    "total_revenue": ("revenue", "sum"),
+    "avg_roas": ("roas", "mean"),
+    "avg_ctr": ("ctr", "mean"),
+    "total_clicks": ("clicks", "sum"),
+    "total_impressions": ("impressions", "sum"),
+    "total_purchases": ("purchases", "sum"),
+}
+
+TREND_AGGREGATIONS = {"revenue": "sum", "spend": "sum", "roas": "mean", "ctr": "mean"}
+
+
+def _group_key(key):
+    """Flatten a groupby key into a JSON-friendly label ("a | b" for multiple dimensions)."""
+    if isinstance(key, tuple):
+        return " | ".join(str(k) for k in key)
+    return str(key)
+
+
+def _summary_record(row) -> dict:
+    """Format one aggregated row exactly like DataAgent.summarize_performance."""
+    return {
+        "total_spend": round(row["total_spend"], 2),
+        "total_revenue": round(row["total_revenue"], 2),
+        "avg_roas": round(row["avg_roas"], 2),
+        "avg_ctr": round(row["avg_ctr"], 3),
+        "total_clicks": int(row["total_clicks"]),
+        "total_impressions": int(row["total_impressions"]),
+        "total_purchases": int(row["total_purchases"]),
+    }
+
+
+def summarize_groups(df: pd.DataFrame, dimensions=("campaign_name_clean",)) -> dict:
+    """Per-group totals and means from a single groupby pass."""
+    dimensions = list(dimensions)
+    available = {k: v for k, v in SUMMARY_AGGREGATIONS.items() if v[0] in df.columns}
+    grouped = df.groupby(dimensions, observed=True, sort=True).agg(**available)
+    return {_group_key(key): _summary_record(row) for key, row in grouped.iterrows()}
+
+
+def peak_by_group(df: pd.DataFrame, metric: str, dimensions=("campaign_name_clean",)) -> dict:
+    """Row of max `metric` per group (same shape as DataAgent.get_peak_metric)."""
+    if metric not in df.columns or df.empty:
+        return {}
+    dimensions = list(dimensions)
+    idx = df.groupby(dimensions, observed=True, sort=True)[metric].idxmax().dropna()
+    peaks = df.loc[idx.to_numpy(), ["date", "campaign_name", metric]]
+    return {
+        _group_key(key): {
+            "date": str(row["date"]),
+            "campaign_name": row["campaign_name"],
+            metric: float(row[metric]),
+        }
+        for key, (_, row) in zip(idx.index, peaks.iterrows())
+    }
+
+
+def daily_trends(df: pd.DataFrame, dimensions=("campaign_name_clean",)) -> list:
+    """Day-wise revenue/spend sums and ROAS/CTR means per group."""
+    dimensions = list(dimensions)
+    if not pd.api.types.is_datetime64_any_dtype(df["date"]):
+        df = df.assign(date=pd.to_datetime(df["date"], errors="coerce"))
+    daily = df.groupby(["date"] + dimensions, observed=True).agg(TREND_AGGREGATIONS).reset_index()
+
+    # Convert dates to string for JSON serialization
+    daily["date"] = daily["date"].astype(str)
+    for dim in dimensions:
+        daily[dim] = daily[dim].astype(str)
+    return daily.to_dict(orient="records")
+
+
+def aggregate_performance(df: pd.DataFrame, dimensions=("campaign_name_clean",)) -> dict:
+    """
+    All per-group aggregates DataAgent needs: summaries, peak spend/revenue
+    days and daily trends, each computed with one vectorized groupby.
+    """
+    unknown = [d for d in dimensions if d not in GROUP_DIMENSIONS or d not in df.columns]
+    if unknown:
+        raise ValueError(f"Unsupported grouping dimension(s): {unknown}")
+    return {
+        "summaries": summarize_groups(df, dimensions),
+        "peak_spend_days": peak_by_group(df, "spend", dimensions),
+        "peak_revenue_days": peak_by_group(df, "revenue", dimensions),
+        "daily_trends": daily_trends(df, dimensions),
+    }
+
+
+# --------------------------------------------------------------------------- #
+# Answers computed from per-(campaign, date) partial aggregates
+# (see data_utils.aggregate_daily_rows), without touching raw rows.
+
+def summarize_daily_aggregates(daily: pd.DataFrame) -> dict:
+    """Same shape as DataAgent.summarize_performance, from partial aggregates."""
+    return _summary_record(_totals(daily.sum(numeric_only=True)))
+
+
+def summarize_daily_aggregates_by_campaign(daily: pd.DataFrame) -> dict:
+    grouped = daily.groupby("campaign_name_clean", observed=True, sort=True).sum(numeric_only=True)
+    return {str(key): _summary_record(_totals(row)) for key, row in grouped.iterrows()}
+
+
+def _totals(sums) -> dict:
+    return {
+        "total_spend": sums["spend"],
+        "total_revenue": sums["revenue"],
+        "avg_roas": sums["roas_sum"] / sums["roas_n"] if sums["roas_n"] else float("nan"),
+        "avg_ctr": sums["ctr_sum"] / sums["ctr_n"] if sums["ctr_n"] else float("nan"),
+        "total_clicks": sums["clicks"],
+        "total_impressions": sums["impressions"],
+        "total_purchases": sums["purchases"],
+    }
+
+
+def peak_from_daily_aggregates(daily: pd.DataFrame, metric: str):
+    """Same shape as DataAgent.get_peak_metric, from per-day maxima."""
+    column = f"{metric}_max"
+    if column not in daily.columns or daily.empty:
+        return None
+    peak = daily.loc[daily[column].idxmax()]
+    return {
+        "date": str(peak["date"]),
+        "campaign_name": peak[f"{metric}_max_campaign"],
+        metric: float(peak[column]),
+    }
+
+
+def trends_from_daily_aggregates(daily: pd.DataFrame) -> list:
+    """Same records as DataAgent.get_daily_trends, from partial aggregates."""
+    trends = pd.DataFrame({
+        "date": daily["date"].astype(str).to_numpy(),
+        "campaign_name_clean": daily["campaign_name_clean"].astype(str).to_numpy(),
+        "revenue": daily["revenue"].to_numpy(),
+        "spend": daily["spend"].to_numpy(),
+        "roas": (daily["roas_sum"] / daily["roas_n"]).to_numpy(),
+        "ctr": (daily["ctr_sum"] / daily["ctr_n"]).to_numpy(),
+    })
+    return trends.to_dict(orient="records")
+
+
+def segments_from_partials(partial: pd.DataFrame, dimensions) -> dict:
+    """
+    Same shape as aggregate_performance (without daily_trends), from
+    per-segment partial aggregates carrying peak campaign and date.
+    """
+    dimensions = list(dimensions)
+    indexed = partial.set_index(dimensions).sort_index()
+    result = {"summaries": {}, "peak_spend_days": {}, "peak_revenue_days": {}}
+    for key, row in indexed.iterrows():
+        label = _group_key(key)
+        result["summaries"][label] = _summary_record(_totals(row))
+        for metric in ("spend", "revenue"):
+            result[f"peak_{metric}_days"][label] = {
+                "date": str(row[f"{metric}_max_date"]),
+                "campaign_name": row[f"{metric}_max_campaign"],
+                metric: float(row[f"{metric}_max"]),
+            }
+    return result
@@ -0,0 +1,212 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from src.utils.config_utils import get_config_value
+from src.utils.data_utils import aggregate_store_paths, file_fingerprint
+from src.utils.logging_utils import log_info
+
+INDEX_METRICS = ("roas", "ctr", "spend", "revenue")
+# Bumped whenever the detection rules or the stored layout change
+INDEX_VERSION = 1
+# Spread never treated as smaller than this fraction of the baseline mean,
+# so a flat series does not turn every small wobble into an anomaly
+MIN_RELATIVE_STD = 0.01
+
+
+def daily_metric_matrix(daily: pd.DataFrame):
+    """
+    (campaigns, dates, {metric: dates × campaigns array}) from per-(campaign,
+    date) aggregates. Days a campaign has no rows are NaN.
+    """
+    campaigns, c_idx = np.unique(daily["campaign_name_clean"].astype(str).to_numpy(), return_inverse=True)
+    dates, d_idx = np.unique(daily["date"].to_numpy(dtype="datetime64[D]"), return_inverse=True)
+    values = {
+        "spend": daily["spend"].to_numpy(dtype=float),
+        "revenue": daily["revenue"].to_numpy(dtype=float),
+        "roas": (daily["roas_sum"] / daily["roas_n"]).to_numpy(dtype=float),
+        "ctr": (daily["ctr_sum"] / daily["ctr_n"]).to_numpy(dtype=float),
+    }
+    matrices = {}
+    for metric, column in values.items():
+        matrix = np.full((len(dates), len(campaigns)), np.nan)
+        matrix[d_idx, c_idx] = column
+        matrices[metric] = matrix
+    return campaigns, dates, matrices
+
+
+def _window_stats(x: np.ndarray, window: int):
+    """
+    Mean, std and count of the non-NaN values in the `window` rows before
+    each row (exclusive) and the `window` rows starting at it, for every
+    column at once, from cumulative sums.
+    """
+    valid = ~np.isnan(x)
+    filled = np.where(valid, x, 0.0)
+    pad = np.zeros((1, x.shape[1]))
+    sums = np.vstack([pad, np.cumsum(filled, axis=0)])
+    squares = np.vstack([pad, np.cumsum(filled ** 2, axis=0)])
+    counts = np.vstack([pad, np.cumsum(valid, axis=0)])
+
+    t = np.arange(x.shape[0])
+    lo, hi = np.maximum(t - window, 0), np.minimum(t + window, x.shape[0])
+
+    def stats(a, b):
+        n = counts[b] - counts[a]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = (sums[b] - sums[a]) / n
+            var = np.maximum((squares[b] - squares[a]) / n - mean ** 2, 0.0)
+        return mean, np.sqrt(var), n
+
+    return stats(lo, t), stats(t, hi)
+
+
+def _floored(std, mean):
+    return np.maximum(std, MIN_RELATIVE_STD * np.abs(mean))
+
+
+class AnomalyIndex:
+    """
+    Per-campaign anomalies and change points of daily ROAS, CTR, spend and
+    revenue, computed for every campaign at once over a dates × campaigns
+    matrix.
+
+    - anomaly: a day more than `anomaly_z` standard deviations from the
+      mean of the `baseline_days` before it
+    - change_point: a day where the mean of the next `baseline_days`
+      differs from the mean of the previous `baseline_days` by more than
+      `change_point_z` standard errors (strongest day within a window only)
+
+    Events are stored per campaign in date order, so a query looks up its
+    campaigns directly and bisects to its window.
+    """
+
+    def __init__(self, events=None, params=None):
+        self.params = dict(params or {})
+        self.events = events or {}
+        self._dates = {
+            campaign: np.array([e["date"] for e in records], dtype="datetime64[D]")
+            for campaign, records in self.events.items()
+        }
+
+    @staticmethod
+    def configured_params(**overrides) -> dict:
+        params = {
+            "baseline_days": get_config_value("anomaly_index", "baseline_days", 7),
+            "anomaly_z": get_config_value("anomaly_index", "anomaly_z", 3.0),
+            "change_point_z": get_config_value("anomaly_index", "change_point_z", 4.0),
+        }
+        params.update({k: v for k, v in overrides.items() if v is not None})
+        return params
+
+    @classmethod
+    def build(cls, daily: pd.DataFrame, baseline_days=7, anomaly_z=3.0, change_point_z=4.0):
+        params = {"baseline_days": baseline_days, "anomaly_z": anomaly_z, "change_point_z": change_point_z}
+        if daily is None or daily.empty:
+            return cls({}, params)
+
+        campaigns, dates, matrices = daily_metric_matrix(daily)
+        labels = np.datetime_as_string(dates, unit="D")
+        min_periods = max(3, (baseline_days + 1) // 2)
+        events = {}
+
+        for metric in INDEX_METRICS:
+            x = matrices[metric]
+            (before, before_std, before_n), (after, after_std, after_n) = _window_stats(x, baseline_days)
+
+            with np.errstate(invalid="ignore", divide="ignore"):
+                z = (x - before) / _floored(before_std, before)
+                pooled = np.sqrt((before_n * before_std ** 2 + after_n * after_std ** 2) / (before_n + after_n))
+                shift = (after - before) / (_floored(pooled, before) * np.sqrt(1 / before_n + 1 / after_n))
+
+            anomalies = (before_n >= min_periods) & (np.abs(z) >= anomaly_z)
+
+            # Keep a change point only where its score is the largest within ±baseline_days
+            score = np.where((before_n >= min_periods) & (after_n >= min_periods), np.abs(shift), 0.0)
+            score = np.nan_to_num(score)
+            padded = np.pad(score, ((baseline_days, baseline_days), (0, 0)))
+            local_max = sliding_window_view(padded, 2 * baseline_days + 1, axis=0).max(axis=-1)
+            change_points = (score >= change_point_z) & (score >= local_max)
+
+            for d, c in zip(*np.nonzero(anomalies)):
+                events.setdefault(campaigns[c], []).append({
+                    "date": str(labels[d]), "metric": metric, "type": "anomaly",
+                    "value": round(float(x[d, c]), 4), "baseline": round(float(before[d, c]), 4),
+                    "z": round(float(z[d, c]), 2),
+                })
+            for d, c in zip(*np.nonzero(change_points)):
+                prior, later = float(before[d, c]), float(after[d, c])
+                events.setdefault(campaigns[c], []).append({
+                    "date": str(labels[d]), "metric": metric, "type": "change_point",
+                    "before": round(prior, 4), "after": round(later, 4),
+                    "change_pct": round((later - prior) / abs(prior), 3) if prior else None,
+                    "z": round(float(shift[d, c]), 2),
+                })
+
+        for records in events.values():
+            records.sort(key=lambda e: (e["date"], e["metric"], e["type"]))
+        return cls({str(c): records for c, records in events.items()}, params)
+
+    @classmethod
+    def for_dataset(cls, daily, source_path, cache_root=".cache/aggregates", **params):
+        """Index stored next to source_path's aggregates, rebuilt when the CSV or parameters change."""
+        params = cls.configured_params(**params)
+        path = anomaly_index_path(source_path, cache_root)
+        index = cls.load(path, source_path, params)
+        if index is None:
+            index = cls.build(daily, **params)
+            index.save(path, source_path)
+            log_info(f"📉 Anomaly index built: {sum(len(e) for e in index.events.values())} events "
+                     f"over {len(index.events)} campaigns")
+        return index
+
+    def lookup(self, campaign, start=None, end=None, metrics=None, limit=None) -> list:
+        """Events of one campaign between start and end (inclusive), strongest `limit` kept, in date order."""
+        records = self.events.get(str(campaign))
+        if not records:
+            return []
+        dates = self._dates[str(campaign)]
+        lo = np.searchsorted(dates, np.datetime64(pd.Timestamp(start).date()), side="left") if start is not None else 0
+        hi = np.searchsorted(dates, np.datetime64(pd.Timestamp(end).date()), side="right") if end is not None else len(dates)
+        selected = [e for e in records[lo:hi] if metrics is None or e["metric"] in metrics]
+        if limit is not None and len(selected) > limit:
+            strongest = {id(e) for e in sorted(selected, key=lambda e: -abs(e["z"]))[:limit]}
+            selected = [e for e in selected if id(e) in strongest]
+        return selected
+
+    def lookup_many(self, campaigns, start=None, end=None, metrics=None, limit=None) -> dict:
+        """{campaign: events} for the campaigns that have events in the window."""
+        found = {str(c): self.lookup(c, start, end, metrics, limit) for c in campaigns}
+        return {c: events for c, events in found.items() if events}
+
+    def save(self, path, source_path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "source": file_fingerprint(source_path),
+                "params": self.params,
+                "events": self.events,
+            }, f)
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, path, source_path, params):
+        """Stored index, or None if missing or out of date with the CSV or parameters."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            current = file_fingerprint(source_path)
+            if (current["size"], current["mtime_ns"]) != (stored["source"]["size"], stored["source"]["mtime_ns"]):
+                return None
+            if stored.get("version") != INDEX_VERSION or stored.get("params") != params:
+                return None
+            return cls(stored["events"], stored["params"])
+        except (FileNotFoundError, KeyError, json.JSONDecodeError):
+            return None
+
+
+def anomaly_index_path(source_path, cache_root=".cache/aggregates"):
+    aggregate_path, _ = aggregate_store_paths(source_path, cache_root)
+    return aggregate_path[:-len(".csv")] + ".anomalies.json"
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import numpy as np
+import pandas as pd
+from src.utils.campaign_index import TrigramIndex, trigrams
+from src.utils.config_utils import get_config_value
+from src.utils.data_utils import fold_campaign_name
+from src.utils.logging_utils import log_info, log_error
+
+TABLE_VERSION = 1
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, or limit + 1 as soon as it is known to exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, start=1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _compact(folded: str) -> str:
+    return folded.replace(" ", "")
+
+
+class CampaignCanonicalizer:
+    """
+    Maps every spelling of a campaign to one canonical name and stable ID.
+
+    Names are first folded (see data_utils.fold_campaign_name), which merges
+    case, separator and punctuation variants. Remaining near-duplicates
+    (typos such as "womn cotton classics") are clustered: a folded name joins
+    the canonical name within `max_edits` edits of its space-free form, found
+    through a trigram index. Names whose digits differ never merge, and a
+    name equally close to two canonicals starts its own cluster.
+
+    The most frequent spelling seen first becomes the canonical name. The
+    lookup table (folded name -> canonical ID) is persisted, so existing
+    assignments never change when new rows or spellings arrive.
+    """
+
+    def __init__(self, table_path=None, max_edits=None):
+        self.table_path = table_path
+        self.max_edits = max_edits if max_edits is not None else get_config_value(
+            "canonicalization", "max_edits", 1
+        )
+        self.canonical = {}     # id -> canonical name
+        self.aliases = {}       # folded name -> id
+        self._ids = []          # trigram doc id -> canonical id
+        self._index = TrigramIndex()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    @classmethod
+    def for_source(cls, source_path, root=".cache/campaigns", **kwargs):
+        """The persisted canonicalizer for one dataset file."""
+        key = hashlib.sha1(os.path.abspath(source_path).encode("utf-8")).hexdigest()[:12]
+        return cls(os.path.join(root, f"{key}.json"), **kwargs)
+
+    # ------------------------------------------------------------------ #
+    def canonicalize(self, names: pd.Series, counts=None) -> pd.Series:
+        """
+        Canonical name for each entry of `names`. Unknown spellings are
+        clustered most-frequent first (`counts` gives per-entry weights when
+        `names` is already a list of distinct values).
+        """
+        codes, uniques = pd.factorize(names)
+        weights = (np.asarray(counts) if counts is not None
+                   else np.bincount(codes[codes >= 0], minlength=len(uniques)))
+
+        folded = [fold_campaign_name(name) for name in uniques]
+        totals = {}
+        for name, weight in zip(folded, weights):
+            totals[name] = totals.get(name, 0) + int(weight)
+
+        with self._lock:
+            unknown = [name for name in totals if name not in self.aliases]
+            for name in sorted(unknown, key=lambda n: (-totals[n], n)):
+                self._assign(name)
+            resolved = [self.canonical[self.aliases[name]] if name else np.nan for name in folded]
+        if unknown:
+            self.save()
+
+        mapped = np.array(resolved + [np.nan], dtype=object)
+        return pd.Series(mapped[codes], index=names.index)
+
+    def canonical_id(self, name):
+        """Stable ID for any spelling of a campaign (None if never seen)."""
+        return self.aliases.get(fold_campaign_name(name))
+
+    def resolve(self, name):
+        """Canonical name for any spelling, clustering it if it is new."""
+        return self.canonicalize(pd.Series([name])).iloc[0]
+
+    # ------------------------------------------------------------------ #
+    def _assign(self, folded):
+        if not folded:
+            return
+        match = self._nearest(folded)
+        if match is None:
+            match = f"c{len(self.canonical) + 1:05d}"
+            self.canonical[match] = folded
+            self._add_to_index(match, folded)
+        self.aliases[folded] = match
+        self._dirty = True
+
+    def _nearest(self, folded):
+        """Canonical ID within max_edits of folded, if exactly one is closest."""
+        compact = _compact(folded)
+        digits = re.findall(r"\d+", folded)
+        # One edit changes at most 3 trigrams, so closer names share at least this many
+        needed = len(trigrams(compact)) - 3 * self.max_edits
+        _, shared = self._index.shared(compact)
+
+        best, best_ids = self.max_edits + 1, set()
+        for doc, count in shared.items():
+            if count < needed:
+                continue
+            canonical_id = self._ids[doc]
+            candidate = self.canonical[canonical_id]
+            if re.findall(r"\d+", candidate) != digits:
+                continue
+            distance = edit_distance(compact, _compact(candidate), self.max_edits)
+            if distance < best:
+                best, best_ids = distance, {canonical_id}
+            elif distance == best:
+                best_ids.add(canonical_id)
+        return next(iter(best_ids)) if len(best_ids) == 1 else None
+
+    def _add_to_index(self, canonical_id, folded):
+        self._index.add(_compact(folded))
+        self._ids.append(canonical_id)
+
+    # ------------------------------------------------------------------ #
+    def _load(self):
+        if not self.table_path:
+            return
+        try:
+            with open(self.table_path, "r", encoding="utf-8") as f:
+                table = json.load(f)
+        except FileNotFoundError:
+            return
+        except json.JSONDecodeError:
+            log_error(f"⚠ Ignoring unreadable campaign table: {self.table_path}")
+            return
+        if table.get("version") != TABLE_VERSION:
+            return
+        self.canonical = table["canonical"]
+        self.aliases = table["aliases"]
+        for canonical_id, name in self.canonical.items():
+            self._add_to_index(canonical_id, name)
+
+    def save(self):
+        """Persist the lookup table (no-op without a table path or changes)."""
+        with self._lock:
+            if not self.table_path or not self._dirty:
+                return
+            table = {"version": TABLE_VERSION, "canonical": dict(self.canonical), "aliases": dict(self.aliases)}
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.table_path) or ".", exist_ok=True)
+        tmp_path = f"{self.table_path}.tmp{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(table, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.table_path)
+        log_info(
+            f"🏷 Campaign table: {len(self.aliases)} spellings → {len(self.canonical)} campaigns "
+            f"({self.table_path})"
+        )
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+from collections import Counter, defaultdict
+from src.utils.data_utils import fold_campaign_name
+
+
+def trigrams(text: str) -> set:
+    """Character trigrams of text, padded so word starts and ends count."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _word_starts(name: str) -> set:
+    starts, offset = set(), 0
+    for word in name.split(" "):
+        starts.add(offset)
+        offset += len(word)
+    return starts
+
+
+class TrigramIndex:
+    """
+    Inverted index from character trigrams to strings. Lookups only touch
+    the postings of the query's trigrams, so cost depends on the query and
+    the few names sharing its trigrams, not on the number of names indexed.
+    """
+
+    def __init__(self, texts=()):
+        self.texts = []
+        self._grams = []
+        self._postings = defaultdict(list)
+        for text in texts:
+            self.add(text)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, text: str) -> int:
+        doc_id = len(self.texts)
+        grams = trigrams(text)
+        self.texts.append(text)
+        self._grams.append(len(grams))
+        for gram in grams:
+            self._postings[gram].append(doc_id)
+        return doc_id
+
+    def shared(self, text: str):
+        """(query trigram count, Counter of {doc_id: shared trigrams})."""
+        grams = trigrams(text)
+        counts = Counter()
+        for gram in grams:
+            counts.update(self._postings.get(gram, ()))
+        return len(grams), counts
+
+    def search(self, text: str, n=5, min_score=0.0) -> list:
+        """[(dice, doc_id)] most similar first."""
+        size, counts = self.shared(text)
+        scored = [(2 * c / (size + self._grams[doc]), doc) for doc, c in counts.items()]
+        scored = [hit for hit in scored if hit[0] >= min_score]
+        return sorted(scored, key=lambda hit: (-hit[0], hit[1]))[:n]
+
+    def containment(self, text: str) -> list:
+        """[(share of the query's trigrams found in doc, doc_id)], best first."""
+        size, counts = self.shared(text)
+        return sorted(((c / size, doc) for doc, c in counts.items()), key=lambda hit: (-hit[0], hit[1]))
+
+
+class CampaignIndex:
+    """
+    Index over the unique cleaned campaign names, built once per dataset.
+
+    - `names[code]` is the cleaned name for an integer campaign code
+    - rows for each code are stored contiguously in `row_order`, delimited by
+      `offsets`, so row lookup costs O(matched rows) instead of a full scan
+    - substring matching only ever touches the unique names; typos resolve
+      through a trigram index instead of a scan over every name
+    """
+
+    def __init__(self, clean_names: pd.Series, resolve_threshold=0.8):
+        if not isinstance(clean_names.dtype, pd.CategoricalDtype):
+            clean_names = clean_names.astype("category")
+        self.names = [str(name) for name in clean_names.cat.categories]
+        self.codes = np.asarray(clean_names.cat.codes, dtype=np.int32)
+        self.resolve_threshold = resolve_threshold
+        self._compact = [name.replace(" ", "") for name in self.names]
+        # Offsets in the space-free name where a word starts
+        self._word_starts = [_word_starts(name) for name in self.names]
+        self._trigrams = TrigramIndex(self.names)
+
+        valid = np.flatnonzero(self.codes >= 0)
+        # Stable sort keeps each campaign's rows in original (date) order
+        self.row_order = valid[np.argsort(self.codes[valid], kind="stable")]
+        counts = np.bincount(self.codes[valid], minlength=len(self.names))
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def __len__(self):
+        return len(self.names)
+
+    def match(self, queries) -> list:
+        """
+        Codes of campaigns whose cleaned name contains any query starting at
+        a word (after folding spelling differences, so "men" does not match
+        "women"). A query that matches no name resolves to its closest
+        name(s) when at least `resolve_threshold` of its trigrams occur there.
+        """
+        codes = set()
+        for query in queries:
+            folded = fold_campaign_name(query)
+            if not folded:
+                continue
+            compact = folded.replace(" ", "")
+            hits = {code for code in range(len(self.names)) if self._contains(code, compact)}
+            if not hits:
+                hits = self._resolve(folded)
+            codes |= hits
+        return sorted(codes)
+
+    def _contains(self, code, compact) -> bool:
+        name, starts = self._compact[code], self._word_starts[code]
+        at = name.find(compact)
+        while at != -1:
+            if at in starts:
+                return True
+            at = name.find(compact, at + 1)
+        return False
+
+    def _resolve(self, folded) -> set:
+        ranked = self._trigrams.containment(folded)
+        if not ranked or ranked[0][0] < self.resolve_threshold:
+            return set()
+        best = ranked[0][0]
+        return {doc for score, doc in ranked if score >= best - 0.02}
+
+    def suggest(self, queries, n=3, cutoff=0.3) -> list:
+        """Closest cleaned names (trigram similarity) for queries that matched nothing."""
+        suggestions = []
+        for query in queries:
+            hits = self._trigrams.search(fold_campaign_name(query), n=n, min_score=cutoff)
+            suggestions += [self.names[doc] for _, doc in hits]
+        return list(dict.fromkeys(suggestions))
+
+    def rows_for(self, codes) -> np.ndarray:
+        """Sorted row positions for the given campaign codes."""
+        if not len(codes):
+            return np.empty(0, dtype=np.int64)
+        parts = [self.row_order[self.offsets[c]:self.offsets[c + 1]] for c in codes]
+        return np.sort(np.concatenate(parts))
@@ -0,0 +1,88 @@
+import pandas as pd
+from src.utils.data_utils import (
+    DAILY_AGGREGATE_COLUMNS, aggregate_daily_rows, aggregate_rows, merge_aggregates, merge_daily_aggregates, normalize_campaign_name,
+)
+from src.utils.logging_utils import log_info
+from src.utils.schema import AD_SCHEMA, iter_ad_csv
+
+# Columns needed to build per-(campaign, date) aggregates
+DAILY_SCAN_COLUMNS = ["campaign_name", "date", "spend", "revenue", "clicks", "impressions", "purchases", "roas", "ctr"]
+
+DEFAULT_CHUNK_ROWS = 250_000
+
+
+def _clean_categories(series: pd.Series, canonicalize=None) -> pd.Series:
+    """campaign_name_clean, normalizing each distinct name once instead of every row."""
+    categories = pd.Series(series.cat.categories, dtype=object)
+    clean = (canonicalize or normalize_campaign_name)(categories)
+    return series.map(dict(zip(categories, clean)))
+
+
+def iter_chunks(file_path, columns=None, chunk_rows=None, campaigns=None, start_date=None, canonicalize=None):
+    """
+    Stream a CSV in chunks, reading only `columns` with the schema's narrow dtypes.
+    Campaign (`campaigns`: cleaned names) and date (`start_date`) predicates
+    are applied to each chunk as it is read, so filtered-out rows never
+    accumulate. `canonicalize` maps raw to clean campaign names (default:
+    data_utils.normalize_campaign_name).
+    """
+    campaigns = set(campaigns) if campaigns is not None else None
+    # Typed (schema.AD_SCHEMA) and validated chunks; invalid rows never reach the aggregates
+    for chunk in iter_ad_csv(file_path, columns, chunk_rows or DEFAULT_CHUNK_ROWS):
+        if "campaign_name" in chunk.columns:
+            chunk["campaign_name_clean"] = _clean_categories(chunk["campaign_name"], canonicalize)
+
+        keep = None
+        if campaigns is not None:
+            keep = chunk["campaign_name_clean"].isin(campaigns).to_numpy()
+        if start_date is not None:
+            in_window = (chunk["date"] >= start_date).to_numpy()
+            keep = in_window if keep is None else keep & in_window
+        if keep is not None:
+            chunk = chunk[keep]
+        if not chunk.empty:
+            yield chunk
+
+
+def scan_daily_aggregates(file_path, chunk_rows=None, canonicalize=None) -> pd.DataFrame:
+    """Per-(campaign, date) aggregates of a CSV, built chunk by chunk."""
+    daily, rows = None, 0
+    for chunk in iter_chunks(file_path, DAILY_SCAN_COLUMNS, chunk_rows, canonicalize=canonicalize):
+        rows += len(chunk)
+        daily = merge_daily_aggregates(daily, aggregate_daily_rows(chunk))
+    if daily is None:
+        # Header only, or every row rejected by the schema
+        daily = pd.DataFrame(columns=DAILY_AGGREGATE_COLUMNS).astype({"date": "datetime64[ns]"})
+    log_info(f"🧱 Chunked scan of {file_path} | Rows: {rows} | Aggregate groups: {len(daily)}")
+    return daily
+
+
+def scan_rows(file_path, campaigns=None, start_date=None, chunk_rows=None, canonicalize=None) -> pd.DataFrame:
+    """Raw rows matching the campaign / date predicates (date-sorted, like the in-memory dataset)."""
+    chunks = list(iter_chunks(file_path, None, chunk_rows, campaigns, start_date, canonicalize))
+    if not chunks:
+        return pd.DataFrame()
+    rows = pd.concat(chunks, ignore_index=True)
+    for column in rows.columns:
+        if rows[column].dtype == object and AD_SCHEMA.get(column) == "category":
+            rows[column] = rows[column].astype("category")
+    return rows.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+def scan_segment_aggregates(file_path, dimensions, campaigns=None, start_date=None, chunk_rows=None,
+                            canonicalize=None):
+    """
+    Per-segment partial aggregates (see data_utils.aggregate_rows) for the
+    rows matching the predicates, merged chunk by chunk. None if no rows match.
+    """
+    dimensions = list(dimensions)
+    columns = DAILY_SCAN_COLUMNS + [d for d in dimensions if d != "campaign_name_clean"]
+    peak_fields = {"campaign": "campaign_name", "date": "date"}
+    partial = None
+    for chunk in iter_chunks(file_path, columns, chunk_rows, campaigns, start_date, canonicalize):
+        # Order by date so ties for a peak resolve to the earliest day, as in memory
+        chunk = chunk.sort_values("date", kind="stable")
+        partial = merge_aggregates(
+            partial, aggregate_rows(chunk, dimensions, peak_fields), dimensions, peak_fields
+        )
+    return partial
@@ -0,0 +1,22 @@
+import yaml
+from functools import lru_cache
+from src.utils.logging_utils import log_error
+
+
+@lru_cache(maxsize=None)
+def load_config(path: str = "config/config.yaml") -> dict:
+    """Load config.yaml once per process. Returns {} if missing or invalid."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        log_error(f"❌ Config file not found: {path}")
+        return {}
+    except yaml.YAMLError as e:
+        log_error(f"🚨 Invalid config ({path}): {str(e)}")
+        return {}
+
+
+def get_config_value(section: str, key: str, default=None, path: str = "config/config.yaml"):
+    """Read config[section][key], falling back to default."""
+    return (load_config(path).get(section) or {}).get(key, default)
@@ -1,6 +1,55 @@
+import hashlib
+import json
+import os
+import re
+import unicodedata
+import numpy as np
 import pandas as pd
-from typing import Optional
+from typing import Optional, Union
 from src.utils.logging_utils import log_info, log_error
+from src.utils.schema import apply_schema, iter_ad_csv
+
+# Per-(campaign, date) partial aggregates. Means are kept as sum + count so
+# that merging new rows into existing aggregates stays exact.
+# Bumped whenever the layout, row validation or campaign_name_clean rule of stored aggregates changes
+AGGREGATE_VERSION = 3
+
+DAILY_AGGREGATE_COLUMNS = [
+    "campaign_name_clean", "date",
+    "spend", "revenue", "clicks", "impressions", "purchases",
+    "roas_sum", "roas_n", "ctr_sum", "ctr_n", "rows",
+    "spend_max", "spend_max_campaign", "revenue_max", "revenue_max_campaign",
+]
+
+
+def fold_campaign_name(name) -> str:
+    """
+    Spelling-insensitive form of a campaign name: lowercase, accents
+    stripped, "&" read as "and", and every run of punctuation, separators
+    ("_", "-", "|") and whitespace folded into one space.
+    """
+    text = unicodedata.normalize("NFKD", str(name))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower().replace("&", " and ")
+    return re.sub(r"[\W_]+", " ", text).strip()
+
+
+def normalize_campaign_name(series: pd.Series) -> pd.Series:
+    """fold_campaign_name for every row, computed once per distinct name."""
+    codes, uniques = pd.factorize(series)
+    folded = np.array([fold_campaign_name(name) for name in uniques] + [np.nan], dtype=object)
+    return pd.Series(folded[codes], index=series.index)
+
+
+def file_fingerprint(file_path: str, with_hash: bool = False) -> dict:
+    stat = os.stat(file_path)
+    fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if with_hash:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        fingerprint["sha256"] = digest.hexdigest()
+    return fingerprint
 
 
 def load_csv_data(file_path: str) -> Optional[pd.DataFrame]:
@@ -10,20 +59,14 @@ def load_csv_data(file_path: str) -> Optional[pd.DataFrame]:
     Enhancements:
     - Validates file existence and readability
     - Normalizes column names (lowercase, trim spaces)
-    - Converts 'date' column to datetime format (if present)
+    - Reads columns with the explicit dtype plan in schema.AD_SCHEMA
+      (categorical strings, int32 counts, parsed dates) and rejects invalid rows
     - Adds robust logging for success and failure
     - Returns None instead of empty DataFrame on critical failure
     """
     try:
-        # Load the CSV file
-        df = pd.read_csv(file_path)
-
-        # Standardize column names
-        df.columns = df.columns.str.lower().str.strip()
-
-        # Convert date column (if present)
-        if "date" in df.columns:
-            df["date"] = pd.to_datetime(df["date"], errors="coerce")
+        # Load the CSV file (one validated, typed frame)
+        df = next(iter_ad_csv(file_path))
 
         log_info(
             f"📄 Successfully loaded dataset: {file_path} | "
@@ -42,3 +85,172 @@ def load_csv_data(file_path: str) -> Optional[pd.DataFrame]:
     except Exception as e:
         log_error(f"🚨 Error loading CSV ({file_path}): {str(e)}")
         return None
+
+
+PEAK_METRICS = ("spend", "revenue")
+SUM_COLUMNS = [
+    "spend", "revenue", "clicks", "impressions", "purchases",
+    "roas_sum", "roas_n", "ctr_sum", "ctr_n", "rows",
+]
+
+
+def aggregate_rows(df: pd.DataFrame, keys, peak_fields=None) -> pd.DataFrame:
+    """
+    Partial aggregates of raw rows per `keys`: sums, sum + count for means,
+    and the maximum spend/revenue. `peak_fields` ({suffix: column}) records
+    which row held each maximum, as `<metric>_max_<suffix>`.
+    """
+    keys = list(keys)
+    peak_fields = peak_fields or {"campaign": "campaign_name"}
+    grouped = df.groupby(keys, observed=True, sort=True)
+
+    partial = grouped.agg(
+        spend=("spend", "sum"),
+        revenue=("revenue", "sum"),
+        clicks=("clicks", "sum"),
+        impressions=("impressions", "sum"),
+        purchases=("purchases", "sum"),
+        roas_sum=("roas", "sum"),
+        roas_n=("roas", "count"),
+        ctr_sum=("ctr", "sum"),
+        ctr_n=("ctr", "count"),
+        rows=("spend", "size"),
+        spend_max=("spend", "max"),
+        revenue_max=("revenue", "max"),
+    )
+    # Fields of the peak row, as reported by DataAgent.get_peak_metric
+    for metric in PEAK_METRICS:
+        idx = grouped[metric].idxmax().dropna()
+        for suffix, column in peak_fields.items():
+            values = df.loc[idx.to_numpy(), column]
+            if not pd.api.types.is_datetime64_any_dtype(values):
+                values = values.astype(str)
+            partial.loc[idx.index, f"{metric}_max_{suffix}"] = values.to_numpy()
+    return partial.reset_index()
+
+
+def merge_aggregates(existing: Optional[pd.DataFrame], new: pd.DataFrame, keys, peak_suffixes=("campaign",)) -> pd.DataFrame:
+    """Exactly merge two partial-aggregate tables (sums add, maxima keep the larger row)."""
+    keys = list(keys)
+    if existing is None or existing.empty:
+        return new.sort_values(keys).reset_index(drop=True)
+
+    combined = pd.concat([existing, new], ignore_index=True)
+    merged = combined.groupby(keys, observed=True, sort=True)[SUM_COLUMNS].sum()
+
+    for metric in PEAK_METRICS:
+        # Stable sort keeps the earlier (existing) row on ties
+        peaks = (combined.sort_values(f"{metric}_max", ascending=False, kind="mergesort")
+                 .drop_duplicates(keys).set_index(keys))
+        merged[f"{metric}_max"] = peaks[f"{metric}_max"]
+        for suffix in peak_suffixes:
+            merged[f"{metric}_max_{suffix}"] = peaks[f"{metric}_max_{suffix}"]
+    return merged.reset_index()
+
+
+def aggregate_daily_rows(df: pd.DataFrame, canonicalize=None) -> pd.DataFrame:
+    """
+    Collapse raw ad rows into per-(campaign_name_clean, date) partial
+    aggregates. `canonicalize` maps raw to clean campaign names when the
+    column is missing (default: normalize_campaign_name).
+    """
+    if "campaign_name_clean" not in df.columns:
+        clean = (canonicalize or normalize_campaign_name)(df["campaign_name"].astype(str))
+        df = df.assign(campaign_name_clean=clean)
+    return aggregate_rows(df, ["campaign_name_clean", "date"])[DAILY_AGGREGATE_COLUMNS]
+
+
+def merge_daily_aggregates(existing: Optional[pd.DataFrame], new: pd.DataFrame) -> pd.DataFrame:
+    """Exactly merge two per-(campaign, date) aggregate tables."""
+    merged = merge_aggregates(existing, new, ["campaign_name_clean", "date"])[DAILY_AGGREGATE_COLUMNS]
+    return merged.sort_values(["date", "campaign_name_clean"]).reset_index(drop=True)
+
+
+def aggregate_store_paths(source_path: str, cache_root: str = ".cache/aggregates"):
+    """(aggregate CSV path, metadata path) for a source dataset."""
+    key = hashlib.sha1(os.path.abspath(source_path).encode("utf-8")).hexdigest()[:12]
+    base = os.path.join(cache_root, key)
+    return f"{base}.csv", f"{base}.meta.json"
+
+
+def load_daily_aggregates(source_path: str, cache_root: str = ".cache/aggregates") -> Optional[pd.DataFrame]:
+    """Persisted aggregates for source_path, or None if missing or out of date with the CSV."""
+    aggregate_path, meta_path = aggregate_store_paths(source_path, cache_root)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        current = file_fingerprint(source_path)
+        if (current["size"], current["mtime_ns"]) != (meta["source"]["size"], meta["source"]["mtime_ns"]):
+            return None
+        if meta.get("version") != AGGREGATE_VERSION:
+            return None
+        daily = pd.read_csv(aggregate_path, parse_dates=["date"], float_precision="round_trip")
+    except (FileNotFoundError, KeyError, json.JSONDecodeError, pd.errors.EmptyDataError):
+        return None
+    return daily
+
+
+def save_daily_aggregates(daily: pd.DataFrame, source_path: str, cache_root: str = ".cache/aggregates"):
+    aggregate_path, meta_path = aggregate_store_paths(source_path, cache_root)
+    os.makedirs(cache_root, exist_ok=True)
+    daily.to_csv(f"{aggregate_path}.tmp", index=False)
+    os.replace(f"{aggregate_path}.tmp", aggregate_path)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({"version": AGGREGATE_VERSION, "source": file_fingerprint(source_path), "groups": len(daily)}, f)
+
+
+def ingest_rows(
+    new_rows: Union[pd.DataFrame, str],
+    source_path: str,
+    existing: Optional[pd.DataFrame] = None,
+    cache_root: str = ".cache/aggregates",
+    canonicalize=None,
+) -> Optional[pd.DataFrame]:
+    """
+    Append new ad-performance rows (DataFrame or CSV path) to source_path and
+    fold them into the persisted per-(campaign, date) aggregates.
+
+    Only the new rows are aggregated; history is never rescanned as long as
+    the stored aggregates match the source CSV. `canonicalize` maps raw to
+    clean campaign names (see aggregate_daily_rows). Returns the updated
+    aggregates.
+    """
+    try:
+        if isinstance(new_rows, str):
+            rows = load_csv_data(new_rows)
+        else:
+            rows, rejected = apply_schema(new_rows.copy())
+            if rejected:
+                log_error(f"🧹 Rejected {sum(rejected.values())} invalid rows: {rejected}")
+        if rows is None or rows.empty:
+            log_error("⚠ No rows to ingest.")
+            return existing
+
+        if existing is None:
+            existing = load_daily_aggregates(source_path, cache_root)
+        if existing is None:
+            history = load_csv_data(source_path)
+            existing = aggregate_daily_rows(history, canonicalize) if history is not None else None
+
+        # Append raw rows in the source's column order so the CSV stays authoritative
+        header = pd.read_csv(source_path, nrows=0).columns.str.lower().str.strip()
+        out = rows.reindex(columns=header)
+        out["date"] = out["date"].dt.strftime("%Y-%m-%d")
+        needs_newline = False
+        if os.path.getsize(source_path) > 0:
+            with open(source_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        with open(source_path, "a", encoding="utf-8", newline="") as f:
+            if needs_newline:
+                f.write("\n")
+            out.to_csv(f, header=False, index=False)
+
+        daily = merge_daily_aggregates(existing, aggregate_daily_rows(rows, canonicalize))
+        save_daily_aggregates(daily, source_path, cache_root)
+        log_info(f"📥 Ingested {len(rows)} rows into {source_path} | Aggregate groups: {len(daily)}")
+        return daily
+
+    except Exception as e:
+        log_error(f"🚨 Error ingesting rows into {source_path}: {str(e)}")
+        return existing
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from typing import Optional
+from src.utils.campaign_canonical import CampaignCanonicalizer
+from src.utils.data_utils import file_fingerprint, load_csv_data
+from src.utils.logging_utils import log_info, log_error
+
+STORE_VERSION = 3
+
+
+class ColumnarDatasetStore:
+    """
+    Columnar on-disk cache of a campaign CSV.
+
+    Layout (one folder per source file):
+    - meta.json          source fingerprint, column kinds, category labels
+    - <column>.npy       numeric / datetime64 values in the schema's dtypes
+                         (see schema.AD_SCHEMA), or compact category codes
+
+    Rows are stably sorted by date. String columns are stored as categorical
+    codes, and `campaign_name_clean` (the canonical campaign name, see
+    CampaignCanonicalizer) is computed once over the unique names.
+    Arrays are memory-mapped from .npy on load, so startup skips CSV parsing
+    and string normalization. The cache is rebuilt when the source size/mtime
+    change and its sha256 no longer matches.
+    """
+
+    def __init__(self, file_path: str, cache_root: str = ".cache/dataset", canonicalizer=None):
+        self.file_path = file_path
+        self.canonicalizer = canonicalizer
+        key = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()[:12]
+        self.cache_dir = os.path.join(cache_root, key)
+        self.meta_path = os.path.join(self.cache_dir, "meta.json")
+
+    def load(self) -> Optional[pd.DataFrame]:
+        """Return the dataset, rebuilding the columnar cache if stale."""
+        if not os.path.exists(self.file_path):
+            log_error(f"❌ File not found: {self.file_path}")
+            return None
+
+        meta = self._read_meta()
+        if meta is not None and self._is_fresh(meta):
+            df = self._load_columns(meta)
+            log_info(f"⚡ Loaded columnar cache for {self.file_path} | Rows: {len(df)}")
+            return df
+
+        df = load_csv_data(self.file_path)
+        if df is None:
+            return None
+        df = self._prepare(df)
+        try:
+            self._write(df)
+        except OSError as e:
+            log_error(f"⚠ Could not write dataset cache ({self.cache_dir}): {str(e)}")
+        return df
+
+    # ------------------------------------------------------------------ #
+    def _read_meta(self):
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return meta if meta.get("version") == STORE_VERSION else None
+
+    def _is_fresh(self, meta) -> bool:
+        source = meta.get("source", {})
+        current = file_fingerprint(self.file_path)
+        if current["size"] == source.get("size") and current["mtime_ns"] == source.get("mtime_ns"):
+            return True
+
+        # mtime changed (touch / copy) — fall back to comparing content hash
+        current = file_fingerprint(self.file_path, with_hash=True)
+        if current["sha256"] != source.get("sha256"):
+            return False
+        meta["source"] = current
+        self._write_meta(meta)
+        return True
+
+    def _prepare(self, df: pd.DataFrame) -> pd.DataFrame:
+        df.columns = df.columns.str.lower()
+        if "date" in df.columns:
+            df = df.sort_values("date", kind="mergesort").reset_index(drop=True)
+
+        for col in df.columns:
+            if df[col].dtype == object:
+                df[col] = df[col].astype("category")
+
+        if "campaign_name" in df.columns:
+            names = df["campaign_name"].cat
+            canonicalizer = self.canonicalizer or CampaignCanonicalizer.for_source(self.file_path)
+            clean = canonicalizer.canonicalize(
+                pd.Series(names.categories, dtype=object),
+                counts=np.bincount(names.codes[names.codes >= 0], minlength=len(names.categories)),
+            )
+            clean_codes, clean_labels = pd.factorize(clean, sort=True)
+            codes = names.codes.to_numpy()
+            mapped = np.where(codes >= 0, clean_codes[np.clip(codes, 0, None)], -1)
+            df["campaign_name_clean"] = pd.Categorical.from_codes(mapped, categories=clean_labels)
+        return df
+
+    def _write(self, df: pd.DataFrame):
+        tmp_dir = f"{self.cache_dir}.tmp{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        columns, categories = [], {}
+        for i, col in enumerate(df.columns):
+            filename = f"c{i}.npy"
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                kind = "categorical"
+                # int8 codes for up to 127 labels, int16 beyond, ...
+                values = series.cat.codes.to_numpy()
+                categories[col] = [str(c) for c in series.cat.categories]
+            elif pd.api.types.is_datetime64_any_dtype(series):
+                kind = "datetime"
+                values = series.to_numpy(dtype="datetime64[ns]")
+            else:
+                kind = "numeric"
+                values = series.to_numpy()
+            np.save(os.path.join(tmp_dir, filename), values, allow_pickle=False)
+            columns.append({"name": col, "kind": kind, "file": filename})
+
+        meta = {
+            "version": STORE_VERSION,
+            "source": file_fingerprint(self.file_path, with_hash=True),
+            "rows": len(df),
+            "columns": columns,
+            "categories": categories,
+        }
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.replace(tmp_dir, self.cache_dir)
+        log_info(f"🗂 Built columnar cache: {self.cache_dir}")
+
+    def _write_meta(self, meta):
+        tmp_path = f"{self.meta_path}.tmp{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def _load_columns(self, meta) -> pd.DataFrame:
+        data = {}
+        for column in meta["columns"]:
+            values = np.load(os.path.join(self.cache_dir, column["file"]), mmap_mode="r")
+            if column["kind"] == "categorical":
+                data[column["name"]] = pd.Categorical.from_codes(
+                    np.asarray(values), categories=meta["categories"][column["name"]]
+                )
+            else:
+                data[column["name"]] = values
+        return pd.DataFrame(data)
+
+
+def load_dataset(file_path: str, cache_root: str = ".cache/dataset", canonicalizer=None) -> Optional[pd.DataFrame]:
+    """Load a campaign CSV through the columnar cache."""
+    return ColumnarDatasetStore(file_path, cache_root=cache_root, canonicalizer=canonicalizer).load()
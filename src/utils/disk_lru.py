@@ -0,0 +1,79 @@
+import os
+import threading
+
+
+class DiskLRU:
+    """
+    Directory of text entries, one `<key>.json` file per key, shared by the
+    LLM and DataAgent result caches.
+
+    - Writes go to a temp file and are swapped in with os.replace, so a
+      reader never sees a partial entry
+    - Reads touch the file, and LRU-by-mtime eviction keeps at most
+      `max_entries` files (0 / None: unbounded)
+
+    Not locked: each cache serializes access with its own lock.
+    """
+
+    def __init__(self, cache_dir, max_entries=None):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def read(self, key: str):
+        """Entry text, or None if missing. Touches the file so eviction order follows last use."""
+        path = self.path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path, None)
+        return text
+
+    def write(self, key: str, text: str):
+        path = self.path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        self._evict_overflow()
+
+    def evict(self, key: str):
+        """Drop one entry (e.g. expired), counted as an eviction."""
+        _remove(self.path(key))
+        self.evictions += 1
+
+    def clear(self):
+        for path in self._entries():
+            _remove(path)
+
+    def _entries(self):
+        return [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if name.endswith(".json")
+        ]
+
+    def _evict_overflow(self):
+        if not self.max_entries:
+            return
+        entries = self._entries()
+        overflow = len(entries) - self.max_entries
+        if overflow <= 0:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:overflow]:
+            _remove(path)
+            self.evictions += 1
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
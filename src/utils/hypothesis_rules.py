@@ -0,0 +1,267 @@
+import math
+import re
+import numpy as np
+import pandas as pd
+from src.utils.config_utils import load_config
+from src.utils.data_utils import fold_campaign_name
+
+METRIC_ALIASES = {
+    "roas": r"roas|return on ad spend",
+    "ctr": r"ctrs?|click[- ]through(?: rates?)?",
+    "spend": r"spend|budget",
+    "revenue": r"revenue|sales",
+}
+DOWN_WORDS = r"drop(?:ped|s)?|declin(?:e|ed|es|ing)|decreas(?:e|ed|es|ing)|fall(?:s|ing)?|fell|down|lower|reduc(?:e|ed|tion)|fatigue"
+UP_WORDS = r"increas(?:e|ed|es|ing)|ris(?:e|es|ing)|rose|grow(?:th|s|ing)?|higher|up|spik(?:e|ed|es)|scal(?:e|ed|ing)"
+LEVEL_WORDS = r"low|below|under|weak|poor|sub-optimal|suboptimal"
+_GAP = r"\W+(?:[\w'-]+\W+){0,3}?"
+
+
+def _t_two_sided_p(t: float, dof: float) -> float:
+    """Two-sided p-value of Student's t via the regularized incomplete beta."""
+    if not np.isfinite(t) or not np.isfinite(dof) or dof <= 0:
+        return 1.0
+    x = dof / (dof + t * t)
+    return _betainc(dof / 2.0, 0.5, x)
+
+
+def _betainc(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta I_x(a, b) (continued fraction, Numerical Recipes)."""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    ln_front = math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1 - x)
+    if x < (a + 1) / (a + b + 2):
+        return math.exp(ln_front) * _betacf(a, b, x) / a
+    return 1.0 - math.exp(ln_front) * _betacf(b, a, 1 - x) / b
+
+
+def _betacf(a, b, x, max_iter=200, eps=3e-12):
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c, d = 1.0, 1.0 - qab * x / qap
+    d = 1.0 / (d if abs(d) > 1e-300 else 1e-300)
+    h = d
+    for m in range(1, max_iter + 1):
+        m2 = 2 * m
+        for aa in (m * (b - m) * x / ((qam + m2) * (a + m2)),
+                   -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))):
+            d = 1.0 + aa * d
+            d = 1.0 / (d if abs(d) > 1e-300 else 1e-300)
+            c = 1.0 + aa / c
+            c = c if abs(c) > 1e-300 else 1e-300
+            h *= d * c
+        if abs(d * c - 1.0) < eps:
+            break
+    return h
+
+
+def confidence_label(confidence: float, cutoff: float) -> str:
+    if confidence >= 0.95:
+        return "high"
+    return "medium" if confidence >= cutoff else "low"
+
+
+class HypothesisRuleValidator:
+    """
+    Deterministic fast path for EvaluatorAgent.
+
+    Per-campaign statistics (prior vs recent half of the window: mean,
+    variance, n) are computed for every campaign in one groupby over
+    `daily_trends`. Each hypothesis is parsed into metric claims
+    ("ROAS declined", "low CTR", "spend increased") and tested with Welch's
+    t-test (shifts) or a one-sample t-test against `low_ctr` (levels), using
+    the thresholds in config.yaml. Clear-cut hypotheses get a local verdict;
+    everything else is returned for LLM escalation.
+    """
+
+    def __init__(self, thresholds=None):
+        thresholds = thresholds or load_config().get("thresholds", {})
+        self.low_ctr = thresholds.get("low_ctr", 0.01)
+        self.roas_drop_pct = thresholds.get("roas_drop_pct", 0.2)
+        self.min_impressions = thresholds.get("min_impressions", 1000)
+        self.confidence_cutoff = thresholds.get("confidence_cutoff", 0.6)
+
+    # ------------------------------------------------------------------ #
+    def validate(self, hypotheses, data_output):
+        """Returns (local_results, escalated_hypotheses)."""
+        daily_trends = (data_output or {}).get("daily_trends") or []
+        if not isinstance(hypotheses, list) or not daily_trends:
+            return [], hypotheses if isinstance(hypotheses, list) else []
+
+        stats = self.campaign_stats(pd.DataFrame(daily_trends))
+        impressions = self._campaign_impressions(data_output, stats.index)
+
+        local, escalated = [], []
+        for hypothesis in hypotheses:
+            verdict = self.validate_one(hypothesis, stats, impressions) if isinstance(hypothesis, dict) else None
+            if verdict is None:
+                escalated.append(hypothesis)
+            else:
+                local.append(verdict)
+        return local, escalated
+
+    def campaign_stats(self, trends: pd.DataFrame) -> pd.DataFrame:
+        """Prior/recent mean, variance and n per campaign and metric, in one pass."""
+        trends = trends.assign(date=pd.to_datetime(trends["date"], errors="coerce"))
+        rank = trends.groupby("campaign_name_clean")["date"].rank(method="dense")
+        days = trends.groupby("campaign_name_clean")["date"].transform("nunique")
+        trends["period"] = np.where(rank > days / 2, "recent", "prior")
+
+        metrics = [m for m in METRIC_ALIASES if m in trends.columns]
+        grouped = trends.groupby(["campaign_name_clean", "period"])[metrics].agg(["mean", "var", "count"])
+        stats = grouped.unstack("period")
+        stats.columns = [f"{metric}_{agg}_{period}" for metric, agg, period in stats.columns]
+
+        overall = trends.groupby("campaign_name_clean")[metrics].agg(["mean", "var", "count"])
+        overall.columns = [f"{metric}_{agg}_all" for metric, agg in overall.columns]
+        span = trends.groupby("campaign_name_clean")["date"].agg(["min", "max"])
+        # A period can be missing (e.g. a one-day window); those campaigns get NaT bounds
+        by_period = trends.groupby(["campaign_name_clean", "period"])["date"]
+        bounds = pd.DataFrame({
+            "prior_end": by_period.max().unstack("period").reindex(columns=["prior"])["prior"],
+            "recent_start": by_period.min().unstack("period").reindex(columns=["recent"])["recent"],
+        })
+        return stats.join(overall).join(span).join(bounds)
+
+    def _campaign_impressions(self, data_output, campaigns):
+        summaries = data_output.get("campaign_summaries") or {}
+        if "total_impressions" in summaries and len(campaigns) == 1:
+            return {campaigns[0]: summaries["total_impressions"]}
+        return {
+            name: summary.get("total_impressions")
+            for name, summary in summaries.items() if isinstance(summary, dict)
+        }
+
+    # ------------------------------------------------------------------ #
+    def validate_one(self, hypothesis, stats, impressions):
+        campaign = self._resolve_campaign(hypothesis.get("campaign"), stats.index)
+        claims = self.parse_claims(hypothesis)
+        if campaign is None or not claims:
+            return None
+
+        volume = impressions.get(campaign)
+        if volume is not None and volume < self.min_impressions:
+            return None
+
+        row = stats.loc[campaign]
+        if pd.isna(row["prior_end"]) or pd.isna(row["recent_start"]):
+            return None  # nothing to compare against; leave it to the LLM
+        outcomes = [self._test_claim(claim, row) for claim in claims]
+        if any(o is None for o in outcomes):
+            return None
+
+        refuted = [o for o in outcomes if o["outcome"] == "not supported"]
+        supported = [o for o in outcomes if o["outcome"] == "supported"]
+        if refuted:
+            verdict, decisive = "not supported", refuted
+        elif len(supported) == len(outcomes):
+            verdict, decisive = "supported", supported
+        else:
+            return None
+
+        confidence = min(o["confidence"] for o in decisive)
+        return {
+            "hypothesis_id": hypothesis.get("hypothesis_id"),
+            "verdict": verdict,
+            "confidence_level": confidence_label(confidence, self.confidence_cutoff),
+            "justification": "; ".join(o["justification"] for o in decisive),
+            "evidence": {
+                "campaign": campaign,
+                "dates_compared": [
+                    f"{row['min'].date()} to {row['prior_end'].date()}",
+                    f"{row['recent_start'].date()} to {row['max'].date()}",
+                ],
+                "metric_changes": {
+                    k: v for o in outcomes for k, v in o.get("metric_changes", {}).items()
+                },
+                "confidence": round(confidence, 3),
+            },
+            "validated_by": "rules",
+        }
+
+    @staticmethod
+    def _resolve_campaign(name, campaigns):
+        campaigns = list(campaigns)
+        if not name:
+            return campaigns[0] if len(campaigns) == 1 else None
+        clean = fold_campaign_name(name)
+        if clean in campaigns:
+            return clean
+        matches = [c for c in campaigns if clean in c or c in clean]
+        return matches[0] if len(matches) == 1 else None
+
+    @staticmethod
+    def parse_claims(hypothesis) -> list:
+        """[(metric, "down" | "up" | "low")] claims stated in the hypothesis text."""
+        text = " ".join(
+            str(hypothesis.get(field, "")) for field in ("issue", "hypothesis", "title")
+        ).lower()
+        kinds = (("down", DOWN_WORDS), ("up", UP_WORDS), ("low", LEVEL_WORDS))
+        patterns = (
+            r"\b(?:{alias})\b{gap}\b(?:{words})\b",                  # "ROAS dropped"
+            r"\b(?:{words})\b(?:\W+(?:in|of))?\W+\b(?:{alias})\b",  # "drop in ROAS", "low CTR"
+        )
+        claims = []
+        for metric, alias in METRIC_ALIASES.items():
+            # The tightest phrase wins: "Low CTR suggests fatigue" is a level claim
+            candidates = [
+                (len(match.group(0)), kind)
+                for kind, words in kinds
+                for pattern in patterns
+                for match in re.finditer(pattern.format(alias=alias, words=words, gap=_GAP), text)
+            ]
+            if candidates:
+                claims.append((metric, min(candidates)[1]))
+        return claims
+
+    def _test_claim(self, claim, row):
+        metric, kind = claim
+        if kind == "low":
+            return self._test_low_level(metric, row)
+        return self._test_shift(metric, kind, row)
+
+    def _test_shift(self, metric, direction, row):
+        n1, n2 = row.get(f"{metric}_count_prior"), row.get(f"{metric}_count_recent")
+        if not n1 or not n2 or n1 < 3 or n2 < 3:
+            return None
+        m1, m2 = row[f"{metric}_mean_prior"], row[f"{metric}_mean_recent"]
+        v1, v2 = row[f"{metric}_var_prior"], row[f"{metric}_var_recent"]
+        se2 = v1 / n1 + v2 / n2
+        if not m1 or not np.isfinite(se2) or se2 <= 0:
+            return None
+
+        t = (m2 - m1) / math.sqrt(se2)
+        dof = se2 ** 2 / ((v1 / n1) ** 2 / (n1 - 1) + (v2 / n2) ** 2 / (n2 - 1))
+        confidence = 1.0 - _t_two_sided_p(t, dof)
+        change = (m2 - m1) / abs(m1)
+        claimed_sign = -1 if direction == "down" else 1
+        # ROAS drops must also clear the configured magnitude threshold
+        min_change = self.roas_drop_pct if metric == "roas" else 0.0
+
+        changes = {f"{metric}_change_pct": round(change * 100, 1)}
+        description = f"{metric.upper()} {m1:.4g} → {m2:.4g} ({change:+.1%}, confidence {confidence:.2f})"
+        if confidence >= self.confidence_cutoff and change * claimed_sign > min_change:
+            return {"outcome": "supported", "confidence": confidence,
+                    "justification": description, "metric_changes": changes}
+        if confidence >= self.confidence_cutoff and change * claimed_sign < 0:
+            return {"outcome": "not supported", "confidence": confidence,
+                    "justification": description, "metric_changes": changes}
+        return {"outcome": "ambiguous", "confidence": confidence, "metric_changes": changes}
+
+    def _test_low_level(self, metric, row):
+        if metric != "ctr":
+            return None  # only CTR has a configured "low" threshold
+        n, mean, var = row.get("ctr_count_all"), row.get("ctr_mean_all"), row.get("ctr_var_all")
+        if not n or n < 3 or not np.isfinite(var) or var <= 0:
+            return None
+
+        t = (mean - self.low_ctr) / math.sqrt(var / n)
+        confidence = 1.0 - _t_two_sided_p(t, n - 1)
+        description = f"Mean CTR {mean:.4f} vs low_ctr threshold {self.low_ctr} (confidence {confidence:.2f})"
+        changes = {"ctr_mean": round(float(mean), 4), "low_ctr_threshold": self.low_ctr}
+        if confidence >= self.confidence_cutoff:
+            outcome = "supported" if mean < self.low_ctr else "not supported"
+            return {"outcome": outcome, "confidence": confidence,
+                    "justification": description, "metric_changes": changes}
+        return {"outcome": "ambiguous", "confidence": confidence, "metric_changes": changes}
@@ -0,0 +1,230 @@
+import re
+from src.utils.campaign_canonical import edit_distance
+from src.utils.data_utils import fold_campaign_name
+
+AGENT_ORDER = ["data_agent", "insight_agent", "evaluator_agent", "creative_agent"]
+
+# Intent keywords (see the planner prompt's intent table) and the agents each one needs
+INTENTS = {
+    "summary": (r"show|summar\w*|total\w*|overview|report|breakdown|list|how", ["data_agent"]),
+    "trend": (
+        r"trend\w*|increas\w*|declin\w*|decreas\w*|drop\w*|dip\w*|fell|fall\w*|rose|ris\w*|spik\w*|chang\w*",
+        ["data_agent", "insight_agent"],
+    ),
+    "comparison": (r"vs|versus|compar\w*|better|worse|higher|lower", ["data_agent", "insight_agent"]),
+    "root_cause": (r"why|reasons?|caus\w*|explain\w*|diagnos\w*", ["data_agent", "insight_agent", "evaluator_agent"]),
+    "validation": (
+        r"validat\w*|confirm\w*|prove|verif\w*|test\w*|accura\w*",
+        ["data_agent", "insight_agent", "evaluator_agent"],
+    ),
+    "optimization": (
+        r"improv\w*|optimi\w*|recommend\w*|creatives?|suggest\w*|fix\w*|ideas?|headlines?",
+        ["data_agent", "insight_agent", "creative_agent"],
+    ),
+}
+OBJECTIVES = {
+    "root_cause": "Explain the drivers of",
+    "validation": "Validate hypotheses about",
+    "optimization": "Recommend improvements for",
+    "trend": "Analyze changes in",
+    "comparison": "Compare",
+    "summary": "Summarize",
+}
+
+METRICS = {
+    "roas": "roas", "return on ad spend": "roas", "ctr": "ctr", "click through rate": "ctr",
+    "revenue": "revenue", "sales": "revenue", "spend": "spend", "cost": "spend", "budget": "spend",
+    "cpa": "cpa", "cost per acquisition": "cpa", "clicks": "clicks",
+}
+DIMENSIONS = {
+    "platform": "platform", "platforms": "platform", "country": "country", "countries": "country",
+    "creative type": "creative_type", "creative types": "creative_type",
+    "audience type": "audience_type", "audience": "audience_type", "audiences": "audience_type",
+    "adset": "adset_name", "adsets": "adset_name", "ad set": "adset_name", "ad sets": "adset_name",
+}
+AGENT_STEPS = {
+    "insight_agent": "hypothesis_generation",
+    "evaluator_agent": "hypothesis_validation",
+    "creative_agent": "creative_generation",
+}
+UNIT_DAYS = {"day": 1, "week": 7, "fortnight": 14, "month": 30, "quarter": 90, "year": 365}
+
+STOP_WORDS = set("""
+a an the for of in on to and or with over during across between from at by per within since
+me my our we us i you it its this that these those there their them is are was were be been being
+did do does has have had can could should would will what which who how much many when where
+show give tell please let see get all any each every overall both campaign campaigns ad ads
+performance data numbers metrics results stats analysis analyze analyse look happened going
+last past previous recent recently latest days weeks months time so far up down s
+""".split())
+
+_UNIT = r"(day|week|fortnight|month|quarter|year)s?"
+DATE_PATTERNS = [
+    (rf"\b(?:(?:last|past|previous|recent|latest|over|in|within)\s+)?(\d+)\s+{_UNIT}\b",
+     lambda m: int(m.group(1)) * UNIT_DAYS[m.group(2)]),
+    (rf"\b(?:last|past|previous|this)\s+{_UNIT}\b", lambda m: UNIT_DAYS[m.group(1)]),
+    (r"\b(?:yesterday|today)\b", lambda m: 1),
+]
+
+
+def _alternation(phrases):
+    return "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+
+
+_METRIC_RE = re.compile(rf"\b({_alternation(METRICS)})\b")
+_DIMENSION_RE = re.compile(
+    rf"\b(?:by|per|across|split by|broken down by|breakdown by)\s+"
+    rf"((?:{_alternation(DIMENSIONS)})(?:\s+(?:and|or)\s+(?:{_alternation(DIMENSIONS)}))*)\b"
+)
+_INTENT_RES = {intent: re.compile(rf"^(?:{pattern})$") for intent, (pattern, _) in INTENTS.items()}
+
+
+class IntentParser:
+    """
+    Deterministic fast path for PlannerAgent.
+
+    The query is folded like campaign names (see data_utils.fold_campaign_name)
+    and every word is accounted for: campaign mentions (full canonical names,
+    or runs of name words unique to one campaign), date windows ("last 14
+    days", "past month"), metrics, "by <dimension>" breakdowns, intent
+    keywords and stop words. Confidence is the share of words explained; a
+    query without an intent keyword, or with a leftover word that looks like
+    a misspelt campaign word, gets confidence 0 and is left to the LLM.
+
+    `campaigns` is a list of canonical campaign names or a callable returning
+    one (re-indexed whenever a different list is returned).
+    """
+
+    def __init__(self, campaigns=(), default_window_days=30):
+        self._source = campaigns
+        self.default_window_days = default_window_days
+        self._names = None
+        self._phrases = {}
+        self._name_words = set()
+        self._max_words = 0
+
+    def _refresh(self):
+        names = self._source() if callable(self._source) else self._source
+        if names is self._names:
+            return
+        self._names = names
+        self._phrases, self._name_words, self._max_words = {}, set(), 0
+        for name in names:
+            words = tuple(str(name).split())
+            self._name_words.update(words)
+            self._max_words = max(self._max_words, len(words))
+            for i in range(len(words)):
+                for j in range(i + 1, len(words) + 1):
+                    self._phrases.setdefault(words[i:j], set()).add(str(name))
+
+    # ------------------------------------------------------------------ #
+    def parse(self, query: str):
+        """(plan dict, confidence in [0, 1]). The plan has the LLM planner's keys."""
+        self._refresh()
+        words = fold_campaign_name(query).split()
+        if not words:
+            return None, 0.0
+        explained = [False] * len(words)
+
+        campaigns = self._campaigns(words, explained)
+        text = " ".join(words)
+        days = None
+        for pattern, to_days in DATE_PATTERNS:
+            for m in re.finditer(pattern, text):
+                days = days or to_days(m)
+                self._consume(text, m.span(), explained)
+        dimensions = []
+        for m in _DIMENSION_RE.finditer(text):
+            span = m.group(1)
+            dimensions += [DIMENSIONS[d] for d in re.findall(_alternation(DIMENSIONS), span)]
+            self._consume(text, m.span(), explained)
+        metrics = []
+        for m in _METRIC_RE.finditer(text):
+            metrics.append(METRICS[m.group(1)])
+            self._consume(text, m.span(), explained)
+
+        intents = []
+        for i, word in enumerate(words):
+            hits = [intent for intent, regex in _INTENT_RES.items() if regex.match(word)]
+            if hits and not explained[i]:
+                intents += hits
+                explained[i] = True
+            elif word in STOP_WORDS:
+                explained[i] = True
+
+        leftover = [w for w, ok in zip(words, explained) if not ok]
+        if not intents or any(self._looks_like_campaign(w) for w in leftover):
+            confidence = 0.0
+        else:
+            confidence = 1 - len(leftover) / len(words)
+
+        flow = {agent for intent in intents for agent in INTENTS[intent][1]}
+        agent_flow = [agent for agent in AGENT_ORDER if agent in flow] or ["data_agent"]
+        metrics = list(dict.fromkeys(metrics)) or ["roas", "ctr"]
+        plan = {
+            "objective": self._objective(intents, metrics, campaigns, days),
+            "steps": self._steps(agent_flow, dimensions),
+            "campaign_name": campaigns or None,
+            "analysis_window_days": days or self.default_window_days,
+            "metrics_focus": metrics,
+            "agent_flow": agent_flow,
+            "planned_by": "rules",
+        }
+        if dimensions:
+            plan["breakdown_by"] = list(dict.fromkeys(dimensions))
+        return plan, round(confidence, 3)
+
+    def _campaigns(self, words, explained):
+        """Canonical names mentioned in words, longest phrase first."""
+        found, i = [], 0
+        while i < len(words):
+            for k in range(min(self._max_words, len(words) - i), 0, -1):
+                phrase = tuple(words[i:i + k])
+                names = self._phrases.get(phrase)
+                if not names:
+                    continue
+                full = [n for n in names if len(n.split()) == k]
+                # A partial name must be unique and carry a non-generic word ("comfortmax", not "men drop")
+                distinctive = len(names) == 1 and any(w not in STOP_WORDS and not self._is_keyword(w) for w in phrase)
+                if full or distinctive:
+                    found += sorted(full) if full else sorted(names)
+                    explained[i:i + k] = [True] * k
+                    i += k - 1
+                    break
+            i += 1
+        return list(dict.fromkeys(found))
+
+    @staticmethod
+    def _is_keyword(word):
+        return (word in METRICS or word in DIMENSIONS or word in UNIT_DAYS
+                or any(regex.match(word) for regex in _INTENT_RES.values()))
+
+    def _looks_like_campaign(self, word):
+        if len(word) < 4 or word.isdigit():
+            return False
+        limit = 1 if len(word) < 6 else 2
+        return any(edit_distance(word, name_word, limit) <= limit for name_word in self._name_words)
+
+    @staticmethod
+    def _consume(text, span, explained):
+        """Mark the words covered by a character span of text as explained."""
+        start, end = span
+        first = text.count(" ", 0, start)
+        last = text.count(" ", 0, end)
+        for i in range(first, last + 1):
+            explained[i] = True
+
+    @staticmethod
+    def _objective(intents, metrics, campaigns, days):
+        lead = next((OBJECTIVES[i] for i in OBJECTIVES if i in intents), "Summarize")
+        target = ", ".join(campaigns) if campaigns else "all campaigns"
+        window = f" over the last {days} days" if days else ""
+        return f"{lead} {'/'.join(m.upper() for m in metrics)} for {target}{window}"
+
+    @staticmethod
+    def _steps(agent_flow, dimensions):
+        steps = ["data_loading", "filter_data", "aggregate_metrics"]
+        if dimensions:
+            steps.append("segment_breakdown")
+        steps += [AGENT_STEPS[agent] for agent in agent_flow if agent in AGENT_STEPS]
+        return steps
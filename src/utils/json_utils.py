@@ -0,0 +1,161 @@
+import json
+
+_OPENERS = {"[": "]", "{": "}"}
+
+
+def strip_code_fences(text: str) -> str:
+    return text.replace("```json", "").replace("```", "").strip()
+
+
+def find_json_span(text: str, openers="[{"):
+    """
+    (start, end) of the first balanced JSON array/object whose opening bracket
+    is in `openers`, honouring strings and escapes. None if nothing balances.
+    """
+    start = 0
+    while True:
+        starts = [i for i in (text.find(ch, start) for ch in openers) if i != -1]
+        if not starts:
+            return None
+        start = min(starts)
+        end = _match_bracket(text, start)
+        if end is not None:
+            return start, end + 1
+        start += 1
+
+
+def _match_bracket(text, start):
+    stack, in_string, escaped = [], False, False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in _OPENERS:
+            stack.append(_OPENERS[ch])
+        elif ch in "]}":
+            if not stack or stack.pop() != ch:
+                return None
+            if not stack:
+                return i
+    return None
+
+
+def extract_json(text: str, expect: str = "list", allow_fallback: bool = False) -> str:
+    """
+    Extracts valid JSON from AI response even if wrapped inside markdown or text.
+
+    expect="list" looks for a top-level array, expect="object" for an object.
+    With allow_fallback, a list lookup falls back to an object (and vice versa).
+    Returns the stripped text unchanged if nothing balanced is found.
+    """
+    text = strip_code_fences(text)
+    primary, secondary = ("[", "{") if expect == "list" else ("{", "[")
+    for openers in ([primary, secondary] if allow_fallback else [primary]):
+        span = find_json_span(text, openers)
+        if span:
+            return text[span[0]:span[1]].strip()
+    return text
+
+
+class IncrementalJSONParser:
+    """
+    Parses a streamed LLM response chunk by chunk.
+
+    If the top-level value is an array, each element is emitted as soon as
+    its closing bracket arrives; a top-level object is emitted once complete.
+    Markdown fences and leading prose are skipped.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0            # next char to scan
+        self._top = None         # "[" or "{" once the top-level value starts
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._item_start = None
+        self.done = False
+        self.items = []
+
+    def feed(self, chunk: str) -> list:
+        """Add text; return the list of newly completed items."""
+        if self.done or not chunk:
+            return []
+        self.buffer += chunk
+        emitted = []
+        text = self.buffer
+
+        while self._pos < len(text) and not self.done:
+            ch = text[self._pos]
+
+            if self._top is None:
+                if ch in _OPENERS:
+                    self._top = ch
+                    self._depth = 1
+                    if ch == "{":
+                        self._item_start = self._pos
+                self._pos += 1
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                self._pos += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._top == "[" and self._item_start is None:
+                    self._item_start = self._pos
+            elif ch in _OPENERS:
+                if self._depth == 1 and self._top == "[":
+                    self._item_start = self._pos
+                self._depth += 1
+            elif ch in "]}":
+                self._depth -= 1
+                if self._top == "[" and self._depth == 1 and self._item_start is not None:
+                    self._emit(text[self._item_start:self._pos + 1], emitted)
+                elif self._depth == 0:
+                    if self._top == "{":
+                        self._emit(text[self._item_start:self._pos + 1], emitted)
+                    elif self._item_start is not None:
+                        # trailing scalar element before the closing bracket
+                        self._emit(text[self._item_start:self._pos], emitted)
+                    self.done = True
+            elif ch == "," and self._depth == 1 and self._top == "[":
+                if self._item_start is not None:
+                    self._emit(text[self._item_start:self._pos], emitted)
+            elif self._depth == 1 and self._top == "[" and not ch.isspace() and self._item_start is None:
+                self._item_start = self._pos  # scalar element
+            self._pos += 1
+
+        return emitted
+
+    def _emit(self, raw, emitted):
+        self._item_start = None
+        raw = raw.strip()
+        if not raw:
+            return
+        try:
+            item = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        self.items.append(item)
+        emitted.append(item)
+
+    def result(self):
+        """Everything parsed so far: the list of items, or the object."""
+        if self._top == "{":
+            return self.items[0] if self.items else None
+        return list(self.items)
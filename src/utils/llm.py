@@ -1,19 +1,489 @@
+import hashlib
+import json
 import os
+import random
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from src.utils.config_utils import load_config
+from src.utils.disk_lru import DiskLRU
+from src.utils.json_utils import IncrementalJSONParser
+from src.utils.summary_utils import estimate_tokens
+from src.utils.tracing import span
+
+
+class LLMCache:
+    """
+    Persistent, content-addressed cache for LLM responses.
+
+    - One JSON file per entry, keyed by sha256(model name + final prompt)
+    - TTL expiry checked on read, LRU-by-mtime eviction above max_entries
+      (DiskLRU)
+    - Hit / miss / eviction counters exposed via stats()
+    """
+
+    def __init__(self, cache_dir=".cache/llm", max_entries=2000, ttl_seconds=7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+        self.disk = DiskLRU(cache_dir, max_entries)
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(model_name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, model_name: str, prompt: str):
+        """Return the cached response text, or None on miss / expiry."""
+        key = self.make_key(model_name, prompt)
+        with self._lock:
+            text = self.disk.read(key)
+            try:
+                entry = json.loads(text) if text is not None else None
+            except json.JSONDecodeError:
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if self.ttl_seconds and time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+                self.disk.evict(key)
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return entry.get("response")
+
+    def put(self, model_name: str, prompt: str, response: str):
+        key = self.make_key(model_name, prompt)
+        entry = {"model": model_name, "created_at": time.time(), "response": response}
+        with self._lock:
+            self.disk.write(key, json.dumps(entry))
+            self.writes += 1
+
+    def clear(self):
+        with self._lock:
+            self.disk.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.disk.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> LLMCache:
+    """Process-wide cache shared by every agent, so counters cover the whole run."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache(cache_dir=os.getenv("LLM_CACHE_DIR", ".cache/llm"))
+        return _default_cache
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: `rate` tokens/sec, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = None) -> bool:
+        """Block until a token is available; False if timeout expires first."""
+        if not self.rate:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    TimeoutError,
+    ConnectionError,
+)
+
+
+class LLMClientPool:
+    """
+    Process-wide gateway for LLM requests.
+
+    - configures the SDK once and reuses one GenerativeModel per model name
+    - token-bucket rate limit plus a bounded number of concurrent calls
+    - jittered exponential backoff on 429 / 5xx / timeouts, within a
+      per-call deadline that also bounds time spent waiting for a slot
+    - identical in-flight prompts are coalesced into a single request
+    """
+
+    def __init__(self, rate_per_minute=60, burst=None, max_concurrency=4, max_retries=3,
+                 base_delay_sec=1.0, max_delay_sec=20.0, timeout_sec=120.0, coalesce=True):
+        self.bucket = TokenBucket(rate_per_minute / 60.0, burst or max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay_sec = base_delay_sec
+        self.max_delay_sec = max_delay_sec
+        self.timeout_sec = timeout_sec
+        self.coalesce = coalesce
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._models = {}
+        self._api_key = None
+        self.counters = {"requests": 0, "retries": 0, "coalesced": 0, "timeouts": 0, "failures": 0}
+
+    def model(self, model_name: str, api_key: str):
+        with self._lock:
+            if api_key != self._api_key:
+                genai.configure(api_key=api_key)
+                self._api_key = api_key
+                self._models.clear()
+            if model_name not in self._models:
+                self._models[model_name] = genai.GenerativeModel(model_name)
+            return self._models[model_name]
+
+    def call(self, key: str, request, timeout_sec: float = None):
+        """
+        Run request(timeout) -> text under the pool's limits. Concurrent calls
+        with the same key share one underlying request.
+        """
+        if not self.coalesce:
+            return self._call_with_retries(request, timeout_sec)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.counters["coalesced"] += 1
+
+        if not owner:
+            # Waiters keep their own deadline rather than the leader's
+            try:
+                return future.result(timeout=timeout_sec or self.timeout_sec)
+            except FutureTimeout:
+                self._count("timeouts")
+                raise TimeoutError("LLM call deadline exceeded while waiting for a coalesced request")
+
+        try:
+            result = self._call_with_retries(request, timeout_sec)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stream(self, request, timeout_sec: float = None):
+        """
+        Yield chunks from request(timeout) -> iterator under the pool's limits.
+        Retries only happen before the first chunk has been yielded.
+        """
+        deadline = time.monotonic() + (timeout_sec or self.timeout_sec)
+        attempt = 0
+        while True:
+            yielded = False
+            self._acquire_slot(deadline)
+            try:
+                self._count("requests")
+                for chunk in request(self._remaining(deadline)):
+                    yielded = True
+                    yield chunk
+                return
+            except RETRYABLE_ERRORS:
+                if yielded or not self._backoff(attempt, deadline):
+                    self._count("failures")
+                    raise
+                attempt += 1
+            finally:
+                self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
+
+    # ------------------------------------------------------------------ #
+    def _call_with_retries(self, request, timeout_sec):
+        deadline = time.monotonic() + (timeout_sec or self.timeout_sec)
+        attempt = 0
+        while True:
+            self._acquire_slot(deadline)
+            try:
+                self._count("requests")
+                return request(self._remaining(deadline))
+            except RETRYABLE_ERRORS:
+                if not self._backoff(attempt, deadline):
+                    self._count("failures")
+                    raise
+                attempt += 1
+            finally:
+                self._slots.release()
+
+    def _acquire_slot(self, deadline):
+        # Slot first: a rate-limit token is only spent by a caller that will send a request
+        if self._slots.acquire(timeout=self._remaining(deadline)):
+            if self.bucket.acquire(timeout=self._remaining(deadline)):
+                return
+            self._slots.release()
+        self._count("timeouts")
+        raise TimeoutError("LLM call deadline exceeded while waiting for rate limit / slot")
+
+    def _backoff(self, attempt, deadline) -> bool:
+        """Sleep with full jitter before the next attempt; False if out of retries or time."""
+        if attempt >= self.max_retries:
+            return False
+        delay = random.uniform(0, min(self.max_delay_sec, self.base_delay_sec * (2 ** attempt)))
+        if time.monotonic() + delay >= deadline:
+            return False
+        self._count("retries")
+        time.sleep(delay)
+        return True
+
+    @staticmethod
+    def _remaining(deadline):
+        return max(0.0, deadline - time.monotonic())
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+
+_default_pool = None
+
+
+def get_client_pool() -> LLMClientPool:
+    """Process-wide client pool, configured from the `llm` section of config.yaml."""
+    global _default_pool
+    with _default_cache_lock:
+        if _default_pool is None:
+            settings = load_config().get("llm") or {}
+            _default_pool = LLMClientPool(**settings)
+        return _default_pool
+
 
 class GeminiLLM:
-    def __init__(self, model_name="gemini-2.5-flash", api_key=None):
+    def __init__(self, model_name="gemini-2.5-flash", api_key=None, cache=None, cache_mode=None,
+                 pool=None, timeout_sec=None):
         api_key = api_key or os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise ValueError("API key not provided or found in environment variables.")
-        
-        genai.configure(api_key=api_key)
+
+        # SDK configuration, model objects and rate limits are shared process-wide
+        self.pool = pool or get_client_pool()
         self.model_name = model_name
-        self.model = genai.GenerativeModel(model_name)
+        self.model = self.pool.model(model_name, api_key)
+        self.timeout_sec = timeout_sec
+        self._init_cache(cache, cache_mode)
 
-    def llm_call(self, prompt: str) -> str:
+    def _init_cache(self, cache, cache_mode):
+        # "on" (default) reads and writes, "refresh" skips reads but stores
+        # the fresh response, "off" bypasses the cache entirely.
+        self.cache_mode = (cache_mode or os.getenv("LLM_CACHE", "on")).lower()
+        if self.cache_mode not in ("on", "refresh", "off"):
+            raise ValueError(f"Unknown LLM cache mode: {self.cache_mode}")
+        self.cache = cache if cache is not None else (
+            get_default_cache() if self.cache_mode != "off" else None
+        )
+
+    def llm_call(self, prompt: str, use_cache: bool = True) -> str:
         """
         Send a prompt to Gemini model and return the response text.
+        Responses are served from / stored in the LLM cache unless bypassed.
+        """
+        cache = self.cache if use_cache and self.cache_mode != "off" else None
+
+        with span("llm_call", "llm", **self._prompt_attrs(prompt)) as s:
+            if cache is not None and self.cache_mode == "on":
+                cached = cache.get(self.model_name, prompt)
+                if cached is not None:
+                    s.set(cache_hit=True, **self._response_attrs(cached))
+                    return cached
+
+            response_text = self._generate(prompt)
+            s.set(cache_hit=False, **self._response_attrs(response_text))
+
+        if cache is not None and response_text:
+            cache.put(self.model_name, prompt, response_text)
+        return response_text
+
+    def llm_stream(self, prompt: str, use_cache: bool = True):
+        """
+        Yield response text chunks as Gemini produces them.
+        A cache hit yields the stored response as one chunk; a miss is
+        stored once the stream completes.
+        """
+        cache = self.cache if use_cache and self.cache_mode != "off" else None
+
+        with span("llm_stream", "llm", model=self.model_name) as s:
+            if cache is not None and self.cache_mode == "on":
+                cached = cache.get(self.model_name, prompt)
+                if cached is not None:
+                    s.set(cache_hit=True)
+                    yield cached
+                    return
+
+            s.set(cache_hit=False)
+            chunks = []
+            for chunk in self._generate_stream(prompt):
+                chunks.append(chunk)
+                yield chunk
+
+        if cache is not None and chunks:
+            cache.put(self.model_name, prompt, "".join(chunks))
+
+    def llm_call_streaming(self, prompt: str, on_item=None, use_cache: bool = True) -> str:
         """
-        response = self.model.generate_content(prompt)
-        return response.text
\ No newline at end of file
+        Stream a JSON response, calling on_item(obj) for each array element
+        (or the whole object) as soon as it is complete. Returns the full text.
+        """
+        parser = IncrementalJSONParser()
+        chunks = []
+        with span("llm_call", "llm", streamed=True, **self._prompt_attrs(prompt)) as s:
+            start = time.perf_counter()
+            for chunk in self.llm_stream(prompt, use_cache=use_cache):
+                if not chunks:
+                    s.set(first_chunk_ms=round((time.perf_counter() - start) * 1000, 1))
+                chunks.append(chunk)
+                for item in parser.feed(chunk):
+                    if on_item is not None:
+                        on_item(item)
+            response_text = "".join(chunks)
+            s.set(chunks=len(chunks), items=len(parser.items), **self._response_attrs(response_text))
+        return response_text
+
+    def _prompt_attrs(self, prompt):
+        return {"model": self.model_name, "prompt_chars": len(prompt), "prompt_tokens": estimate_tokens(prompt)}
+
+    @staticmethod
+    def _response_attrs(text):
+        return {"response_chars": len(text or ""), "response_tokens": estimate_tokens(text or "")}
+
+    def _generate(self, prompt: str) -> str:
+        key = LLMCache.make_key(self.model_name, prompt)
+        return self.pool.call(key, lambda timeout: self._request(prompt, timeout), self.timeout_sec)
+
+    def _generate_stream(self, prompt: str):
+        return self.pool.stream(lambda timeout: self._request_stream(prompt, timeout), self.timeout_sec)
+
+    def _request(self, prompt: str, timeout: float) -> str:
+        response = self.model.generate_content(prompt, request_options={"timeout": timeout})
+        return response.text
+
+    def _request_stream(self, prompt: str, timeout: float):
+        response = self.model.generate_content(prompt, stream=True, request_options={"timeout": timeout})
+        for chunk in response:
+            text = getattr(chunk, "text", "")
+            if text:
+                yield text
+
+
+class FakeLLM(GeminiLLM):
+    """
+    Offline stand-in for GeminiLLM (tests, benchmarks, dry runs).
+
+    `responses` may be a fixed string, a dict of {substring: response}
+    matched against the prompt, or a callable(prompt) -> str. Requests go
+    through an LLMClientPool like the real client (unthrottled, no
+    coalescing unless a pool is passed in). `max_in_flight` records the most
+    requests that were running at once, so tests can check concurrency
+    without timing them.
+    """
+
+    def __init__(self, responses="[]", model_name="fake-llm", latency_sec=0.0,
+                 cache=None, cache_mode="off", chunk_size=64, pool=None, timeout_sec=None):
+        self.model_name = model_name
+        self.model = None
+        self.responses = responses
+        self.latency_sec = latency_sec
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.pool = pool or LLMClientPool(rate_per_minute=0, max_concurrency=64, max_retries=0, coalesce=False)
+        self.timeout_sec = timeout_sec
+        self._init_cache(cache, cache_mode)
+
+    def _request(self, prompt: str, timeout: float) -> str:
+        self._started()
+        try:
+            if self.latency_sec:
+                time.sleep(self.latency_sec)
+            return self._respond(prompt)
+        finally:
+            self._finished()
+
+    def _request_stream(self, prompt: str, timeout: float):
+        self._started()
+        try:
+            # Spread the latency across chunks, like a real token stream
+            text = self._respond(prompt)
+            chunks = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)] or [""]
+            for chunk in chunks:
+                if self.latency_sec:
+                    time.sleep(self.latency_sec / len(chunks))
+                yield chunk
+        finally:
+            self._finished()
+
+    def _started(self):
+        with _calls_lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _finished(self):
+        with _calls_lock:
+            self.in_flight -= 1
+
+    def _respond(self, prompt: str) -> str:
+        with _calls_lock:
+            self.calls += 1
+        if callable(self.responses):
+            return self.responses(prompt)
+        if isinstance(self.responses, dict):
+            for marker, response in self.responses.items():
+                if marker in prompt:
+                    return response
+            return self.responses.get("default", "[]")
+        return self.responses
+
+
+_calls_lock = threading.Lock()
@@ -29,7 +29,8 @@ class Logger:
         return log_data
 
     def _write_log_file(self, data):
-        filename = datetime.utcnow().strftime("%Y%m%d_%H%M%S") + ".json"
+        # Microseconds + agent name: agents finishing in the same second must not overwrite each other
+        filename = f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')}_{self.agent_name}.json"
         filepath = os.path.join(self.log_folder, filename)
 
         with open(filepath, "w") as f:
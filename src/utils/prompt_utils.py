@@ -0,0 +1,22 @@
+import os
+import threading
+
+_templates = {}
+_lock = threading.Lock()
+
+
+def load_prompt(path: str) -> str:
+    """
+    Prompt template text, read from disk once per process. The file's mtime
+    is checked on every call, so edited templates are still picked up.
+    """
+    mtime = os.stat(path).st_mtime_ns
+    with _lock:
+        cached = _templates.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    with _lock:
+        _templates[path] = (mtime, text)
+    return text
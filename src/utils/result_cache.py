@@ -0,0 +1,104 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from src.utils.config_utils import get_config_value
+from src.utils.disk_lru import DiskLRU
+
+# Bumped whenever the shape of a DataAgent result changes
+RESULT_VERSION = 1
+
+
+class ResultCache:
+    """
+    Two-level LRU cache for DataAgent results.
+
+    - Entries are keyed by sha256 of the normalized request and the dataset
+      version, and stored as canonical JSON text, so a hit returns exactly
+      the payload a miss produced (stable input for the LLM cache downstream)
+    - An in-process OrderedDict holds the `memory_entries` most recent
+      entries; one JSON file per entry on disk (DiskLRU), LRU-by-mtime
+      eviction above `disk_entries`
+    - Hit / miss / eviction counters exposed via stats()
+    """
+
+    def __init__(self, cache_dir=".cache/results", memory_entries=128, disk_entries=1000):
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.memory_evictions = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.disk = DiskLRU(cache_dir, disk_entries) if cache_dir else None
+
+    @classmethod
+    def from_config(cls):
+        return cls(
+            cache_dir=get_config_value("result_cache", "dir", ".cache/results"),
+            memory_entries=get_config_value("result_cache", "memory_entries", 128),
+            disk_entries=get_config_value("result_cache", "disk_entries", 1000),
+        )
+
+    @staticmethod
+    def make_key(request: dict, dataset_version: dict) -> str:
+        payload = {"version": RESULT_VERSION, "request": request, "dataset": dataset_version}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """The cached result (a fresh copy), or None on miss."""
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return json.loads(text)
+            text = self.disk.read(key) if self.disk is not None else None
+            try:
+                result = json.loads(text) if text is not None else None
+            except json.JSONDecodeError:
+                result = None
+            if result is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, text)
+            return result
+
+    def put(self, key: str, result: dict) -> dict:
+        """Store result; returns it as a hit would (JSON round-tripped)."""
+        text = json.dumps(result, sort_keys=True)
+        with self._lock:
+            self._remember(key, text)
+            if self.disk is not None:
+                self.disk.write(key, text)
+            self.writes += 1
+        return json.loads(text)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self.disk is not None:
+                self.disk.clear()
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "memory_evictions": self.memory_evictions,
+            "disk_evictions": self.disk.evictions if self.disk is not None else 0,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def _remember(self, key, text):
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.memory_evictions += 1
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+from src.utils.logging_utils import log_error
+
+# dtype plan for the clean.csv ad export. Strings repeat heavily and are
+# read straight into categories (one shared object per distinct value, so
+# creative messages are stored once). Counts fit in int32. Spend, revenue,
+# ROAS and CTR stay float64 so totals and JSON output keep full precision;
+# clicks are float64 too because cleaned exports contain imputed fractions.
+AD_SCHEMA = {
+    "campaign_name": "category",
+    "adset_name": "category",
+    "date": "datetime64[ns]",
+    "spend": "float64",
+    "impressions": "int32",
+    "clicks": "float64",
+    "ctr": "float64",
+    "purchases": "int32",
+    "revenue": "float64",
+    "roas": "float64",
+    "creative_type": "category",
+    "creative_message": "category",
+    "audience_type": "category",
+    "platform": "category",
+    "country": "category",
+}
+
+NUMERIC_COLUMNS = [c for c, dtype in AD_SCHEMA.items() if dtype not in ("category", "datetime64[ns]")]
+COUNT_COLUMNS = [c for c, dtype in AD_SCHEMA.items() if dtype.startswith("int")]
+NON_NEGATIVE_COLUMNS = ["spend", "impressions", "clicks", "purchases", "revenue"]
+
+
+def read_dtypes(strict: bool = True) -> dict:
+    """
+    pd.read_csv dtypes for the schema columns: strings and dates as
+    categories (dates are then parsed once per distinct value), numbers as
+    float64, or as text for per-row coercion when `strict` is False.
+    """
+    return {
+        column: "category" if dtype in ("category", "datetime64[ns]") else ("float64" if strict else "object")
+        for column, dtype in AD_SCHEMA.items()
+    }
+
+
+def parse_dates(series: pd.Series) -> pd.Series:
+    """Datetime column, parsing each distinct value of a categorical once."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        parsed = pd.to_datetime(pd.Series(categories.astype(str)), errors="coerce").to_numpy()
+        codes = series.cat.codes.to_numpy()
+        values = np.where(codes >= 0, parsed[np.clip(codes, 0, None)], np.datetime64("NaT"))
+        return pd.Series(values.astype("datetime64[ns]"), index=series.index)
+    return pd.to_datetime(series, errors="coerce")
+
+
+def apply_schema(df: pd.DataFrame):
+    """
+    Validate rows against AD_SCHEMA and cast to its dtypes.
+
+    Rows are rejected (first failing rule counted) for a missing campaign
+    name, an unparseable date, non-numeric text in a numeric column, a
+    missing count, a negative spend/revenue/count, or more clicks than
+    impressions. Columns outside the schema are left as read.
+    Returns (valid rows, {reason: rejected row count}).
+    """
+    df.columns = df.columns.str.lower().str.strip()
+    bad = np.zeros(len(df), dtype=bool)
+    rejected = {}
+
+    def reject(reason, mask):
+        mask = np.asarray(mask, dtype=bool) & ~bad
+        if mask.any():
+            rejected[reason] = int(mask.sum())
+            bad[mask] = True
+
+    for column in (c for c in NUMERIC_COLUMNS if c in df.columns):
+        values = df[column]
+        if not pd.api.types.is_numeric_dtype(values):
+            coerced = pd.to_numeric(values, errors="coerce")
+            text = values.astype(str).str.strip()
+            reject("invalid_number", coerced.isna() & values.notna() & (text != ""))
+            df[column] = coerced
+
+    if "campaign_name" in df.columns:
+        reject("missing_campaign_name", df["campaign_name"].isna())
+    if "date" in df.columns:
+        df["date"] = parse_dates(df["date"])
+        reject("invalid_date", df["date"].isna())
+    for column in (c for c in COUNT_COLUMNS if c in df.columns):
+        reject("missing_count", df[column].isna())
+    negative = [(df[c] < 0).to_numpy() for c in NON_NEGATIVE_COLUMNS if c in df.columns]
+    if negative:
+        reject("negative_value", np.logical_or.reduce(negative))
+    if "clicks" in df.columns and "impressions" in df.columns:
+        reject("clicks_exceed_impressions", df["clicks"] > df["impressions"])
+
+    if bad.any():
+        df = df[~bad].copy()
+    casts = {
+        column: dtype for column, dtype in AD_SCHEMA.items()
+        if column in df.columns and column != "date" and df[column].dtype != dtype
+    }
+    return (df.astype(casts) if casts else df), rejected
+
+
+def _read(file_path, usecols, dtypes, chunk_rows, skip_rows):
+    reader = pd.read_csv(
+        file_path,
+        usecols=usecols,
+        dtype=dtypes,
+        chunksize=chunk_rows,
+        skiprows=range(1, skip_rows + 1) if skip_rows else None,
+    )
+    if chunk_rows:
+        yield from reader
+    else:
+        yield reader
+
+
+def iter_ad_csv(file_path, columns=None, chunk_rows=None):
+    """
+    Read an ad export with AD_SCHEMA dtypes and validation, in chunks of
+    `chunk_rows` (one frame when None), optionally only `columns`.
+
+    Numbers are parsed natively; if a numeric column holds text, reading
+    restarts from the current chunk with numeric columns read as text and
+    coerced per row, so the offending rows are rejected rather than failing
+    the load. Rejected row counts are logged once at the end.
+    """
+    header = pd.read_csv(file_path, nrows=0).columns
+    wanted = {c.lower() for c in columns} if columns else None
+    usecols = [c for c in header if c.lower().strip() in wanted] if wanted else None
+
+    def dtypes_for(strict):
+        plan = read_dtypes(strict)
+        return {c: plan[c.lower().strip()] for c in (usecols or header) if c.lower().strip() in plan}
+
+    strict, done, rejected = True, 0, {}
+    chunks = _read(file_path, usecols, dtypes_for(True), chunk_rows, 0)
+    while True:
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            break
+        except ValueError as e:
+            if not strict:
+                raise
+            log_error(f"⚠ Non-numeric values in {file_path} ({e}); re-reading from row {done} with per-row checks")
+            strict = False
+            chunks = _read(file_path, usecols, dtypes_for(False), chunk_rows, done)
+            continue
+
+        done += len(chunk)
+        chunk, invalid = apply_schema(chunk)
+        for reason, count in invalid.items():
+            rejected[reason] = rejected.get(reason, 0) + count
+        if len(chunk) or not chunk_rows:
+            yield chunk
+
+    if rejected:
+        log_error(f"🧹 Rejected {sum(rejected.values())} invalid rows in {file_path}: {rejected}")
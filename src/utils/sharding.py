@@ -0,0 +1,187 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from src.utils.config_utils import get_config_value
+from src.utils.data_utils import DAILY_AGGREGATE_COLUMNS, aggregate_rows, normalize_campaign_name
+from src.utils.logging_utils import log_info
+
+_ALIGN = 64
+
+
+class SharedFrame:
+    """
+    A DataFrame's columns packed into one shared-memory block, so worker
+    processes read shards without the rows being pickled. Categorical
+    columns travel as int codes (categories are small and sent by value),
+    datetimes as int64.
+    """
+
+    def __init__(self, df: pd.DataFrame, extra_arrays=None):
+        arrays, self.columns = {}, []
+        for name in df.columns:
+            series = df[name]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                values, kind, extra = series.cat.codes.to_numpy(), "category", list(series.cat.categories)
+            elif pd.api.types.is_datetime64_any_dtype(series):
+                values, kind, extra = series.to_numpy(dtype="datetime64[ns]").view("int64"), "datetime", None
+            elif series.dtype == object:
+                codes, uniques = pd.factorize(series, sort=True)
+                values, kind, extra = codes.astype(np.int32), "category", list(uniques)
+            else:
+                values, kind, extra = series.to_numpy(), "numeric", None
+            arrays[name] = np.ascontiguousarray(values)
+            self.columns.append((name, kind, extra))
+        for name, values in (extra_arrays or {}).items():
+            arrays[name] = np.ascontiguousarray(values)
+
+        self.layout, offset = {}, 0
+        for name, values in arrays.items():
+            self.layout[name] = (offset, values.dtype.str, len(values))
+            offset += -(-values.nbytes // _ALIGN) * _ALIGN
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for name, values in arrays.items():
+            self._view(self.shm.buf, name)[:] = values
+
+    def _view(self, buf, name):
+        offset, dtype, length = self.layout[name]
+        return np.ndarray((length,), dtype=np.dtype(dtype), buffer=buf, offset=offset)
+
+    def spec(self):
+        """Everything a worker needs to attach (small, picklable)."""
+        return {"name": self.shm.name, "layout": self.layout, "columns": self.columns}
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _read_shard(spec, start, end):
+    """Worker side: rebuild the rows of one shard from shared memory."""
+    shm = shared_memory.SharedMemory(name=spec["name"])
+    try:
+        def view(name):
+            offset, dtype, length = spec["layout"][name]
+            return np.ndarray((length,), dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+
+        positions = view("__positions__")[start:end].copy()
+        data = {}
+        for name, kind, extra in spec["columns"]:
+            values = view(name)[positions]
+            if kind == "category":
+                data[name] = pd.Categorical.from_codes(values, categories=extra)
+            elif kind == "datetime":
+                data[name] = values.view("datetime64[ns]")
+            else:
+                data[name] = values
+        # Keep original row labels so peak-row lookups refer to the same rows
+        return pd.DataFrame(data, index=positions)
+    finally:
+        shm.close()
+
+
+def _aggregate_shard(spec, start, end, keys, peak_fields):
+    return aggregate_rows(_read_shard(spec, start, end), keys, peak_fields)
+
+
+class ShardedAggregator:
+    """
+    Runs data_utils.aggregate_rows over a process pool.
+
+    Rows are partitioned on one categorical group key (campaign by default),
+    so every group lives entirely in one shard and is aggregated from the
+    same rows, in the same order, as the single-process path; the merge is
+    a concatenation and the result is identical. Frames smaller than
+    `min_rows_per_shard * 2` are aggregated in-process.
+    """
+
+    def __init__(self, workers=None, min_rows_per_shard=None):
+        workers = workers if workers is not None else get_config_value("aggregation", "workers", 0)
+        self.workers = workers or os.cpu_count() or 1
+        self.min_rows_per_shard = min_rows_per_shard or get_config_value(
+            "aggregation", "min_rows_per_shard", 250_000
+        )
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            # spawn: forking a process that runs agent threads is not safe
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def shard_count(self, rows) -> int:
+        return max(1, min(self.workers, rows // self.min_rows_per_shard))
+
+    def aggregate_rows(self, df: pd.DataFrame, keys, peak_fields=None) -> pd.DataFrame:
+        """Same result as data_utils.aggregate_rows(df, keys, peak_fields)."""
+        keys = list(keys)
+        shards = self.shard_count(len(df))
+        if shards < 2:
+            return aggregate_rows(df, keys, peak_fields)
+
+        columns = list(dict.fromkeys(
+            keys + ["spend", "revenue", "clicks", "impressions", "purchases", "roas", "ctr"]
+            + list((peak_fields or {"campaign": "campaign_name"}).values())
+        ))
+        frame = df[columns]
+        positions, bounds = self._partition(frame, keys, shards)
+        shared = SharedFrame(frame, {"__positions__": positions})
+        try:
+            futures = [
+                self._executor().submit(_aggregate_shard, shared.spec(), start, end, keys, peak_fields)
+                for start, end in zip(bounds[:-1], bounds[1:]) if end > start
+            ]
+            partials = [f.result() for f in futures]
+        finally:
+            shared.close()
+
+        merged = pd.concat(partials, ignore_index=True)
+        for key in keys:
+            if isinstance(frame[key].dtype, pd.CategoricalDtype):
+                merged[key] = merged[key].astype(frame[key].dtype)
+        log_info(f"🧩 Sharded aggregation: {len(df)} rows over {len(partials)} processes")
+        return merged.sort_values(keys, kind="stable").reset_index(drop=True)
+
+    def aggregate_daily_rows(self, df: pd.DataFrame, canonicalize=None) -> pd.DataFrame:
+        """Sharded data_utils.aggregate_daily_rows."""
+        if "campaign_name_clean" not in df.columns:
+            clean = (canonicalize or normalize_campaign_name)(df["campaign_name"].astype(str))
+            df = df.assign(campaign_name_clean=clean)
+        return self.aggregate_rows(df, ["campaign_name_clean", "date"])[DAILY_AGGREGATE_COLUMNS]
+
+    @staticmethod
+    def _partition(df, keys, shards):
+        """
+        Row positions grouped by shard (original order within a shard) and
+        shard boundaries. Groups of the highest-cardinality key are packed
+        greedily so shards have similar row counts.
+        """
+        categorical = [k for k in keys if isinstance(df[k].dtype, pd.CategoricalDtype)]
+        if categorical:
+            key = max(categorical, key=lambda k: len(df[k].cat.categories))
+            codes = df[key].cat.codes.to_numpy()
+        else:
+            codes = pd.factorize(df[keys[0]])[0]
+        sizes = np.bincount(codes[codes >= 0], minlength=codes.max() + 1)
+
+        # Largest groups first, each to the currently lightest shard
+        shard_of = np.zeros(len(sizes), dtype=np.int64)
+        load = np.zeros(shards, dtype=np.int64)
+        for group in np.argsort(-sizes, kind="stable"):
+            target = int(np.argmin(load))
+            shard_of[group] = target
+            load[target] += sizes[group]
+
+        # Rows with a missing key are dropped by groupby anyway
+        valid = np.flatnonzero(codes >= 0)
+        row_shard = shard_of[codes[valid]]
+        positions = valid[np.argsort(row_shard, kind="stable")]
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(row_shard, minlength=shards))))
+        return positions.astype(np.int64), bounds
@@ -0,0 +1,254 @@
+import json
+import numpy as np
+import pandas as pd
+from src.utils.config_utils import get_config_value
+from src.utils.data_utils import fold_campaign_name
+
+TREND_METRICS = ["roas", "ctr", "spend", "revenue"]
+
+
+def estimate_tokens(payload) -> int:
+    """Rough token estimate (~4 chars per token) for a JSON-serializable payload."""
+    text = payload if isinstance(payload, str) else json.dumps(payload, separators=(",", ":"))
+    return len(text) // 4 + 1
+
+
+def _slope_per_day(dates: pd.Series, values: pd.Series) -> float:
+    """Least-squares slope of values against day offset."""
+    if len(values) < 2:
+        return 0.0
+    x = (dates - dates.min()).dt.days.to_numpy(dtype=float)
+    y = values.to_numpy(dtype=float)
+    if np.ptp(x) == 0:
+        return 0.0
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def _pct_change(current: float, previous: float):
+    if not previous:
+        return None
+    return round((current - previous) / abs(previous), 3)
+
+
+def summarize_campaign_trend(df: pd.DataFrame, anomaly_z: float = 2.0, top_bottom_days: int = 2) -> dict:
+    """
+    Compress one campaign's daily rows into trend statistics:
+    slope per metric, week-over-week deltas, z-score anomalies and top/bottom ROAS days.
+    """
+    df = df.sort_values("date")
+    end_date = df["date"].max()
+    last_week = df[df["date"] > end_date - pd.Timedelta(days=7)]
+    prev_week = df[(df["date"] <= end_date - pd.Timedelta(days=7)) &
+                   (df["date"] > end_date - pd.Timedelta(days=14))]
+
+    summary = {
+        "days": int(df["date"].nunique()),
+        "slope_per_day": {},
+        "week_over_week": {},
+    }
+    # Without a threshold (DataAgent already sent indexed metric_events) no z-scores are scanned
+    if anomaly_z:
+        summary["anomalies"] = []
+
+    for metric in TREND_METRICS:
+        if metric not in df.columns:
+            continue
+        summary["slope_per_day"][metric] = round(_slope_per_day(df["date"], df[metric]), 4)
+
+        # Sums for volume metrics, means for ratios
+        agg = "sum" if metric in ("spend", "revenue") else "mean"
+        if not last_week.empty and not prev_week.empty:
+            summary["week_over_week"][metric] = _pct_change(
+                last_week[metric].agg(agg), prev_week[metric].agg(agg)
+            )
+
+        std = df[metric].std() if anomaly_z else None
+        if std and not np.isnan(std):
+            z = (df[metric] - df[metric].mean()) / std
+            for _, row in df[z.abs() >= anomaly_z].iterrows():
+                summary["anomalies"].append({
+                    "date": row["date"].strftime("%Y-%m-%d"),
+                    "metric": metric,
+                    "value": round(float(row[metric]), 4),
+                    "z": round(float(z[row.name]), 2),
+                })
+
+    if "roas" in df.columns and top_bottom_days:
+        ranked = df.sort_values("roas", ascending=False)
+        summary["top_roas_days"] = _day_records(ranked.head(top_bottom_days))
+        summary["bottom_roas_days"] = _day_records(ranked.tail(top_bottom_days).iloc[::-1])
+
+    return summary
+
+
+def _day_records(df: pd.DataFrame) -> list:
+    return [
+        {"date": row["date"].strftime("%Y-%m-%d"), "roas": round(float(row["roas"]), 2),
+         "spend": round(float(row["spend"]), 2)}
+        for _, row in df.iterrows()
+    ]
+
+
+def summarize_daily_trends(daily_trends: list, anomaly_z: float = 2.0, top_bottom_days: int = 2) -> dict:
+    """Turn DataAgent `daily_trends` records into {campaign: trend statistics}."""
+    if not daily_trends:
+        return {}
+    df = pd.DataFrame(daily_trends)
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df = df.dropna(subset=["date"])
+
+    # Campaigns with the most spend first, so budget trimming drops the long tail
+    grouped = df.groupby("campaign_name_clean", observed=True, sort=False)
+    order = grouped["spend"].sum().sort_values(ascending=False, kind="stable").index
+    frames = dict(iter(grouped))
+    return {
+        campaign: summarize_campaign_trend(frames[campaign], anomaly_z=anomaly_z, top_bottom_days=top_bottom_days)
+        for campaign in order
+    }
+
+
+def _strongest_per_metric(events: list) -> list:
+    strongest = {}
+    for event in events:
+        best = strongest.get(event["metric"])
+        if best is None or abs(event["z"]) > abs(best["z"]):
+            strongest[event["metric"]] = event
+    return list(strongest.values())
+
+
+def _fit_to_budget(payload: dict, token_budget: int) -> dict:
+    """
+    Progressively drop detail until the payload fits the token budget.
+    Only trend_summary and metric_events are trimmed: when the remaining
+    fields (campaign summaries, segments) exceed the budget on their own,
+    the payload stays over it.
+    """
+    trends = payload["trend_summary"]
+    events = payload.get("metric_events") or {}
+
+    def fits():
+        return estimate_tokens(payload) <= token_budget
+
+    # 1. Keep only the strongest anomaly / event per metric
+    if not fits():
+        for stats in trends.values():
+            if "anomalies" in stats:
+                stats["anomalies"] = _strongest_per_metric(stats["anomalies"])
+        for campaign in events:
+            events[campaign] = _strongest_per_metric(events[campaign])
+
+    # 2. Drop top/bottom day lists
+    if not fits():
+        for stats in trends.values():
+            stats.pop("top_roas_days", None)
+            stats.pop("bottom_roas_days", None)
+
+    # 3. Drop lowest-spend campaigns (trend_summary is ordered by spend)
+    while not fits() and len(trends) > 1:
+        events.pop(trends.popitem()[0], None)
+        payload["trend_summary_truncated"] = True
+
+    # 4. Last campaign left: keep only its slopes and week-over-week deltas
+    if not fits():
+        for stats in trends.values():
+            stats.pop("anomalies", None)
+        events.clear()
+        payload["trend_summary_truncated"] = True
+
+    return payload
+
+
+def build_llm_payload(data_output: dict, token_budget: int = None) -> dict:
+    """
+    Compact DataAgent output for LLM prompts: `daily_trends` is replaced by
+    per-campaign `trend_summary` statistics trimmed to a token budget.
+    The full trend table stays in the DataAgent output saved to /reports.
+    """
+    if not isinstance(data_output, dict) or "daily_trends" not in data_output:
+        return data_output
+
+    token_budget = token_budget or get_config_value("llm_payload", "token_budget", 3000)
+    anomaly_z = get_config_value("llm_payload", "anomaly_z", 2.0)
+    top_bottom_days = get_config_value("llm_payload", "top_bottom_days", 2)
+
+    payload = {k: v for k, v in data_output.items() if k != "daily_trends"}
+    if "metric_events" in data_output:
+        # Indexed against each campaign's full history; no need to rescan the window
+        payload["metric_events"] = {c: list(e) for c, e in data_output["metric_events"].items()}
+        anomaly_z = None
+    payload["trend_summary"] = summarize_daily_trends(
+        data_output["daily_trends"], anomaly_z=anomaly_z, top_bottom_days=top_bottom_days
+    )
+    return _fit_to_budget(payload, token_budget)
+
+
+def build_campaign_payloads(data_output: dict, min_campaigns: int = 2, token_budget: int = None) -> dict:
+    """
+    {campaign: compact payload for that campaign alone}, for map-reduce
+    insight generation over a multi-campaign comparison. Each payload has
+    the shape of build_llm_payload's output and its own token budget.
+    Empty unless the output compares at least `min_campaigns` campaigns.
+    """
+    summaries = data_output.get("campaign_summaries") if isinstance(data_output, dict) else None
+    if (not isinstance(summaries, dict) or len(summaries) < min_campaigns
+            or not all(isinstance(v, dict) for v in summaries.values())):
+        return {}
+
+    token_budget = token_budget or get_config_value("llm_payload", "token_budget", 3000)
+    events = data_output.get("metric_events")
+    trends = summarize_daily_trends(
+        data_output.get("daily_trends") or [],
+        anomaly_z=None if events is not None else get_config_value("llm_payload", "anomaly_z", 2.0),
+        top_bottom_days=get_config_value("llm_payload", "top_bottom_days", 2),
+    )
+    # Highest-spend campaigns first
+    ordered = sorted(summaries, key=lambda c: -(summaries[c].get("total_spend") or 0))
+    return {
+        campaign: _fit_to_budget({
+            "campaigns_requested": [campaign],
+            "date_range": data_output.get("date_range"),
+            "campaign_summaries": summaries[campaign],
+            "trend_summary": {campaign: trends[campaign]} if campaign in trends else {},
+            **({"metric_events": {campaign: list(events.get(campaign, []))}} if events is not None else {}),
+        }, token_budget)
+        for campaign in ordered
+    }
+
+
+def _match_campaign(name, campaigns):
+    """The campaign key `name` refers to (folded exact match, else a unique containment match)."""
+    if not isinstance(name, str) or not name:
+        return None
+    folded = {fold_campaign_name(c): c for c in campaigns}
+    clean = fold_campaign_name(name)
+    if clean in folded:
+        return folded[clean]
+    matches = [c for f, c in folded.items() if clean in f or f in clean]
+    return matches[0] if len(matches) == 1 else None
+
+
+def campaign_slice(payload: dict, campaign) -> dict:
+    """
+    The part of a build_llm_payload payload about one campaign: its summary,
+    trend statistics and metric events. The payload itself when it covers
+    a single campaign or `campaign` cannot be matched to one of its campaigns.
+    """
+    if not isinstance(payload, dict):
+        return payload
+    trends = payload.get("trend_summary") or {}
+    summaries = payload.get("campaign_summaries")
+    per_campaign = isinstance(summaries, dict) and summaries and all(isinstance(v, dict) for v in summaries.values())
+    if len(trends) <= 1 and not per_campaign:
+        return payload
+    key = _match_campaign(campaign, list(trends) + (list(summaries) if per_campaign else []))
+    if key is None:
+        return payload
+
+    events = payload.get("metric_events")
+    return {
+        "campaigns_requested": [key],
+        "date_range": payload.get("date_range"),
+        "campaign_summaries": summaries.get(key) if per_campaign else summaries,
+        "trend_summary": {key: trends[key]} if key in trends else {},
+        **({"metric_events": {key: events.get(key, [])}} if events is not None else {}),
+    }
@@ -0,0 +1,135 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_current_tracer = contextvars.ContextVar("current_tracer", default=None)
+
+
+def peak_memory_mb():
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if os.uname().sysname == "Darwin" else 1024), 1)
+
+
+class Span:
+    """One timed operation; attributes can be added while it is open."""
+
+    def __init__(self, name, category, attrs):
+        self.name = name
+        self.category = category
+        self.attrs = dict(attrs)
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """
+    Collects spans for one pipeline run and exports them as a Chrome trace
+    (chrome://tracing, Perfetto). Spans from worker threads land on their
+    own track.
+    """
+
+    def __init__(self, name="run"):
+        self.name = name
+        self.events = []
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def span(self, name, category="pipeline", **attrs):
+        span = Span(name, category, attrs)
+        start = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            span.set(error=str(e))
+            raise
+        finally:
+            end = time.perf_counter()
+            span.set(peak_memory_mb=peak_memory_mb())
+            self._record(span, start, end)
+
+    def _record(self, span, start, end):
+        thread = threading.current_thread()
+        with self._lock:
+            self._threads.setdefault(thread.ident, thread.name)
+            self.events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round((start - self._t0) * 1e6, 1),
+                "dur": round((end - start) * 1e6, 1),
+                "pid": os.getpid(),
+                "tid": thread.ident,
+                "args": span.attrs,
+            })
+
+    def summary(self) -> dict:
+        """Total time and call count per span name, slowest first."""
+        totals = {}
+        with self._lock:
+            for event in self.events:
+                entry = totals.setdefault(event["name"], {"count": 0, "total_ms": 0.0})
+                entry["count"] += 1
+                entry["total_ms"] += event["dur"] / 1000
+        return {
+            name: {"count": t["count"], "total_ms": round(t["total_ms"], 2)}
+            for name, t in sorted(totals.items(), key=lambda kv: -kv[1]["total_ms"])
+        }
+
+    def to_chrome_trace(self) -> dict:
+        with self._lock:
+            events = sorted(self.events, key=lambda e: e["ts"])
+            thread_names = [
+                {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                for tid, name in self._threads.items()
+            ]
+        return {
+            "traceEvents": thread_names + events,
+            "displayTimeUnit": "ms",
+            "otherData": {"run": self.name, "summary": self.summary()},
+        }
+
+    def export(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+        return path
+
+
+def current_tracer():
+    return _current_tracer.get()
+
+
+@contextmanager
+def use_tracer(tracer):
+    """Make `tracer` the target of span() calls in this context (and tasks copied from it)."""
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+
+@contextmanager
+def span(name, category="pipeline", **attrs):
+    """Record a span on the current tracer; a no-op outside a traced run."""
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield Span(name, category, attrs)
+        return
+    with tracer.span(name, category, **attrs) as s:
+        yield s
@@ -0,0 +1,34 @@
+import pandas as pd
+from src.utils.aggregation import aggregate_performance
+
+ROWS = pd.DataFrame({
+    "campaign_name": ["A", "A", "B", "B", "B"],
+    "campaign_name_clean": ["a", "a", "b", "b", "b"],
+    "platform": ["Facebook", "Instagram", "Facebook", "Facebook", "Instagram"],
+    "date": pd.to_datetime(["2025-01-01", "2025-01-02", "2025-01-01", "2025-01-01", "2025-01-02"]),
+    "spend": [10.0, 30.0, 5.0, 7.0, 1.0],
+    "revenue": [20.0, 15.0, 50.0, 10.0, 3.0],
+    "roas": [2.0, 0.5, 10.0, 1.43, 3.0],
+    "ctr": [0.01, 0.02, 0.03, 0.01, 0.02],
+    "clicks": [1.0, 2.0, 3.0, 4.0, 5.0],
+    "impressions": [100, 200, 300, 400, 500],
+    "purchases": [1, 0, 2, 1, 0],
+})
+
+
+def test_campaign_aggregates_match_per_group_computation():
+    result = aggregate_performance(ROWS)
+
+    assert result["summaries"]["b"]["total_spend"] == 13.0
+    assert result["summaries"]["a"]["total_clicks"] == 3
+    assert result["peak_spend_days"]["a"]["spend"] == 30.0
+    assert result["peak_revenue_days"]["b"]["date"] == "2025-01-01 00:00:00"
+    day_one_b = [r for r in result["daily_trends"] if r["campaign_name_clean"] == "b" and r["date"] == "2025-01-01"]
+    assert day_one_b[0]["spend"] == 12.0
+
+
+def test_extra_grouping_dimensions():
+    result = aggregate_performance(ROWS, ["campaign_name_clean", "platform"])
+
+    assert set(result["summaries"]) == {"a | Facebook", "a | Instagram", "b | Facebook", "b | Instagram"}
+    assert result["summaries"]["b | Facebook"]["total_revenue"] == 60.0
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from src.utils.anomaly_index import AnomalyIndex
+from src.utils.summary_utils import build_llm_payload
+
+
+def _daily(days=40):
+    rng = np.random.default_rng(0)
+    rows = []
+    for campaign in ("steady", "dropping"):
+        for day in range(days):
+            roas = 3.0 + rng.normal(0, 0.05) - (1.5 if campaign == "dropping" and day >= 25 else 0)
+            spend = 100 + rng.normal(0, 2) + (300 if campaign == "steady" and day == 30 else 0)
+            rows.append({
+                "campaign_name_clean": campaign, "date": pd.Timestamp("2025-01-01") + pd.Timedelta(days=day),
+                "spend": spend, "revenue": spend * roas, "roas_sum": roas, "roas_n": 1, "ctr_sum": 0.02, "ctr_n": 1,
+            })
+    return pd.DataFrame(rows)
+
+
+def test_index_finds_level_shift_and_spike():
+    index = AnomalyIndex.build(_daily())
+
+    shifts = [e for e in index.lookup("dropping") if e["type"] == "change_point" and e["metric"] == "roas"]
+    assert [(e["date"], e["change_pct"] < -0.4) for e in shifts] == [("2025-01-26", True)]
+    spikes = index.lookup("steady", start="2025-01-31", end="2025-01-31", metrics=["spend"])
+    assert [(e["type"], e["z"] > 10) for e in spikes] == [("anomaly", True)]
+    assert index.lookup("steady", start="2025-02-20") == []
+
+
+def test_index_is_persisted_and_rebuilt_when_source_changes(tmp_path):
+    source = tmp_path / "ads.csv"
+    source.write_text("campaign_name,date\n", encoding="utf-8")
+    built = AnomalyIndex.for_dataset(_daily(), str(source), str(tmp_path))
+    # A stored index is served without the daily table
+    assert AnomalyIndex.for_dataset(None, str(source), str(tmp_path)).events == built.events
+
+    source.write_text("campaign_name,date\nx,2025-01-01\n", encoding="utf-8")
+    assert AnomalyIndex.for_dataset(None, str(source), str(tmp_path)).events == {}
+
+
+def test_payload_uses_indexed_events_instead_of_window_scan():
+    index = AnomalyIndex.build(_daily())
+    data_output = {
+        "daily_trends": [{"date": "2025-02-01", "campaign_name_clean": "dropping", "spend": 1.0, "roas": 1.0}] * 3,
+        "metric_events": index.lookup_many(["dropping"], "2025-01-20", "2025-02-09", limit=3),
+    }
+    payload = build_llm_payload(data_output, token_budget=5000)
+    assert "anomalies" not in payload["trend_summary"]["dropping"]
+    assert len(payload["metric_events"]["dropping"]) == 3
@@ -0,0 +1,54 @@
+import json
+from src.orchestrator.batch import run_batch
+from src.orchestrator.run import AgentSuite
+from src.utils.llm import FakeLLM
+
+PLAN = {
+    "objective": "Compare campaigns",
+    "campaign_name": ["Men ComfortMax"],
+    "analysis_window_days": 14,
+    "agent_flow": ["data_agent", "insight_agent", "evaluator_agent", "creative_agent"],
+}
+HYPOTHESES = [{"hypothesis_id": "H1", "campaign": "men comfortmax launch", "hypothesis": "x"}]
+
+
+def fake_responder(prompt):
+    if "Planner Agent" in prompt:
+        return json.dumps(PLAN)
+    return json.dumps(HYPOTHESES)
+
+
+def test_batch_reuses_agents_and_writes_per_query_dirs(tmp_path, repo_cwd):
+    queries = tmp_path / "queries.jsonl"
+    queries.write_text(
+        '{"id": "a", "query": "Why did ROAS drop for men comfortmax in the last 14 days? Recommend creatives"}\n'
+        '{"query": "same again"}\n'
+        'not json\n'
+    )
+    llm = FakeLLM(responses=fake_responder)
+    agents = AgentSuite(llm=llm, cache_root=str(tmp_path / "cache"))
+
+    summary = run_batch(str(queries), output_root=str(tmp_path / "out"), max_concurrency=2, agents=agents)
+
+    assert summary["queries"] == 2 and summary["succeeded"] == 2
+    for query_dir in ("a", "q0002"):
+        assert (tmp_path / "out" / query_dir / "report.md").exists()
+        assert (tmp_path / "out" / query_dir / "creatives.json").exists()
+        assert (tmp_path / "out" / query_dir / "trace.json").exists()
+    # "a" is planned locally; "same again" needs the LLM planner
+    with open(tmp_path / "out" / "a" / "planner_output.json", encoding="utf-8") as f:
+        assert json.load(f)["planned_by"] == "rules"
+    # insight + evaluator + creative per query, plus one planner call
+    assert llm.calls == 7
+
+
+def test_duplicate_ids_get_separate_report_dirs(tmp_path, repo_cwd):
+    queries = tmp_path / "queries.jsonl"
+    queries.write_text('{"id": "a b", "query": "same again"}\n{"id": "a_b", "query": "same again"}\n')
+
+    summary = run_batch(str(queries), output_root=str(tmp_path / "out"), max_concurrency=2,
+                        agents=AgentSuite(llm=FakeLLM(responses=fake_responder), cache_root=str(tmp_path / "cache")))
+
+    dirs = [r["report_dir"] for r in summary["results"]]
+    assert dirs == [str(tmp_path / "out" / "a_b"), str(tmp_path / "out" / "a_b_2")]
+    assert all((tmp_path / "out" / d / "report.md").exists() for d in ("a_b", "a_b_2"))
@@ -0,0 +1,23 @@
+from src.benchmarks.run_benchmarks import run_benchmarks
+from src.benchmarks.synthetic_data import COLUMNS, write_synthetic_csv
+
+
+def test_synthetic_data_is_deterministic_and_matches_schema(tmp_path):
+    first = write_synthetic_csv(str(tmp_path / "a.csv"), 1200, seed=7, chunk_rows=500)
+    second = write_synthetic_csv(str(tmp_path / "b.csv"), 1200, seed=7, chunk_rows=500)
+
+    content = open(first).read()
+    assert content == open(second).read()
+    assert content.splitlines()[0] == ",".join(COLUMNS)
+    assert len(content.splitlines()) == 1201
+
+
+def test_benchmarks_report_latency_and_memory(tmp_path, repo_cwd):
+    report = run_benchmarks(sizes=["2000"], iterations=2, data_root=str(tmp_path))
+
+    results = {r["name"]: r for r in report["2000"]}
+    assert {"data_filter", "data_agent_run", "llm_payload_build"} <= set(results)
+    assert any(name.startswith("orchestrator_end_to_end") for name in results)
+    for result in results.values():
+        assert result["p50_ms"] <= result["p99_ms"]
+        assert result["peak_alloc_mb"] >= 0
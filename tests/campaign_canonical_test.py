@@ -0,0 +1,51 @@
+import pandas as pd
+from src.utils.campaign_canonical import CampaignCanonicalizer, edit_distance
+from src.utils.campaign_index import CampaignIndex
+from src.utils.data_utils import fold_campaign_name
+
+NAMES = pd.Series([
+    "Men ComfortMax Launch", "Men ComfortMax Launch", "Men ComfortMax Launch",
+    "men-comfortmax_launch", "MEN | COMFORTMAX  LAUNCH", "Men ComfortMx Launch",
+    "Women ComfortMax Launch", "Women Fit & Lift", "women fit and lift",
+    "Summer Sale 2024", "Summer Sale 2025",
+])
+
+
+def test_fold_campaign_name():
+    assert fold_campaign_name("  Women_Fit & Lift!! ") == "women fit and lift"
+    assert fold_campaign_name("Été  |  Basics") == "ete basics"
+    assert edit_distance("comfortmax", "comfortmx", 1) == 1
+    assert edit_distance("comfortmax", "comfort", 1) == 2
+
+
+def test_variants_cluster_without_merging_distinct_campaigns(tmp_path):
+    canonicalizer = CampaignCanonicalizer(str(tmp_path / "table.json"), max_edits=1)
+    clean = canonicalizer.canonicalize(NAMES)
+
+    assert set(clean[:6]) == {"men comfortmax launch"}  # separators, case and a typo
+    assert clean[6] == "women comfortmax launch"        # men / women stay apart
+    assert clean[7] == clean[8] == "women fit and lift"
+    assert clean[9] != clean[10]                        # differing digits never merge
+    assert canonicalizer.canonical_id("MEN-COMFORTMAX-LAUNCH") == canonicalizer.canonical_id("Men ComfortMx Launch")
+
+
+def test_assignments_are_stable_across_runs(tmp_path):
+    path = str(tmp_path / "table.json")
+    first = CampaignCanonicalizer(path, max_edits=1)
+    first.canonicalize(NAMES)
+    ids = dict(first.aliases)
+
+    # A reloaded table keeps every ID, and a typo first seen later joins its cluster
+    second = CampaignCanonicalizer(path, max_edits=1)
+    assert second.resolve("Womn Fit and Lift") == "women fit and lift"
+    assert {name: second.aliases[name] for name in ids} == ids
+
+
+def test_index_resolves_typos_and_suggests(tmp_path):
+    clean = CampaignCanonicalizer(max_edits=1).canonicalize(NAMES)
+    index = CampaignIndex(clean)
+
+    assert [index.names[c] for c in index.match(["Men-ComfortMax"])] == ["men comfortmax launch"]
+    assert [index.names[c] for c in index.match(["Womn Fit and Lift"])] == ["women fit and lift"]
+    assert index.match(["nothing like it"]) == []
+    assert "women fit and lift" in index.suggest(["fit lifts"])
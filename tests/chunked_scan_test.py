@@ -0,0 +1,71 @@
+import json
+import pytest
+from src.agents.data_agent import DataAgent
+from src.benchmarks.synthetic_data import write_synthetic_csv
+from src.utils.result_cache import ResultCache
+
+PLANS = [
+    {},
+    {"campaign_name": ["men comfortmax"], "analysis_window_days": 14},
+    {"campaign_name": ["women cloudsoft", "men seamfree"], "analysis_window_days": 30,
+     "breakdown_by": ["platform", "country"]},
+    {"breakdown_by": "creative_type"},
+]
+
+
+def _rounded(output):
+    """JSON round trip with floats rounded, so summation order does not matter."""
+    def fix(value):
+        if isinstance(value, float):
+            return round(value, 6)
+        if isinstance(value, dict):
+            return {k: fix(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [fix(v) for v in value]
+        return value
+    return fix(json.loads(json.dumps(output, default=str)))
+
+
+@pytest.fixture
+def agents(tmp_path):
+    path = write_synthetic_csv(str(tmp_path / "ads.csv"), 3000, seed=3, chunk_rows=1000)
+    # One campaign table per dataset, as in production; separate result caches
+    # so the streaming agent never answers from the in-memory agent's results
+    campaigns = str(tmp_path / "campaigns")
+    in_memory = DataAgent(path, cache_root=str(tmp_path / "mem"), aggregate_root=str(tmp_path / "mem"),
+                          canonical_root=campaigns, result_cache=ResultCache(str(tmp_path / "mem_results")),
+                          streaming=False)
+    streaming = DataAgent(path, cache_root=str(tmp_path / "st"), aggregate_root=str(tmp_path / "st"),
+                          canonical_root=campaigns, result_cache=ResultCache(str(tmp_path / "st_results")),
+                          streaming=True, chunk_rows=400)
+    return in_memory, streaming
+
+
+@pytest.mark.parametrize("plan", PLANS)
+def test_streaming_mode_matches_in_memory(agents, plan):
+    in_memory, streaming = agents
+    assert streaming.data is None
+    assert _rounded(streaming.run(plan)) == _rounded(in_memory.run(plan))
+
+
+def test_streaming_filter_pushes_predicates_into_the_scan(agents):
+    in_memory, streaming = agents
+    expected, _ = in_memory.filter_campaign_data(["men comfortmax"], 7)
+    scanned, suggestions = streaming.filter_campaign_data(["men comfortmax"], 7)
+
+    assert suggestions is None
+    assert len(scanned) == len(expected)
+    assert scanned["spend"].sum() == pytest.approx(expected["spend"].sum())
+    assert streaming.filter_campaign_data(["no such campaign"])[0].empty
+
+
+@pytest.mark.parametrize("body", ["", ",2025-03-01,1,1,1,1,1,1,1\nmen comfortmax,not a date,1,1,1,1,1,1,1\n"])
+def test_streaming_agent_builds_without_valid_rows(tmp_path, body):
+    path = tmp_path / "ads.csv"
+    path.write_text("campaign_name,date,spend,revenue,clicks,impressions,purchases,roas,ctr\n" + body)
+    root = str(tmp_path / "cache")
+    agent = DataAgent(str(path), cache_root=root, aggregate_root=root, canonical_root=root,
+                      result_cache=False, streaming=True)
+
+    assert agent.daily.empty
+    assert agent.run({"analysis_window_days": 14})["error"] == "No matching campaign data found."
@@ -0,0 +1,18 @@
+import os
+import pytest
+from src.utils import llm
+
+
+@pytest.fixture
+def repo_cwd(monkeypatch, tmp_path):
+    """
+    Run from the repo root (prompts/, data/), with the process-wide LLM cache
+    under tmp_path, and drop agent logs written by the test.
+    """
+    monkeypatch.chdir(os.path.join(os.path.dirname(__file__), ".."))
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path / "llm_cache"))
+    monkeypatch.setattr(llm, "_default_cache", None)
+    before = set(os.listdir("logs")) if os.path.isdir("logs") else set()
+    yield
+    for name in set(os.listdir("logs")) - before:
+        os.remove(os.path.join("logs", name))
@@ -0,0 +1,61 @@
+import json
+from src.agents.creative_agent import CreativeAgent
+from src.utils.llm import FakeLLM
+from src.utils.result_cache import ResultCache
+
+PAYLOAD = {
+    "date_range": "2025-03-01 to 2025-03-14",
+    "campaign_summaries": {"alpha launch": {"total_spend": 100.0}, "beta sale": {"total_spend": 50.0}},
+    "trend_summary": {"alpha launch": {"days": 14}, "beta sale": {"days": 14}},
+}
+HYPOTHESES = [
+    {"hypothesis_id": "H1", "campaign": "alpha launch", "hypothesis": "CTR fell from creative fatigue"},
+    {"hypothesis_id": "H2", "campaign": "Beta Sale", "hypothesis": "ROAS fell after a price change"},
+    {"hypothesis_id": "H3", "campaign": "beta sale", "hypothesis": "Spend shifted to broad audiences"},
+]
+COPY = {
+    "CTR fell": ["Feel the difference — 20% off today!", "Comfort that lasts all day"],
+    "ROAS fell": ["feel the difference: 20% off today", "Back in stock in every size"],
+    "Spend shifted": ["Comfort that lasts all day.", "FEEL THE DIFFERENCE, 20% OFF TODAY"],
+}
+
+
+def _respond(prompt):
+    context = json.loads(prompt.rsplit("context:\n", 1)[1])
+    text = context["validated_insights"][0]["hypothesis"]
+    copy = next(lines for marker, lines in COPY.items() if marker in text)
+    campaigns = list(context["campaign_performance"]["trend_summary"])
+    return json.dumps([{"campaign": campaigns[0], "problem_summary": text, "ad_copy_suggestions": copy}])
+
+
+def test_fan_out_runs_concurrently_on_campaign_slices_and_dedupes(tmp_path):
+    llm = FakeLLM(responses=_respond, latency_sec=0.1)
+    agent = CreativeAgent(llm=llm, max_concurrency=2, cache=False)
+    streamed = []
+
+    output = agent.run("Fix ROAS", HYPOTHESES, PAYLOAD, on_item=streamed.append)
+    # Calls overlap, capped at max_concurrency
+    assert llm.max_in_flight == 2
+    assert llm.calls == 3
+
+    # Each call saw only its own campaign; H3's copy duplicated earlier copy, so it is dropped
+    assert [(r["hypothesis_id"], r["campaign"]) for r in output] == [("H1", "alpha launch"), ("H2", "beta sale")]
+    assert output[1]["ad_copy_suggestions"] == ["Back in stock in every size"]
+    assert streamed == output
+
+
+def test_creatives_are_cached_per_campaign_and_hypothesis(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    first = CreativeAgent(llm=FakeLLM(responses=_respond), cache=cache)
+    first.run("Fix ROAS", HYPOTHESES, PAYLOAD)
+
+    # Same hypotheses renumbered: served from the cache, ids follow the new numbering
+    llm = FakeLLM(responses=_respond)
+    renumbered = [dict(h, hypothesis_id=f"N{i}") for i, h in enumerate(HYPOTHESES, start=1)]
+    output = CreativeAgent(llm=llm, cache=cache).run("Fix ROAS", renumbered, PAYLOAD)
+    assert llm.calls == 0
+    assert [r["hypothesis_id"] for r in output] == ["N1", "N2"]  # N3 is still a duplicate
+
+
+def test_explicit_zero_dedup_threshold_is_kept():
+    assert CreativeAgent(llm=FakeLLM(), dedup_threshold=0.0, cache=False).dedup_threshold == 0.0
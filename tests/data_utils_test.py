@@ -0,0 +1,34 @@
+import pandas as pd
+from src.utils.data_utils import aggregate_daily_rows, ingest_rows, load_daily_aggregates
+
+HEADER = "campaign_name,date,spend,impressions,clicks,ctr,purchases,revenue,roas\n"
+HISTORY = (
+    "Men ComfortMax,2025-01-01,10,100,1,0.01,1,20,2.0\n"
+    "men  comfortmax,2025-01-01,30,100,2,0.02,0,30,1.0\n"
+    "Women FlexFit,2025-01-01,5,50,1,0.02,1,25,5.0\n"
+)
+NEW = (
+    "Men ComfortMax,2025-01-01,40,100,1,0.01,1,10,0.25\n"
+    "Women FlexFit,2025-01-02,8,80,2,0.025,1,24,3.0\n"
+)
+
+
+def test_ingest_matches_full_recompute(tmp_path):
+    source = tmp_path / "clean.csv"
+    source.write_text(HEADER + HISTORY)
+    new_rows = tmp_path / "new.csv"
+    new_rows.write_text(HEADER + NEW)
+
+    daily = ingest_rows(str(new_rows), str(source), cache_root=str(tmp_path / "agg"))
+
+    full = pd.read_csv(source, parse_dates=["date"])
+    expected = aggregate_daily_rows(full).sort_values(["date", "campaign_name_clean"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(daily, expected, check_dtype=False)
+
+    men = daily[daily["campaign_name_clean"] == "men comfortmax"].iloc[0]
+    assert men["rows"] == 3 and men["spend"] == 80
+    assert men["spend_max"] == 40 and men["revenue_max_campaign"] == "men  comfortmax"
+
+    # Persisted aggregates stay valid for the appended CSV
+    stored = load_daily_aggregates(str(source), cache_root=str(tmp_path / "agg"))
+    assert stored is not None and len(stored) == len(daily)
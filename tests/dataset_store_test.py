@@ -0,0 +1,31 @@
+import os
+import pandas as pd
+from src.utils.campaign_canonical import CampaignCanonicalizer
+from src.utils.dataset_store import ColumnarDatasetStore
+
+CSV = (
+    "campaign_name,date,spend,platform\n"
+    "Men  ComfortMax Launch,2025-01-02,10.5,Facebook\n"
+    "men comfortmax launch,2025-01-01,20.0,Instagram\n"
+)
+
+
+def test_cache_round_trip_and_invalidation(tmp_path):
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text(CSV)
+    canonicalizer = CampaignCanonicalizer.for_source(str(csv_path), root=str(tmp_path / "campaigns"))
+    store = ColumnarDatasetStore(str(csv_path), cache_root=str(tmp_path / "cache"), canonicalizer=canonicalizer)
+
+    built = store.load()
+    cached = store.load()
+
+    pd.testing.assert_frame_equal(built, cached)
+    assert list(cached["date"]) == sorted(cached["date"])
+    assert isinstance(cached["platform"].dtype, pd.CategoricalDtype)
+    assert cached["campaign_name_clean"].nunique() == 1
+
+    # Touch without changing content keeps the cache; new content rebuilds it
+    os.utime(csv_path, (0, 0))
+    assert len(store.load()) == 2
+    csv_path.write_text(CSV + "Women FlexFit,2025-01-03,5.0,Facebook\n")
+    assert len(store.load()) == 3
@@ -0,0 +1,75 @@
+import json
+from src.agents.evaluator_agent import EvaluatorAgent
+from src.utils.hypothesis_rules import HypothesisRuleValidator
+from src.utils.llm import FakeLLM
+
+THRESHOLDS = {"low_ctr": 0.01, "roas_drop_pct": 0.2, "min_impressions": 1000, "confidence_cutoff": 0.6}
+
+
+def _trends():
+    rows = []
+    for day in range(1, 15):
+        late = day > 7
+        rows.append({
+            "date": f"2025-03-{day:02d}", "campaign_name_clean": "men comfortmax launch",
+            "revenue": 1000.0, "spend": 100.0 + day,
+            "roas": (5.0 if late else 10.0) + (day % 3) * 0.1,
+            "ctr": 0.008 + (day % 2) * 0.0005,
+        })
+    return {"daily_trends": rows}
+
+
+def test_clear_cut_hypotheses_are_settled_locally():
+    hypotheses = [
+        {"hypothesis_id": "H1", "campaign": "Men ComfortMax Launch", "issue": "ROAS dropped sharply in the last week"},
+        {"hypothesis_id": "H2", "campaign": "men comfortmax launch", "issue": "ROAS increased after scaling"},
+        {"hypothesis_id": "H3", "campaign": "men comfortmax launch", "issue": "Low CTR suggests creative fatigue"},
+        {"hypothesis_id": "H4", "campaign": "men comfortmax launch", "issue": "Audience saturation"},
+    ]
+    local, escalated = HypothesisRuleValidator(THRESHOLDS).validate(hypotheses, _trends())
+
+    verdicts = {r["hypothesis_id"]: r["verdict"] for r in local}
+    assert verdicts == {"H1": "supported", "H2": "not supported", "H3": "supported"}
+    assert [h["hypothesis_id"] for h in escalated] == ["H4"]
+    assert local[0]["evidence"]["metric_changes"]["roas_change_pct"] < -20
+
+
+def test_evaluator_only_escalates_ambiguous_hypotheses():
+    llm = FakeLLM(responses=json.dumps([{"hypothesis_id": "H2", "verdict": "uncertain"}]))
+    agent = EvaluatorAgent(llm=llm)
+    hypotheses = [
+        {"hypothesis_id": "H1", "campaign": "men comfortmax launch", "issue": "ROAS declined"},
+        {"hypothesis_id": "H2", "campaign": "men comfortmax launch", "issue": "Audience saturation"},
+    ]
+
+    result = agent.run("why did roas drop", {"trend_summary": {}}, hypotheses, full_data_output=_trends())
+
+    assert [r["hypothesis_id"] for r in result] == ["H1", "H2"]
+    assert result[0]["validated_by"] == "rules"
+    assert llm.calls == 1
+
+
+def test_evaluator_skips_llm_when_everything_is_clear_cut():
+    llm = FakeLLM()
+    hypotheses = [{"hypothesis_id": "H1", "campaign": "men comfortmax launch", "issue": "ROAS declined"}]
+
+    EvaluatorAgent(llm=llm).run("x", {}, hypotheses, full_data_output=_trends())
+
+    assert llm.calls == 0
+
+
+def test_single_period_window_escalates_to_llm():
+    rows = [{"date": "2025-03-01", "campaign_name_clean": "men comfortmax launch",
+             "revenue": 1000.0, "spend": 100.0, "roas": 10.0, "ctr": 0.008}]
+    hypotheses = [
+        {"hypothesis_id": "H1", "campaign": "men comfortmax launch", "issue": "ROAS dropped sharply"},
+        {"hypothesis_id": "H2", "campaign": "men comfortmax launch", "issue": "Low CTR suggests fatigue"},
+    ]
+    local, escalated = HypothesisRuleValidator(THRESHOLDS).validate(hypotheses, {"daily_trends": rows})
+    assert local == []
+    assert [h["hypothesis_id"] for h in escalated] == ["H1", "H2"]
+
+    llm = FakeLLM(responses=json.dumps([{"hypothesis_id": "H1", "verdict": "uncertain"}]))
+    result = EvaluatorAgent(llm=llm).run("x", {}, hypotheses[:1], full_data_output={"daily_trends": rows})
+    assert result == [{"hypothesis_id": "H1", "verdict": "uncertain"}]
+    assert llm.calls == 1
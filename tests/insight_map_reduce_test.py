@@ -0,0 +1,64 @@
+import json
+from src.agents.insight_agent import InsightAgent
+from src.utils.llm import FakeLLM
+from src.utils.summary_utils import build_campaign_payloads
+
+
+def _data_output(n_campaigns, days=14):
+    campaigns = [f"campaign {i}" for i in range(n_campaigns)]
+    return {
+        "campaigns_requested": campaigns,
+        "date_range": "2025-03-01 to 2025-03-14",
+        "campaign_summaries": {c: {"total_spend": 100.0 * (i + 1), "avg_roas": 2.0} for i, c in enumerate(campaigns)},
+        "daily_trends": [
+            {"date": f"2025-03-{d + 1:02d}", "campaign_name_clean": c, "spend": 10.0 + i,
+             "revenue": 30.0 - d, "roas": 3.0 - d * 0.1, "ctr": 0.02}
+            for i, c in enumerate(campaigns) for d in range(days)
+        ],
+    }
+
+
+def _respond(reduce_response):
+    def respond(prompt):
+        if "Insight Reducer" in prompt:
+            return reduce_response
+        payload = json.loads(prompt.rsplit("📊 Data Summary Received:\n", 1)[1])
+        campaign = payload["campaigns_requested"][0]
+        level = "high" if campaign.endswith("1") else "low"
+        return json.dumps([{"hypothesis_id": "H1", "hypothesis": f"ROAS fell for {campaign}", "confidence_level": level}])
+    return respond
+
+
+def test_campaign_payloads_only_for_wide_comparisons():
+    assert build_campaign_payloads(_data_output(3), min_campaigns=4) == {}
+    payloads = build_campaign_payloads(_data_output(4), min_campaigns=4)
+    assert list(payloads) == ["campaign 3", "campaign 2", "campaign 1", "campaign 0"]
+    assert list(payloads["campaign 2"]["trend_summary"]) == ["campaign 2"]
+    assert payloads["campaign 2"]["campaign_summaries"]["total_spend"] == 300.0
+
+
+def test_map_calls_run_concurrently_and_reduce_ranks():
+    data_output = _data_output(12)
+    payloads = build_campaign_payloads(data_output, min_campaigns=4)
+    reduced = '[{"hypothesis_id": "H1", "hypothesis": "Merged", "campaign": "campaign 1"}]'
+    llm = FakeLLM(responses=_respond(reduced), latency_sec=0.1)
+    agent = InsightAgent(llm=llm, map_concurrency=4)
+
+    output = agent.run(data_output, "Compare campaigns", campaign_payloads=payloads)
+    # Map calls overlap, capped at map_concurrency
+    assert 1 < llm.max_in_flight <= 4
+    assert llm.calls == 13
+    assert output == json.loads(reduced)
+
+
+def test_local_ranking_when_reduce_fails():
+    data_output = _data_output(4)
+    payloads = build_campaign_payloads(data_output, min_campaigns=4)
+    agent = InsightAgent(llm=FakeLLM(responses=_respond("not json")), max_hypotheses=3)
+    streamed = []
+
+    output = agent.run(data_output, "Compare campaigns", on_item=streamed.append, campaign_payloads=payloads)
+    # High confidence first, then by campaign spend
+    assert [h["campaign"] for h in output] == ["campaign 1", "campaign 3", "campaign 2"]
+    assert [h["hypothesis_id"] for h in output] == ["H1", "H2", "H3"]
+    assert streamed == output
@@ -0,0 +1,40 @@
+import json
+from src.agents.planner_agent import PlannerAgent
+from src.utils.intent_parser import IntentParser
+from src.utils.llm import FakeLLM
+
+CAMPAIGNS = ["men bold colors drop", "men comfortmax launch", "women cotton classics", "women fit and lift"]
+
+
+def test_common_query_shapes_parse_locally():
+    parser = IntentParser(CAMPAIGNS)
+
+    plan, confidence = parser.parse("Compare Men ComfortMax and Women Fit & Lift over the last 2 weeks")
+    assert confidence == 1.0
+    assert plan["campaign_name"] == ["men comfortmax launch", "women fit and lift"]
+    assert plan["analysis_window_days"] == 14
+    assert plan["agent_flow"] == ["data_agent", "insight_agent"]
+
+    plan, confidence = parser.parse("Why did ROAS drop last month? Show it by platform and recommend creatives")
+    assert confidence == 1.0
+    assert plan["campaign_name"] is None  # "drop" is an intent word, not "men bold colors drop"
+    assert plan["analysis_window_days"] == 30
+    assert plan["metrics_focus"] == ["roas"] and plan["breakdown_by"] == ["platform"]
+    assert plan["agent_flow"] == ["data_agent", "insight_agent", "evaluator_agent", "creative_agent"]
+
+
+def test_unsure_queries_are_left_to_the_llm():
+    parser = IntentParser(CAMPAIGNS)
+    assert parser.parse("same again")[1] == 0.0                         # no intent
+    assert parser.parse("why did roas drop for women coton classics")[1] == 0.0  # misspelt campaign
+    assert parser.parse("summarize the Spring Promo experiment")[1] < 0.9
+
+
+def test_planner_falls_back_to_llm():
+    llm = FakeLLM(responses=lambda prompt: json.dumps({"objective": "llm plan"}))
+    planner = PlannerAgent(llm=llm, campaigns=lambda: CAMPAIGNS, use_rules=True)
+
+    assert planner.run("show spend for cotton classics last 7 days")["planned_by"] == "rules"
+    assert llm.calls == 0
+    assert planner.run("what about the other one?")["objective"] == "llm plan"
+    assert llm.calls == 1
@@ -0,0 +1,33 @@
+from src.utils.json_utils import IncrementalJSONParser, extract_json
+from src.utils.llm import FakeLLM
+
+RESPONSE = 'Here you go:\n```json\n[{"id": "H1", "text": "ROAS ] dropped {"}, {"id": "H2", "nested": [1, 2]}]\n```'
+
+
+def test_extract_json_handles_fences_and_brackets_in_strings():
+    assert extract_json(RESPONSE) == '[{"id": "H1", "text": "ROAS ] dropped {"}, {"id": "H2", "nested": [1, 2]}]'
+    assert extract_json('Plan: {"a": [1]} done', expect="object") == '{"a": [1]}'
+    assert extract_json('{"error": 1}', allow_fallback=True) == '{"error": 1}'
+    assert extract_json("no json here") == "no json here"
+
+
+def test_parser_emits_items_as_soon_as_they_close():
+    parser = IncrementalJSONParser()
+    emitted = []
+    for i in range(0, len(RESPONSE), 7):
+        emitted.append(parser.feed(RESPONSE[i:i + 7]))
+
+    flat = [item for batch in emitted for item in batch]
+    assert [item["id"] for item in flat] == ["H1", "H2"]
+    first_batch = next(i for i, batch in enumerate(emitted) if batch)
+    assert first_batch < len(emitted) - 3  # H1 arrived well before the stream ended
+    assert parser.result() == flat
+
+
+def test_streaming_call_invokes_callback_and_returns_full_text():
+    llm = FakeLLM(responses=RESPONSE, chunk_size=5)
+    items = []
+    text = llm.llm_call_streaming("prompt", on_item=items.append)
+
+    assert text == RESPONSE
+    assert [item["id"] for item in items] == ["H1", "H2"]
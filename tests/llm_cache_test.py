@@ -0,0 +1,54 @@
+import os
+import time
+from src.utils.llm import FakeLLM, LLMCache
+
+
+def test_repeated_prompt_is_served_from_cache(tmp_path):
+    cache = LLMCache(cache_dir=str(tmp_path))
+    llm = FakeLLM(responses='[{"hypothesis_id": "H1"}]', cache=cache, cache_mode="on")
+
+    first = llm.llm_call("why did roas drop?")
+    second = llm.llm_call("why did roas drop?")
+
+    assert first == second
+    assert llm.calls == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_key_includes_model_name(tmp_path):
+    cache = LLMCache(cache_dir=str(tmp_path))
+    FakeLLM(responses="a", model_name="m1", cache=cache, cache_mode="on").llm_call("p")
+    other = FakeLLM(responses="b", model_name="m2", cache=cache, cache_mode="on")
+
+    assert other.llm_call("p") == "b"
+    assert other.calls == 1
+
+
+def test_refresh_and_bypass_modes(tmp_path):
+    cache = LLMCache(cache_dir=str(tmp_path))
+    FakeLLM(responses="old", cache=cache, cache_mode="on").llm_call("p")
+
+    refreshed = FakeLLM(responses="new", cache=cache, cache_mode="refresh")
+    assert refreshed.llm_call("p") == "new"
+    assert cache.get("fake-llm", "p") == "new"
+
+    bypass = FakeLLM(responses="live", cache=cache, cache_mode="on")
+    assert bypass.llm_call("p", use_cache=False) == "live"
+    assert cache.get("fake-llm", "p") == "new"
+
+
+def test_ttl_and_size_eviction(tmp_path):
+    cache = LLMCache(cache_dir=str(tmp_path), max_entries=2, ttl_seconds=60)
+    for i in range(3):
+        cache.put("m", f"prompt-{i}", f"r{i}")
+        path = cache.disk.path(cache.make_key("m", f"prompt-{i}"))
+        os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))
+
+    cache.put("m", "prompt-3", "r3")
+    assert len(os.listdir(tmp_path)) == 2
+    assert cache.get("m", "prompt-0") is None
+
+    cache.ttl_seconds = 1e-9
+    assert cache.get("m", "prompt-3") is None
+    assert cache.stats()["evictions"] >= 3
@@ -0,0 +1,91 @@
+import threading
+import time
+import pytest
+from google.api_core import exceptions as google_exceptions
+from src.utils.llm import FakeLLM, LLMClientPool, TokenBucket
+
+
+def test_identical_inflight_prompts_are_coalesced():
+    pool = LLMClientPool(rate_per_minute=0, max_concurrency=8, max_retries=0)
+    llm = FakeLLM(responses="ok", latency_sec=0.2, pool=pool)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(llm.llm_call("same prompt"))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["ok"] * 5
+    assert llm.calls == 1
+    assert pool.stats()["coalesced"] == 4
+
+
+def test_transient_errors_are_retried():
+    pool = LLMClientPool(rate_per_minute=0, max_retries=3, base_delay_sec=0.01)
+    attempts = []
+
+    def flaky(timeout):
+        attempts.append(timeout)
+        if len(attempts) < 3:
+            raise google_exceptions.ResourceExhausted("429")
+        return "done"
+
+    assert pool.call("k", flaky) == "done"
+    assert len(attempts) == 3
+    assert pool.stats()["retries"] == 2
+
+
+def test_non_retryable_errors_and_exhausted_retries_raise():
+    pool = LLMClientPool(rate_per_minute=0, max_retries=1, base_delay_sec=0.01)
+
+    def bad_request(timeout):
+        raise google_exceptions.InvalidArgument("bad prompt")
+
+    def always_busy(timeout):
+        raise google_exceptions.ServiceUnavailable("503")
+
+    with pytest.raises(google_exceptions.InvalidArgument):
+        pool.call("a", bad_request)
+    with pytest.raises(google_exceptions.ServiceUnavailable):
+        pool.call("b", always_busy)
+    assert pool.stats()["failures"] == 1
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20, capacity=1)
+    start = time.monotonic()
+    for _ in range(5):
+        assert bucket.acquire()
+    assert time.monotonic() - start >= 0.15
+    drained = TokenBucket(rate=0.1, capacity=1)
+    drained.acquire()
+    assert drained.acquire(timeout=0.05) is False
+
+
+def test_slot_timeout_does_not_spend_a_rate_token():
+    pool = LLMClientPool(rate_per_minute=6, burst=1, max_concurrency=1, max_retries=0)
+    pool._slots.acquire()  # another call holds the only slot
+    try:
+        with pytest.raises(TimeoutError):
+            pool.call("k", lambda timeout: "never", timeout_sec=0.05)
+    finally:
+        pool._slots.release()
+    assert pool.bucket.tokens >= 0.99
+    assert pool.call("k", lambda timeout: "ok", timeout_sec=0.05) == "ok"
+
+
+def test_coalesced_waiter_keeps_its_own_timeout():
+    pool = LLMClientPool(rate_per_minute=0, max_concurrency=2, max_retries=0)
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: pool.call("same", lambda timeout: release.wait(30) and "ok"))
+    leader.start()
+    try:
+        while pool.stats()["requests"] == 0:
+            time.sleep(0.001)
+        with pytest.raises(TimeoutError):
+            pool.call("same", lambda timeout: "unused", timeout_sec=0.05)
+        assert pool.stats()["coalesced"] == 1
+    finally:
+        release.set()
+        leader.join()
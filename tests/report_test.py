@@ -0,0 +1,36 @@
+import csv
+import json
+from src.orchestrator.report import ReportWriter
+
+DATA = {
+    "campaigns_requested": ["men comfortmax"],
+    "date_range": "2025-03-01 to 2025-03-02",
+    "campaign_summaries": {"total_spend": 30.0, "avg_roas": 2.5},
+    "peak_spend_day": {"date": "2025-03-02 00:00:00", "campaign_name": "Men ComfortMax", "spend": 20.0},
+    "daily_trends": [
+        {"date": "2025-03-01", "campaign_name_clean": "men comfortmax launch", "spend": 10.0, "roas": 2.0},
+        {"date": "2025-03-02", "campaign_name_clean": "men comfortmax launch", "spend": 20.0, "roas": 3.0},
+    ],
+}
+
+
+def test_sections_are_written_incrementally_and_tables_once(tmp_path):
+    report = ReportWriter(str(tmp_path), "why did roas drop")
+    report.add("planner", {"objective": "Explain ROAS", "agent_flow": ["data_agent", "insight_agent"]})
+    report.add("data", DATA)
+
+    # The section is on disk before the run finishes
+    markdown = (tmp_path / "report.md").read_text(encoding="utf-8")
+    assert "## 📊 Data Summary" in markdown and "```json" not in markdown
+    assert "2 rows in [data_daily_trends.csv]" in markdown
+
+    stored = json.loads((tmp_path / "data_output.json").read_text(encoding="utf-8"))
+    assert stored["daily_trends"] == {"table": "data_daily_trends.csv", "rows": 2}
+    with open(tmp_path / "data_daily_trends.csv", encoding="utf-8") as f:
+        assert [row["spend"] for row in csv.DictReader(f)] == ["10.0", "20.0"]
+
+    report.add("evaluator", [{"hypothesis_id": "H1", "verdict": "supported", "justification": "a | b"}])
+    report.close()
+    manifest = json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8"))
+    assert list(manifest["sections"]) == ["planner", "data", "evaluator"]
+    assert "| H1 | supported |  | a \\| b |" in (tmp_path / "report.md").read_text(encoding="utf-8")
@@ -0,0 +1,41 @@
+import pandas as pd
+from src.agents.data_agent import DataAgent
+from src.benchmarks.synthetic_data import write_synthetic_csv
+from src.utils.result_cache import ResultCache
+
+
+def test_two_level_lru(tmp_path):
+    cache = ResultCache(str(tmp_path), memory_entries=1, disk_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, {"key": key})
+
+    assert cache.get("c") == {"key": "c"}  # memory
+    assert cache.get("b") == {"key": "b"}  # disk, promoted to memory
+    assert cache.get("a") is None          # evicted from both levels
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["memory_evictions"] == 3 and stats["disk_evictions"] == 1
+
+    # A new process (fresh memory level) still hits on disk
+    assert ResultCache(str(tmp_path)).get("c") == {"key": "c"}
+
+
+def test_data_agent_memoizes_equivalent_requests(tmp_path):
+    path = write_synthetic_csv(str(tmp_path / "ads.csv"), 2000, seed=5, chunk_rows=1000)
+    cache = ResultCache(str(tmp_path / "results"))
+    agent = DataAgent(path, cache_root=str(tmp_path / "c"), aggregate_root=str(tmp_path / "c"),
+                      canonical_root=str(tmp_path / "c"), result_cache=cache)
+
+    first = agent.run({"campaign_name": ["Men ComfortMax", "women cloudsoft"], "analysis_window_days": 14})
+    again = agent.run({"campaign_name": ["women-cloudsoft", "men comfortmax"], "analysis_window_days": 14})
+    assert cache.stats()["memory_hits"] == 1
+    assert again["campaigns_requested"] == ["women-cloudsoft", "men comfortmax"]
+    assert {k: v for k, v in again.items() if k != "campaigns_requested"} == \
+        {k: v for k, v in first.items() if k != "campaigns_requested"}
+
+    # Ingesting rows changes the dataset version, so the result is recomputed
+    row = pd.read_csv(path, nrows=1)
+    agent.ingest(row)
+    agent.run({"campaign_name": ["men comfortmax"], "analysis_window_days": 14})
+    agent.run({"campaign_name": "men comfortmax", "analysis_window_days": 14})
+    assert cache.stats()["misses"] == 2 and cache.stats()["memory_hits"] == 2
@@ -0,0 +1,53 @@
+import threading
+import time
+from src.orchestrator.scheduler import DAGScheduler, build_agent_dag
+
+
+def _sleeper(name, seconds):
+    def task(results):
+        time.sleep(seconds)
+        return name
+    return task
+
+
+def test_build_agent_dag_filters_to_agent_flow():
+    dag = build_agent_dag(["data_agent", "insight_agent", "creative_agent", "bogus_agent"])
+    assert dag == {
+        "data_agent": [],
+        "insight_agent": ["data_agent"],
+        "creative_agent": ["data_agent", "insight_agent"],
+    }
+
+
+def test_independent_agents_run_concurrently():
+    dag = build_agent_dag(["data_agent", "insight_agent", "evaluator_agent", "creative_agent"])
+    # Evaluator and creative only get past the barrier if both are running at once
+    both_running = threading.Barrier(2, timeout=10)
+
+    def meet(name):
+        def task(results):
+            both_running.wait()
+            time.sleep(0.01)
+            return name
+        return task
+
+    tasks = {"data_agent": _sleeper("data_agent", 0.01), "insight_agent": _sleeper("insight_agent", 0.01),
+             "evaluator_agent": meet("evaluator_agent"), "creative_agent": meet("creative_agent")}
+
+    results, timings = DAGScheduler().run(dag, tasks)
+
+    assert results == {agent: agent for agent in dag}
+    assert len(timings["critical_path"]) == 3
+
+
+def test_failed_agent_skips_dependents():
+    dag = build_agent_dag(["data_agent", "insight_agent", "evaluator_agent"])
+
+    def boom(results):
+        raise RuntimeError("no data")
+
+    tasks = {"data_agent": boom, "insight_agent": _sleeper("i", 0), "evaluator_agent": _sleeper("e", 0)}
+    results, timings = DAGScheduler().run(dag, tasks)
+
+    assert results == {}
+    assert "error" in timings["agents"]["data_agent"]
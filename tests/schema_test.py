@@ -0,0 +1,35 @@
+import pandas as pd
+from src.utils.chunked_scan import scan_daily_aggregates
+from src.utils.data_utils import load_csv_data
+
+HEADER = "campaign_name,adset_name,date,spend,impressions,clicks,ctr,purchases,revenue,roas,creative_message\n"
+ROWS = [
+    "Men ComfortMax,Adset-1,2025-03-01,10.5,1000,20.0,0.02,2,30.0,2.86,Soft\n",
+    "Men ComfortMax,Adset-1,2025-03-02,12.0,1200,24.5,0.02,3,40.0,3.33,Soft\n",
+    ",Adset-1,2025-03-02,5.0,100,1.0,0.01,0,0.0,0.0,Soft\n",                   # missing campaign
+    "Men ComfortMax,Adset-1,not-a-date,5.0,100,1.0,0.01,0,0.0,0.0,Soft\n",     # bad date
+    "Men ComfortMax,Adset-1,2025-03-03,-1.0,100,1.0,0.01,0,0.0,0.0,Soft\n",    # negative spend
+    "Men ComfortMax,Adset-1,2025-03-03,5.0,10,11.0,0.01,0,0.0,0.0,Soft\n",     # clicks > impressions
+]
+
+
+def test_typed_load_rejects_invalid_rows(tmp_path):
+    path = tmp_path / "ads.csv"
+    path.write_text(HEADER + "".join(ROWS), encoding="utf-8")
+    df = load_csv_data(str(path))
+
+    assert len(df) == 2
+    assert str(df["impressions"].dtype) == "int32" and str(df["purchases"].dtype) == "int32"
+    assert isinstance(df["creative_message"].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(df["date"])
+    assert df["clicks"].tolist() == [20.0, 24.5]
+
+
+def test_text_in_numeric_column_rejects_the_row_not_the_file(tmp_path):
+    path = tmp_path / "ads.csv"
+    rows = ROWS[:2] * 3 + ["Men ComfortMax,Adset-1,2025-03-04,ten,100,1.0,0.01,0,0.0,0.0,Soft\n"] + ROWS[:1]
+    path.write_text(HEADER + "".join(rows), encoding="utf-8")
+
+    assert len(load_csv_data(str(path))) == 7
+    daily = scan_daily_aggregates(str(path), chunk_rows=3)
+    assert daily["rows"].sum() == 7 and daily["spend"].sum() == 10.5 * 4 + 12.0 * 3
@@ -0,0 +1,72 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+import pytest
+from src.orchestrator.run import AgentSuite
+from src.orchestrator.server import AnalysisService, ServiceBusy, make_server
+from src.utils.llm import FakeLLM
+
+PLAN = {"objective": "Summarize", "campaign_name": None, "agent_flow": ["data_agent", "insight_agent"]}
+
+
+def fake_responder(prompt):
+    if "Planner Agent" in prompt:
+        return json.dumps(PLAN)
+    return json.dumps([{"hypothesis_id": "H1", "hypothesis": "x"}])
+
+
+def _request(base, path, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    try:
+        with urllib.request.urlopen(urllib.request.Request(base + path, data=data), timeout=30) as r:
+            return r.status, json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.fixture
+def served(tmp_path, repo_cwd):
+    llm = FakeLLM(responses=fake_responder)
+    agents = AgentSuite(llm=llm, cache_root=str(tmp_path / "cache"))
+    service = AnalysisService(agents=agents, max_workers=1, max_pending=0,
+                              timeout_sec=30, report_root=str(tmp_path))
+    server = make_server(service, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield service, llm, "http://127.0.0.1:%d" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def test_analyze_over_http_with_warm_agents(served, tmp_path):
+    service, llm, base = served
+
+    status, result = _request(base, "/analyze", {"query": "same again", "id": "q1", "include_outputs": True})
+    assert status == 200 and result["status"] == "success"
+    assert result["report"].startswith("# 📊") and "planner" in result["outputs"]
+    assert (tmp_path / "q1" / "report.md").exists()
+
+    assert _request(base, "/analyze", {"nope": 1})[0] == 400
+    for bad in ({"timeout_sec": "30"}, {"timeout_sec": []}, {"timeout_sec": 0}, {"timeout_sec": True}, {"id": 7}):
+        assert _request(base, "/analyze", {"query": "same again", **bad})[0] == 400
+    status, health = _request(base, "/health")
+    assert status == 200 and health["completed"] == 1 and health["in_flight"] == 0
+
+
+def test_busy_and_timeout(served):
+    service, llm, base = served
+    # The query blocks in its first LLM call until released, however slow the runner is
+    release = threading.Event()
+    llm.responses = lambda prompt: release.wait(30) and fake_responder(prompt)
+
+    try:
+        result = service.analyze("same again", "slow", timeout_sec=0.1)
+        assert result["status"] == "timeout"
+
+        # The timed-out query still holds the only slot until it finishes
+        with pytest.raises(ServiceBusy):
+            service.analyze("same again")
+        assert _request(base, "/analyze", {"query": "same again"})[0] == 503
+    finally:
+        release.set()
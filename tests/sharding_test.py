@@ -0,0 +1,48 @@
+import pytest
+from src.agents.data_agent import DataAgent
+from src.benchmarks.synthetic_data import write_synthetic_csv
+from src.utils.campaign_canonical import CampaignCanonicalizer
+from src.utils.data_utils import aggregate_daily_rows, aggregate_rows
+from src.utils.dataset_store import load_dataset
+from src.utils.sharding import ShardedAggregator
+
+
+@pytest.fixture(scope="module")
+def aggregator():
+    agg = ShardedAggregator(workers=2, min_rows_per_shard=500)
+    yield agg
+    agg.close()
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    root = tmp_path_factory.mktemp("shard")
+    path = write_synthetic_csv(str(root / "ads.csv"), 4000, seed=11)
+    canonicalizer = CampaignCanonicalizer.for_source(path, root=str(root / "campaigns"))
+    return load_dataset(path, cache_root=str(root / "cache"), canonicalizer=canonicalizer)
+
+
+def test_sharded_daily_aggregates_are_identical(aggregator, dataset):
+    assert aggregator.shard_count(len(dataset)) == 2
+    assert aggregator.aggregate_daily_rows(dataset).equals(aggregate_daily_rows(dataset))
+
+
+@pytest.mark.parametrize("keys", [["platform"], ["platform", "country"], ["campaign_name_clean", "creative_type"]])
+def test_sharded_segment_aggregates_are_identical(aggregator, dataset, keys):
+    peak_fields = {"campaign": "campaign_name", "date": "date"}
+    expected = aggregate_rows(dataset, keys, peak_fields)
+    assert aggregator.aggregate_rows(dataset, keys, peak_fields).equals(expected)
+
+
+def test_small_frames_stay_in_process():
+    assert ShardedAggregator(workers=8, min_rows_per_shard=1000).shard_count(1500) == 1
+
+
+def test_data_agent_close_shuts_down_its_pool(tmp_path):
+    path = write_synthetic_csv(str(tmp_path / "ads.csv"), 1200, seed=2)
+    root = str(tmp_path / "cache")
+    with DataAgent(path, cache_root=root, aggregate_root=root, canonical_root=root, result_cache=False) as agent:
+        agent.aggregator = ShardedAggregator(workers=2, min_rows_per_shard=500)
+        agent.aggregator.aggregate_daily_rows(agent.data)
+        assert agent.aggregator._pool is not None
+    assert agent.aggregator._pool is None
@@ -0,0 +1,50 @@
+from src.utils.summary_utils import build_llm_payload, estimate_tokens
+
+
+def _trends(campaigns, days=28):
+    rows = []
+    for c_idx, campaign in enumerate(campaigns):
+        for day in range(days):
+            rows.append({
+                "date": f"2025-03-{day + 1:02d}",
+                "campaign_name_clean": campaign,
+                "revenue": 1000.0 - day * 10,
+                "spend": 100.0 + c_idx,
+                "roas": 10.0 - day * 0.1,
+                "ctr": 0.02,
+            })
+    return rows
+
+
+def test_payload_replaces_daily_trends_with_statistics():
+    data_output = {"date_range": "x", "daily_trends": _trends(["a"])}
+    payload = build_llm_payload(data_output, token_budget=5000)
+
+    assert "daily_trends" not in payload
+    stats = payload["trend_summary"]["a"]
+    assert stats["slope_per_day"]["roas"] < 0
+    assert stats["week_over_week"]["revenue"] < 0
+    assert "daily_trends" in data_output
+
+
+def test_payload_respects_token_budget():
+    data_output = {"daily_trends": _trends([f"campaign {i}" for i in range(40)])}
+    payload = build_llm_payload(data_output, token_budget=1500)
+
+    assert estimate_tokens(payload) <= 1500
+    assert payload["trend_summary_truncated"] is True
+    # Highest-spend campaign survives trimming
+    assert "campaign 39" in payload["trend_summary"]
+
+
+def test_single_campaign_payload_drops_events_to_fit():
+    events = {"a": [
+        {"date": f"2025-03-{day + 1:02d}", "metric": metric, "type": "anomaly", "value": 1.0, "z": 3.0 + day}
+        for day in range(20) for metric in ("roas", "ctr", "spend", "revenue")
+    ]}
+    payload = build_llm_payload({"daily_trends": _trends(["a"]), "metric_events": events}, token_budget=100)
+
+    assert estimate_tokens(payload) <= 100
+    assert payload["trend_summary_truncated"] is True
+    assert payload["metric_events"] == {}
+    assert payload["trend_summary"]["a"]["slope_per_day"]["roas"] < 0
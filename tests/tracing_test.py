@@ -0,0 +1,57 @@
+import json
+from types import SimpleNamespace
+import pandas as pd
+import pytest
+from src.orchestrator.run import run_query
+from src.utils.llm import FakeLLM
+from src.utils.logging_utils import Logger
+from src.utils.tracing import Tracer, span, use_tracer
+
+
+def test_spans_are_recorded_with_attributes_and_exported(tmp_path):
+    tracer = Tracer(name="test")
+    with use_tracer(tracer):
+        with span("outer", "agent") as s:
+            s.set(rows=3)
+            FakeLLM(responses="[1, 2]").llm_call("prompt text")
+        with pytest.raises(ValueError):
+            with span("failing"):
+                raise ValueError("boom")
+
+    events = {e["name"]: e for e in tracer.to_chrome_trace()["traceEvents"] if e["ph"] == "X"}
+    assert events["outer"]["args"]["rows"] == 3
+    assert events["llm_call"]["args"]["prompt_chars"] == len("prompt text")
+    assert events["llm_call"]["args"]["cache_hit"] is False
+    assert events["failing"]["args"]["error"] == "boom"
+    assert events["llm_call"]["ts"] >= events["outer"]["ts"]
+
+    path = tracer.export(str(tmp_path / "trace.json"))
+    assert json.load(open(path))["otherData"]["summary"]["outer"]["count"] == 1
+
+
+def test_span_outside_a_traced_run_is_a_noop():
+    with span("untraced") as s:
+        s.set(x=1)
+    assert s.attrs == {"x": 1}
+
+
+def test_logger_files_do_not_collide_within_one_second(tmp_path):
+    for agent in ("InsightAgent", "CreativeAgent", "InsightAgent"):
+        logger = Logger(log_folder=str(tmp_path))
+        logger.start(agent)
+        logger.end()
+    assert len(list(tmp_path.iterdir())) == 3
+
+
+def test_run_query_trace_keeps_the_original_error(tmp_path, repo_cwd):
+    class FailingPlanner:
+        def run(self, query):
+            with span("planner.lookup", "data", since=pd.Timestamp("2025-03-01")):
+                raise RuntimeError("planner down")
+
+    # A non-JSON span attribute must not mask the pipeline's own error
+    with pytest.raises(RuntimeError, match="planner down"):
+        run_query("q", SimpleNamespace(planner=FailingPlanner()), report_dir=str(tmp_path))
+    with open(tmp_path / "trace.json", encoding="utf-8") as f:
+        events = json.load(f)["traceEvents"]
+    assert any(e.get("args", {}).get("since") == "2025-03-01 00:00:00" for e in events)